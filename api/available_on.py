@@ -0,0 +1,21 @@
+import os
+import sys
+
+# The availability engine lives in the project root, shared with server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import check_yosemite
+from vercel_handler import VercelHandler
+
+class Handler(VercelHandler):
+    ENDPOINT = '/api/available_on'
+    
+    def handle_post(self):
+        try:
+            params = check_yosemite.parse_available_on_request(self.read_json())
+        except ValueError as e:
+            self.send_error_json(400, str(e))
+            return
+        
+        # Answered from the park-wide night -> sites index; only months not cached fresh go upstream
+        self.send_json(check_yosemite.find_available_on(**params))
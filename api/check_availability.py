@@ -1,206 +1,84 @@
-from http.server import BaseHTTPRequestHandler
-import json
-import requests
-from datetime import datetime, timedelta
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
 
-# Campground facility IDs and names
-CAMPGROUND_NAMES = {
-    "232447": "Upper Pines",
-    "232450": "Lower Pines",
-    "232449": "North Pines",
-    "232451": "Hodgdon Meadow",
-    "232452": "Crane Flat",
-    "232446": "Wawona",
-    "232448": "Tuolumne Meadows",
-    "10083567": "White Wolf",
-    "232453": "Bridalveil Creek",
-    "10083840": "Yosemite Creek",
-    "10083831": "Porcupine Flat",
-    "10083845": "Tamarack Flat",
-    "232445": "Watchman",
-    "232458": "Platte River"
-}
+# The availability engine lives in the project root, shared with server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def check_campsite_availability(facility_id, start_date, end_date):
-    """
-    Check campsite availability for a given facility ID and date range.
-    
-    Args:
-        facility_id (str): Recreation.gov facility ID
-        start_date (str): Start date in YYYY-MM-DD format
-        end_date (str): End date in YYYY-MM-DD format
-        
-    Returns:
-        dict: Dictionary containing availability info and reservation type
-    """
-    # Create a set of months to check
-    start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
-    end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-    
-    # If dates span multiple months, we need to check each month
-    months_to_check = []
-    current_month = start_date_obj.replace(day=1)
-    
-    while current_month <= end_date_obj:
-        months_to_check.append(current_month.strftime('%Y-%m-01'))
-        # Move to next month
-        if current_month.month == 12:
-            current_month = current_month.replace(year=current_month.year + 1, month=1)
-        else:
-            current_month = current_month.replace(month=current_month.month + 1)
-    
-    # Check availability for each month
-    availability = {}
-    reservation_types = {}
-    is_first_come_first_served = False
+import check_yosemite
+import metrics
+import timing
+from http_encoding import compress_stream, negotiate_encoding
+from streaming import STREAM_CONTENT_TYPES, get_stream_format, stream_availability
+from vercel_handler import VercelHandler
+
+# The only path this function answers GETs on
+METRICS_PATH = '/api/metrics'
+
+class Handler(VercelHandler):
+    ENDPOINT = '/api/check_availability'
     
-    for month_date in months_to_check:
+    def handle_post(self):
         try:
-            # Make API request with URL-encoded date format
-            formatted_date = f"{month_date}T00%3A00%3A00.000Z"
-            url = f"https://www.recreation.gov/api/camps/availability/campground/{facility_id}/month?start_date={formatted_date}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code != 200:
-                print(f"Failed to fetch data for facility {facility_id}: {response.status_code}")
-                continue
-            
-            data = response.json()
-            
-            # Process the response data
-            for site_id, details in data.get('campsites', {}).items():
-                # Check if the site is first-come, first-served
-                if 'reservationService' in details and details['reservationService'] == 'fcfs':
-                    is_first_come_first_served = True
-                    if site_id not in reservation_types:
-                        reservation_types[site_id] = 'fcfs'
-                else:
-                    if site_id not in reservation_types:
-                        reservation_types[site_id] = 'online'
-                
-                for date_str, status in details.get('availabilities', {}).items():
-                    # Extract just the date part (YYYY-MM-DD) for comparison
-                    date_part = date_str.split('T')[0] if 'T' in date_str else date_str
-                    
-                    # Compare dates as strings (YYYY-MM-DD format ensures correct comparison)
-                    if date_part >= start_date and date_part <= end_date:
-                        if status == 'Available':
-                            if date_part not in availability:
-                                availability[date_part] = []
-                            availability[date_part].append(site_id)
-        except Exception as e:
-            print(f"Error checking availability for month {month_date}: {e}")
-            # Continue to next month
-            continue
-    
-    # Return the results
-    return {
-        'availability': availability,
-        'reservation_types': reservation_types,
-        'is_first_come_first_served': is_first_come_first_served
-    }
-
-class Handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        data = json.loads(post_data)
+            params = check_yosemite.parse_availability_request(self.read_json())
+        except ValueError as e:
+            self.send_error_json(400, str(e))
+            return
         
-        if not data or 'startDate' not in data or 'endDate' not in data or 'campgrounds' not in data:
-            self.send_response(400)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        # Stream each campground as soon as its months finish, if the client asked for it
+        query = parse_qs(urlparse(self.path).query)
+        stream_format = get_stream_format(query.get('stream', [None])[0], self.headers.get('Accept'))
+        if stream_format:
+            records = stream_availability(check_yosemite, params['campgrounds'], params['start_date'], params['end_date'],
+                                          stream_format, use_cache=params['use_cache'], nights=params['nights'])
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+            
+            self.send_response(200)
+            self.send_header('Content-type', STREAM_CONTENT_TYPES[stream_format])
+            self.send_header('Cache-Control', 'no-cache')
+            if encoding:
+                # Compressed record by record, so each campground still arrives as soon as it is ready
+                records = compress_stream(records, encoding)
+                self.send_header('Content-Encoding', encoding)
+                self.send_header('Vary', 'Accept-Encoding')
+            self.send_cors_headers()
             self.end_headers()
-            self.wfile.write(json.dumps({
-                'success': False, 
-                'error': 'Missing required parameters'
-            }).encode())
+            
+            for record in records:
+                self.wfile.write(record)
+                self.wfile.flush()
             return
         
-        start_date = data['startDate']
-        end_date = data['endDate']
-        campgrounds = data['campgrounds']
-        
-        # Validate date format
-        try:
-            datetime.strptime(start_date, '%Y-%m-%d')
-            datetime.strptime(end_date, '%Y-%m-%d')
-        except ValueError:
-            self.send_response(400)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        # Opt-in (PROFILE_REQUESTS=1): run the check under cProfile, on one thread so it sees the fetches too
+        debug = query.get('debug', [None])[0]
+        if timing.wants_profile(debug):
+            body = timing.profile_call(check_yosemite.check_availability, transport='blocking', **params)
+            self.send_response(200)
+            self.send_header('Content-type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_cors_headers()
             self.end_headers()
-            self.wfile.write(json.dumps({
-                'success': False, 
-                'error': 'Invalid date format. Use YYYY-MM-DD'
-            }).encode())
+            self.wfile.write(body)
             return
         
-        # Check availability for each campground
-        results = {}
-        found_any = False
+        result = check_yosemite.check_availability(**params)
         
-        for facility_id in campgrounds:
-            try:
-                availability_data = check_campsite_availability(facility_id, start_date, end_date)
-                
-                # Get campground name
-                campground_name = CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}")
-                
-                # Ensure we have all the expected keys in the response
-                if not isinstance(availability_data, dict):
-                    availability_data = {'availability': {}, 'reservation_types': {}, 'is_first_come_first_served': False}
-                
-                if 'availability' not in availability_data:
-                    availability_data['availability'] = {}
-                if 'reservation_types' not in availability_data:
-                    availability_data['reservation_types'] = {}
-                if 'is_first_come_first_served' not in availability_data:
-                    availability_data['is_first_come_first_served'] = False
-                
-                results[facility_id] = {
-                    'name': campground_name,
-                    'availability': availability_data['availability'],
-                    'reservation_types': availability_data['reservation_types'],
-                    'is_first_come_first_served': availability_data['is_first_come_first_served']
-                }
-                
-                if availability_data['availability'] and len(availability_data['availability']) > 0:
-                    found_any = True
-            except Exception as e:
-                print(f"Error checking availability for facility {facility_id}: {e}")
-                results[facility_id] = {
-                    'name': CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}"),
-                    'availability': {},
-                    'error': str(e)
-                }
+        # ?debug=timing: the phase timings so far (serialization and compression are only in Server-Timing)
+        if timing.wants_timing(debug):
+            result['timing'] = self.request_timer.to_dict()
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        self.send_json(result)
         
-        self.wfile.write(json.dumps({
-            'success': True,
-            'results': results,
-            'foundAny': found_any
-        }).encode())
+    def do_GET(self):
+        # Prometheus metrics for this function instance (vercel.json routes /api/metrics here); nothing else is a GET
+        if urlparse(self.path).path != METRICS_PATH:
+            self.send_error_json(404, 'Not found')
+            return
         
-    def do_OPTIONS(self):
+        body = metrics.render()
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Access-Control-Max-Age', '86400')  # 24 hours
+        self.send_header('Content-type', metrics.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
         self.end_headers()
+        self.wfile.write(body)
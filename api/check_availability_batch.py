@@ -0,0 +1,21 @@
+import os
+import sys
+
+# The availability engine lives in the project root, shared with server.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import check_yosemite
+from vercel_handler import VercelHandler
+
+class Handler(VercelHandler):
+    ENDPOINT = '/api/check_availability_batch'
+    
+    def handle_post(self):
+        try:
+            queries = check_yosemite.parse_batch_request(self.read_json())
+        except ValueError as e:
+            self.send_error_json(400, str(e))
+            return
+        
+        # Each distinct (facility, month) is fetched once for every query in the batch
+        self.send_json(check_yosemite.check_availability_batch(queries))
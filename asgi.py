@@ -0,0 +1,246 @@
+"""
+ASGI version of the /check_availability, /check_availability_batch and
+/available_on endpoints, on the native asyncio engine.
+
+Accepts the same POST bodies, ?stream= formats, ETags and compression as
+server.py and api/check_availability.py, but every upstream fetch is a
+coroutine, so one process holds many concurrent searches on a single event
+loop instead of a thread per in-flight request. Run it with any ASGI server:
+
+    uvicorn asgi:app --port 5000
+"""
+import json
+import time
+from urllib.parse import parse_qs
+
+import check_yosemite
+import metrics
+import timing
+import recreation_gov
+from http_encoding import StreamCompressor, encode_response, negotiate_encoding
+from json_encoding import dumps
+from streaming import STREAM_CONTENT_TYPES, get_stream_format, stream_availability_async
+
+# Paths served by the app: the Flask routes and the Vercel functions' paths
+CHECK_AVAILABILITY_PATHS = ('/check_availability', '/api/check_availability')
+CHECK_AVAILABILITY_BATCH_PATHS = ('/check_availability_batch', '/api/check_availability_batch')
+AVAILABLE_ON_PATHS = ('/available_on', '/api/available_on')
+METRICS_PATHS = ('/metrics', '/api/metrics')
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-methods', b'POST, OPTIONS'),
+    (b'access-control-allow-headers', b'Content-Type, If-None-Match')
+]
+
+async def read_body(receive):
+    """
+    Read a whole request body.
+
+    Args:
+        receive (callable): ASGI receive channel
+
+    Returns:
+        bytes: The request body
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+async def send_response(send, status, body, headers=()):
+    """
+    Send a complete response with CORS headers.
+
+    Args:
+        send (callable): ASGI send channel
+        status (int): HTTP status code
+        body (bytes): Response body
+        headers (iterable): Extra (name, value) header pairs as bytes
+    """
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [*headers, (b'content-length', str(len(body)).encode()), *CORS_HEADERS]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def send_json(send, status, payload):
+    """Send a plain JSON response (errors and other small bodies)."""
+    await send_response(send, status, dumps(payload), [(b'content-type', b'application/json')])
+
+async def send_encoded_json(send, request_headers, payload):
+    """
+    Send a JSON result with a content-hash ETag (304 if the client already has it), compressed when accepted.
+
+    Args:
+        send (callable): ASGI send channel
+        request_headers (dict): Lower-cased request headers
+        payload (dict): Response body to encode
+    """
+    with timing.phase('serialize'):
+        body = dumps(payload)
+    with timing.phase('encode'):
+        status, body, headers = encode_response(body, request_headers.get('if-none-match'), request_headers.get('accept-encoding'))
+
+    timer = timing.current_timer()
+    if timing.SERVER_TIMING and timer is not None:
+        headers['Server-Timing'] = timer.server_timing()
+    headers = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    await send_response(send, status, body, [(b'content-type', b'application/json'), *headers, (b'access-control-expose-headers', b'ETag, Server-Timing')])
+
+async def check_availability(scope, receive, send):
+    """Handle POST /check_availability."""
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+    try:
+        params = check_yosemite.parse_availability_request(json.loads(await read_body(receive) or b'null'))
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError too
+        await send_json(send, 400, {'success': False, 'error': str(e)})
+        return
+
+    # Stream each campground as soon as its months finish, if the client asked for it
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    stream_format = get_stream_format(query.get('stream', [None])[0], request_headers.get('accept'))
+    if stream_format:
+        headers = [(b'content-type', STREAM_CONTENT_TYPES[stream_format].encode()), (b'cache-control', b'no-cache')]
+        encoding = negotiate_encoding(request_headers.get('accept-encoding'))
+        compressor = StreamCompressor(encoding) if encoding else None
+        if compressor:
+            headers += [(b'content-encoding', encoding.encode()), (b'vary', b'Accept-Encoding')]
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers + CORS_HEADERS})
+        records = stream_availability_async(check_yosemite, params['campgrounds'], params['start_date'], params['end_date'],
+                                            stream_format, use_cache=params['use_cache'], nights=params['nights'])
+        try:
+            async for record in records:
+                await send({'type': 'http.response.body', 'body': compressor.compress(record) if compressor else record, 'more_body': True})
+        finally:
+            # Stops the remaining fetches if the client went away mid-stream
+            await records.aclose()
+        await send({'type': 'http.response.body', 'body': compressor.finish() if compressor else b''})
+        return
+
+    try:
+        result = await check_yosemite.check_availability_async(**params)
+    except Exception as e:
+        print(f"Error checking availability: {e}")
+        await send_json(send, 500, {'success': False, 'error': str(e)})
+        return
+
+    # ?debug=timing: the phase timings so far (serialization and compression are only in Server-Timing)
+    if timing.wants_timing(query.get('debug', [None])[0]):
+        result['timing'] = timing.current_timer().to_dict()
+
+    await send_encoded_json(send, request_headers, result)
+
+async def check_availability_batch(scope, receive, send):
+    """Handle POST /check_availability_batch."""
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+    try:
+        queries = check_yosemite.parse_batch_request(json.loads(await read_body(receive) or b'null'))
+    except ValueError as e:
+        await send_json(send, 400, {'success': False, 'error': str(e)})
+        return
+
+    try:
+        result = await check_yosemite.check_availability_batch_async(queries)
+    except Exception as e:
+        print(f"Error checking availability: {e}")
+        await send_json(send, 500, {'success': False, 'error': str(e)})
+        return
+
+    await send_encoded_json(send, request_headers, result)
+
+async def available_on(scope, receive, send):
+    """Handle POST /available_on."""
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+    try:
+        params = check_yosemite.parse_available_on_request(json.loads(await read_body(receive) or b'null'))
+    except ValueError as e:
+        await send_json(send, 400, {'success': False, 'error': str(e)})
+        return
+
+    try:
+        result = await check_yosemite.find_available_on_async(**params)
+    except Exception as e:
+        print(f"Error checking availability: {e}")
+        await send_json(send, 500, {'success': False, 'error': str(e)})
+        return
+
+    await send_encoded_json(send, request_headers, result)
+
+async def handle_instrumented(handler, scope, receive, send):
+    """Run a request handler under a phase timer, recording its latency, status and in-flight count for /metrics."""
+    endpoint = scope['path']
+    started = time.perf_counter()
+    status = 500
+
+    async def send_and_record(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        await send(message)
+
+    metrics.request_started(endpoint)
+    _, token = timing.start_request()
+    try:
+        await handler(scope, receive, send_and_record)
+    finally:
+        timing.end_request(token)
+        metrics.request_finished(endpoint, status, time.perf_counter() - started)
+
+async def lifespan(receive, send):
+    """Acknowledge startup, and close the upstream connections on shutdown."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await recreation_gov.close_async_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """
+    ASGI application.
+
+    Args:
+        scope (dict): ASGI connection scope
+        receive (callable): ASGI receive channel
+        send (callable): ASGI send channel
+    """
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    if scope['path'] in METRICS_PATHS and scope['method'] == 'GET':
+        await send_response(send, 200, metrics.render(), [(b'content-type', metrics.CONTENT_TYPE.encode()), (b'cache-control', b'no-cache')])
+        return
+
+    if scope['path'] in CHECK_AVAILABILITY_PATHS:
+        handler = check_availability
+    elif scope['path'] in CHECK_AVAILABILITY_BATCH_PATHS:
+        handler = check_availability_batch
+    elif scope['path'] in AVAILABLE_ON_PATHS:
+        handler = available_on
+    else:
+        await send_json(send, 404, {'success': False, 'error': 'Not found'})
+        return
+
+    if scope['method'] == 'OPTIONS':
+        await send_response(send, 200, b'', [(b'access-control-max-age', b'86400')])
+    elif scope['method'] == 'POST':
+        await handle_instrumented(handler, scope, receive, send)
+    else:
+        await send_json(send, 405, {'success': False, 'error': 'Method not allowed'})
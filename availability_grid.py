@@ -0,0 +1,209 @@
+import sys
+from datetime import datetime, timedelta
+
+class AvailabilityGrid:
+    """
+    Compact availability for one facility: an interned site-id table plus a
+    sites x days bitset.
+
+    Row i is an int whose bit d is set when site_ids[i] is available on the
+    d-th night of the range. The date -> sites and site -> dates views used
+    in JSON responses are only built on demand.
+    """
+
+    __slots__ = ('start_date', 'end_date', 'num_days', 'day_index', 'site_ids', 'site_index', 'rows', 'fcfs_mask')
+
+    def __init__(self, start_date, end_date):
+        """
+        Args:
+            start_date (str): First night in YYYY-MM-DD format
+            end_date (str): Last night in YYYY-MM-DD format (inclusive)
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+
+        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
+        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
+        self.num_days = max(0, (end_date_obj - start_date_obj).days + 1)
+
+        # YYYY-MM-DD -> day offset, for turning payload keys into bit positions
+        self.day_index = {
+            (start_date_obj + timedelta(days=day)).strftime('%Y-%m-%d'): day
+            for day in range(self.num_days)
+        }
+
+        self.site_ids = []
+        self.site_index = {}
+        self.rows = []
+        self.fcfs_mask = 0
+
+    def add_site(self, site_id, fcfs=False):
+        """
+        Get a site's row index, adding it to the table on first sight.
+
+        The reservation type recorded the first time a site is seen is kept.
+
+        Args:
+            site_id (str): Recreation.gov campsite ID
+            fcfs (bool): Whether the site is first-come, first-served
+
+        Returns:
+            int: Row index for the site
+        """
+        index = self.site_index.get(site_id)
+        if index is None:
+            index = len(self.site_ids)
+            site_id = sys.intern(site_id)
+            self.site_ids.append(site_id)
+            self.site_index[site_id] = index
+            self.rows.append(0)
+            if fcfs:
+                self.fcfs_mask |= 1 << index
+        return index
+
+    def add_month(self, data):
+        """
+        Fold one Recreation.gov month payload into the grid.
+
+        Args:
+            data (dict): Month payload with a 'campsites' mapping
+        """
+        day_index = self.day_index
+        rows = self.rows
+
+        for site_id, details in data.get('campsites', {}).items():
+            index = self.add_site(site_id, details.get('reservationService') == 'fcfs')
+
+            row = 0
+            for date_str, status in details.get('availabilities', {}).items():
+                if status == 'Available':
+                    # Keys look like 2025-07-01T00:00:00Z; the first 10 chars are the date
+                    day = day_index.get(date_str[:10])
+                    if day is not None:
+                        row |= 1 << day
+            rows[index] |= row
+
+    @property
+    def is_first_come_first_served(self):
+        """Whether any site in the grid is first-come, first-served."""
+        return self.fcfs_mask != 0
+
+    def dates(self):
+        """
+        Get the nights covered by the grid, one per bit position.
+
+        Returns:
+            list: Every night in the range, in YYYY-MM-DD format
+        """
+        return list(self.day_index)
+
+    def to_date_sites(self):
+        """
+        Build the date -> available site IDs view.
+
+        Returns:
+            dict: YYYY-MM-DD -> list of site IDs, in date order, only for dates with availability
+        """
+        by_day = {}
+        for site_id, row in zip(self.site_ids, self.rows):
+            while row:
+                low_bit = row & -row
+                by_day.setdefault(low_bit.bit_length() - 1, []).append(site_id)
+                row ^= low_bit
+
+        dates = self.dates()
+        return {dates[day]: by_day[day] for day in sorted(by_day)}
+
+    def to_site_dates(self):
+        """
+        Build the site ID -> available dates view.
+
+        Returns:
+            dict: Site ID -> list of YYYY-MM-DD dates, only for sites with availability
+        """
+        dates = self.dates()
+        availability = {}
+        for site_id, row in zip(self.site_ids, self.rows):
+            if not row:
+                continue
+            site_dates = []
+            while row:
+                low_bit = row & -row
+                site_dates.append(dates[low_bit.bit_length() - 1])
+                row ^= low_bit
+            availability[site_id] = site_dates
+        return availability
+
+    def reservation_types(self):
+        """
+        Build the site ID -> reservation type view.
+
+        Returns:
+            dict: Site ID -> 'fcfs' or 'online'
+        """
+        fcfs_mask = self.fcfs_mask
+        return {
+            site_id: 'fcfs' if fcfs_mask >> index & 1 else 'online'
+            for index, site_id in enumerate(self.site_ids)
+        }
+
+    def stay_starts(self, nights):
+        """
+        Find every (site, first night) where the site is free for `nights` nights in a row.
+
+        All rows are packed into one int, with nights - 1 zero bits between
+        rows, and ANDed with shifted copies of themselves (doubling the window
+        each step), so the whole facility is searched in O(log nights) big-int
+        operations instead of per-site, per-night loops.
+
+        Args:
+            nights (int): Length of the stay in nights
+
+        Returns:
+            list: (row index, day offset) pairs, ordered by site then night
+        """
+        if nights < 1 or nights > self.num_days or not self.rows:
+            return []
+
+        # Padding keeps a shifted window from reading into the next site's row
+        stride = self.num_days + nights - 1
+        packed = 0
+        for index, row in enumerate(self.rows):
+            if row:
+                packed |= row << (index * stride)
+
+        # Sliding-window AND: bit p survives only if bits p .. p + nights - 1 are all set
+        window = 1
+        while window < nights and packed:
+            step = min(window, nights - window)
+            packed &= packed >> step
+            window += step
+
+        # Walk the set bits through their binary string (least significant bit first)
+        bits = bin(packed)[:1:-1]
+        starts = []
+        position = bits.find('1')
+        while position != -1:
+            starts.append(divmod(position, stride))
+            position = bits.find('1', position + 1)
+        return starts
+
+    def find_stays(self, nights):
+        """
+        Build the start date -> site IDs view of `nights`-night stays.
+
+        Args:
+            nights (int): Length of the stay in nights
+
+        Returns:
+            dict: YYYY-MM-DD first night -> list of site IDs free for the whole stay, in date order
+        """
+        dates = self.dates()
+        by_day = {}
+        for index, day in self.stay_starts(nights):
+            by_day.setdefault(day, []).append(self.site_ids[index])
+        return {dates[day]: by_day[day] for day in sorted(by_day)}
+
+    def has_availability(self):
+        """Whether any site is available on any night."""
+        return any(self.rows)
@@ -0,0 +1,213 @@
+"""
+Benchmark: the asyncio engine behind asgi.py against the threaded sync engine.
+
+Starts the offline fake Recreation.gov (benchmarks/fake_recgov.py) in a
+subprocess, then runs the same batch of searches at increasing concurrency:
+
+- sync:  N threads each calling check_yosemite.check_availability (what the
+         Flask route and the Vercel Handler do per request thread)
+- asgi:  N tasks on one event loop each sending a POST /check_availability
+         through asgi.app in-process, so no ASGI server is needed
+
+Every search uses its own synthetic facility IDs, so nothing is served from
+the month cache or coalesced and each search costs campgrounds x months
+upstream calls. For every level it reports throughput, p50/p95 latency and the
+peak number of threads in the process.
+
+Usage:
+    python benchmarks/async_benchmark.py [--concurrency 16,64,256] [--campgrounds 4]
+                                         [--start-date 2025-07-01] [--end-date 2025-09-15]
+                                         [--latency 0.15] [--jitter 0.05]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from e2e_benchmark import percentile
+
+class ThreadSampler:
+    """Samples threading.active_count() on a background thread and keeps the peak."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.peak = threading.active_count()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            # Not counting the sampler itself
+            self.peak = max(self.peak, threading.active_count() - 1)
+            time.sleep(self.interval)
+
+def start_fake_subprocess(latency, jitter):
+    """Run the fake upstream in its own process, so its threads don't count, and return (process, base URL)."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_recgov.py'), '--port', str(port),
+                                '--latency', str(latency), '--jitter', str(jitter)], stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/__stats", timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Fake upstream did not start")
+
+def make_bodies(level, count, campgrounds, start_date, end_date):
+    """One search body per request, each over its own synthetic facility IDs."""
+    return [{
+        'startDate': start_date,
+        'endDate': end_date,
+        'campgrounds': [f"9{level:04d}{index:05d}{slot:02d}" for slot in range(campgrounds)]
+    } for index in range(count)]
+
+def run_sync(bodies, concurrency):
+    """
+    Run the searches on `concurrency` threads through the sync engine.
+
+    Returns:
+        tuple: (latencies in seconds, failures, wall-clock seconds, peak threads)
+    """
+    import check_yosemite
+
+    def one_search(body):
+        started = time.perf_counter()
+        params = check_yosemite.parse_availability_request(body)
+        ok = check_yosemite.check_availability(**params)['success']
+        return time.perf_counter() - started, ok
+
+    with ThreadSampler() as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(one_search, bodies))
+        wall = time.perf_counter() - started
+
+    return [latency for latency, _ in outcomes], sum(1 for _, ok in outcomes if not ok), wall, sampler.peak
+
+async def asgi_request(app, body):
+    """Send one POST /check_availability through an ASGI app and return (status, decoded body)."""
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'path': '/check_availability',
+        'query_string': b'',
+        'headers': [(b'content-type', b'application/json')]
+    }
+    request = [{'type': 'http.request', 'body': json.dumps(body).encode(), 'more_body': False}]
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        return request.pop() if request else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        else:
+            response['body'].append(message.get('body', b''))
+
+    await app(scope, receive, send)
+    return response['status'], b''.join(response['body'])
+
+def run_asgi(bodies, concurrency):
+    """
+    Run the searches as `concurrency` concurrent tasks through asgi.app on one event loop.
+
+    Returns:
+        tuple: (latencies in seconds, failures, wall-clock seconds, peak threads)
+    """
+    import asgi
+    import recreation_gov
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one_search(body):
+            async with semaphore:
+                started = time.perf_counter()
+                status, payload = await asgi_request(asgi.app, body)
+                return time.perf_counter() - started, status == 200 and json.loads(payload)['success']
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(one_search(body) for body in bodies))
+        wall = time.perf_counter() - started
+        # What asgi.py's lifespan shutdown does
+        await recreation_gov.close_async_client()
+        return outcomes, wall
+
+    with ThreadSampler() as sampler:
+        outcomes, wall = asyncio.run(run())
+
+    return [latency for latency, _ in outcomes], sum(1 for _, ok in outcomes if not ok), wall, sampler.peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', default='16,64,256', help='Comma-separated concurrent search counts')
+    parser.add_argument('--campgrounds', type=int, default=4, help='Campgrounds per search')
+    parser.add_argument('--start-date', default='2025-07-01')
+    parser.add_argument('--end-date', default='2025-09-15')
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--targets', default='sync,asgi')
+    args = parser.parse_args()
+
+    fake_process, base_url = start_fake_subprocess(args.latency, args.jitter)
+
+    # Configure the app before its modules are imported
+    os.environ['RECGOV_BASE_URL'] = base_url
+    os.environ.setdefault('SNAPSHOT_STORE', '0')
+    os.environ.setdefault('RATE_LIMIT_INITIAL', '100000')
+    os.environ.setdefault('RATE_LIMIT_MAX', '100000')
+    os.environ.setdefault('RECGOV_POOL_SIZE', '256')
+
+    from check_yosemite import get_months_to_check
+    from month_cache import month_cache
+
+    runners = {'sync': run_sync, 'asgi': run_asgi}
+    months = len(get_months_to_check(args.start_date, args.end_date))
+
+    print(f"Fake upstream: {args.latency * 1000:.0f} ms +/- {args.jitter * 1000:.0f} ms")
+    print(f"Search: {args.campgrounds} campgrounds x {months} months, {args.start_date} to {args.end_date}, "
+          f"one search per concurrent client\n")
+    print(f"{'target':<6} {'conc':>5} {'searches/s':>11} {'p50 ms':>8} {'p95 ms':>8} {'threads':>8} {'failed':>7}")
+
+    try:
+        for level, concurrency in enumerate(int(level) for level in args.concurrency.split(',')):
+            for target in args.targets.split(','):
+                month_cache.clear()
+                bodies = make_bodies(level, concurrency, args.campgrounds, args.start_date, args.end_date)
+                latencies, failures, wall, threads = runners[target](bodies, concurrency)
+                print(f"{target:<6} {concurrency:>5} {len(latencies) / wall:>11.1f} "
+                      f"{statistics.median(latencies) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+                      f"{threads:>8} {failures:>7}")
+    finally:
+        fake_process.terminate()
+
+if __name__ == '__main__':
+    main()
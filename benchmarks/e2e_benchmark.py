@@ -0,0 +1,151 @@
+"""
+End-to-end benchmark of /check_availability against the offline fake Recreation.gov.
+
+Starts the fake upstream (benchmarks/fake_recgov.py), server.py's Flask app and
+the Vercel Handler from api/check_availability.py on local ports, then drives
+each with full-park searches at increasing concurrency. For every level it
+reports throughput, p50/p95/p99 latency and upstream calls per request.
+
+The month cache is cleared before each level, so every level starts cold.
+
+Usage:
+    python benchmarks/e2e_benchmark.py [--concurrency 1,4,16,64] [--requests 64]
+                                       [--latency 0.15] [--jitter 0.05] [--error-rate 0.0]
+                                       [--fixtures DIR] [--replay-timing]
+                                       [--force-refresh] [--targets flask,vercel]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_recgov import SITE_COUNTS, FakeRecGov, start_fake_server
+
+def start_flask(port=0):
+    """Serve server.py's Flask app on a daemon thread and return its base URL."""
+    from werkzeug.serving import make_server
+    import server
+
+    http_server = make_server('127.0.0.1', port, server.app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{http_server.server_port}/check_availability"
+
+def start_vercel(port=0):
+    """Serve the Vercel Handler on a daemon thread and return its base URL."""
+    spec = importlib.util.spec_from_file_location("check_availability", os.path.join(ROOT, 'api', 'check_availability.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    http_server = ThreadingHTTPServer(('127.0.0.1', port), module.Handler)
+    http_server.daemon_threads = True
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{http_server.server_port}/api/check_availability"
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def run_level(url, body, concurrency, total_requests):
+    """
+    Send total_requests POSTs with `concurrency` clients in parallel.
+
+    Returns:
+        tuple: (latencies in seconds, failures, wall-clock seconds)
+    """
+    local = threading.local()
+
+    def one_request(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = local.session.post(url, json=body, timeout=120)
+            ok = response.status_code == 200 and response.json().get('success')
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - started
+
+    latencies = [latency for latency, ok in outcomes if ok]
+    failures = sum(1 for _, ok in outcomes if not ok)
+    return latencies, failures, wall
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated client counts')
+    parser.add_argument('--requests', type=int, default=64, help='Requests per concurrency level')
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--fixtures', help='Fixture directory recorded by test_api.py --record')
+    parser.add_argument('--replay-timing', action='store_true', help="Use each fixture's recorded latency")
+    parser.add_argument('--start-date', default='2025-07-01')
+    parser.add_argument('--end-date', default='2025-09-15')
+    parser.add_argument('--force-refresh', action='store_true', help='Send forceRefresh to bypass the month cache')
+    parser.add_argument('--targets', default='flask,vercel')
+    args = parser.parse_args()
+
+    fake = FakeRecGov(args.latency, args.jitter, args.error_rate, args.throttle_rate, args.fixtures,
+                      args.replay_timing)
+    fake_server = start_fake_server(fake)
+
+    # Configure the app before its modules are imported
+    os.environ['RECGOV_BASE_URL'] = f"http://127.0.0.1:{fake_server.server_port}"
+    os.environ.setdefault('SNAPSHOT_STORE', '0')
+    os.environ.setdefault('RATE_LIMIT_INITIAL', '1000')
+    os.environ.setdefault('RATE_LIMIT_MAX', '1000')
+
+    from check_yosemite import CAMPGROUND_NAMES
+    from month_cache import month_cache
+
+    body = {
+        'startDate': args.start_date,
+        'endDate': args.end_date,
+        'campgrounds': [facility_id for facility_id in CAMPGROUND_NAMES if facility_id in SITE_COUNTS],
+        'forceRefresh': args.force_refresh
+    }
+
+    starters = {'flask': start_flask, 'vercel': start_vercel}
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    print(f"Fake upstream: {args.latency * 1000:.0f} ms +/- {args.jitter * 1000:.0f} ms, "
+          f"{args.error_rate:.0%} errors, {args.throttle_rate:.0%} throttled")
+    print(f"Search: {len(body['campgrounds'])} campgrounds, {args.start_date} to {args.end_date}, "
+          f"forceRefresh={args.force_refresh}\n")
+    print(f"{'target':<8} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'upstream/req':>13} {'failed':>7}")
+
+    for target in args.targets.split(','):
+        url = starters[target]()
+        for concurrency in levels:
+            month_cache.clear()
+            fake.reset()
+
+            latencies, failures, wall = run_level(url, body, concurrency, args.requests)
+            upstream_calls = fake.stats()['requests']
+
+            if latencies:
+                print(f"{target:<8} {concurrency:>5} {len(latencies) / wall:>8.1f} "
+                      f"{statistics.median(latencies) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+                      f"{percentile(latencies, 99) * 1000:>8.0f} {upstream_calls / args.requests:>13.2f} {failures:>7}")
+            else:
+                print(f"{target:<8} {concurrency:>5} {'all requests failed':>49} {failures:>7}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+"""
+Offline stand-in for Recreation.gov's month availability endpoint.
+
+Serves GET /api/camps/availability/campground/{facility_id}/month?start_date=...
+with synthetic payloads shaped like the real ones, or with month responses
+recorded by `python test_api.py --record`, with configurable latency, jitter,
+error and throttle rates (or the recorded latency with --replay-timing).
+Responses carry an ETag and Last-Modified, and a conditional request for an
+unchanged month gets a 304. GET /__stats returns request counters;
+POST /__reset clears them.
+
+Point the app at it with RECGOV_BASE_URL=http://127.0.0.1:<port>.
+
+Usage:
+    python benchmarks/fake_recgov.py [--port 8765] [--latency 0.15] [--jitter 0.05]
+                                     [--error-rate 0.0] [--throttle-rate 0.0]
+                                     [--fixtures DIR] [--replay-timing]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from calendar import monthrange
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_store import FixtureStore
+
+# Approximate site counts, so payload sizes resemble the real campgrounds
+SITE_COUNTS = {
+    "232447": 238,
+    "232450": 60,
+    "232449": 81,
+    "232451": 105,
+    "232452": 166,
+    "232446": 93,
+    "232448": 304,
+    "10083567": 74,
+    "232453": 110,
+    "10083840": 75,
+    "10083831": 52,
+    "10083845": 52,
+    "232445": 190,
+    "232458": 10
+}
+DEFAULT_SITE_COUNT = 100
+
+def make_month_payload(facility_id, month_date, num_sites=None, available_ratio=0.2):
+    """
+    Build a deterministic synthetic month payload for a facility.
+
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        month_date (str): Month start date in YYYY-MM-01 format
+        num_sites (int): Number of campsites (defaults to SITE_COUNTS or DEFAULT_SITE_COUNT)
+        available_ratio (float): Share of cells that are Available
+
+    Returns:
+        dict: Payload in the same shape as Recreation.gov's
+    """
+    if num_sites is None:
+        num_sites = SITE_COUNTS.get(facility_id, DEFAULT_SITE_COUNT)
+
+    rng = random.Random(zlib.crc32(f"{facility_id}:{month_date}".encode()))
+    year, month = int(month_date[:4]), int(month_date[5:7])
+    days = monthrange(year, month)[1]
+    dates = [f"{month_date[:8]}{day:02d}T00:00:00Z" for day in range(1, days + 1)]
+
+    campsites = {}
+    for site in range(num_sites):
+        campsite_id = str(int(facility_id) * 1000 + site)
+        fcfs = site % 25 == 0
+        campsites[campsite_id] = {
+            'availabilities': {
+                date: 'Available' if rng.random() < available_ratio else rng.choice(['Reserved', 'Reserved', 'Not Reservable'])
+                for date in dates
+            },
+            'campsite_id': campsite_id,
+            'campsite_reserve_type': 'Site-Specific',
+            'campsite_rules': None,
+            'campsite_type': 'STANDARD NONELECTRIC',
+            'capacity_rating': 'Single',
+            'loop': f"Loop {chr(ord('A') + site % 6)}",
+            'max_num_people': 6,
+            'min_num_people': 0,
+            'quantities': None,
+            'reservationService': 'fcfs' if fcfs else 'online',
+            'site': f"{site + 1:03d}",
+            'supplemental_camping': None,
+            'type_of_use': 'Overnight'
+        }
+
+    return {'campsites': campsites, 'count': num_sites}
+
+class FakeRecGov:
+    """Configuration, payload source and counters shared by the request handler."""
+
+    def __init__(self, latency=0.15, jitter=0.05, error_rate=0.0, throttle_rate=0.0, fixtures=None,
+                 replay_timing=False, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.fixtures = FixtureStore(fixtures) if fixtures else None
+        self.replay_timing = replay_timing
+        self._rng = random.Random(seed)
+        self._bodies = {}
+        self._etags = {}
+        self.started_at = formatdate(time.time(), usegmt=True)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear the request counters."""
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.throttled = 0
+            self.not_modified = 0
+            self.bytes_sent = 0
+            self.per_key = {}
+
+    def body_for(self, facility_id, month_date):
+        """Get the encoded payload for a month, from fixtures if configured."""
+        key = (facility_id, month_date)
+        body = self._bodies.get(key)
+        if body is None:
+            if self.fixtures is not None:
+                body = self.fixtures.load_body(facility_id, month_date)
+            if body is None:
+                body = json.dumps(make_month_payload(facility_id, month_date)).encode()
+            self._etags[key] = '"' + hashlib.md5(body).hexdigest() + '"'
+            self._bodies[key] = body
+        return body
+
+    def etag_for(self, facility_id, month_date):
+        """Get the ETag of a month's payload."""
+        self.body_for(facility_id, month_date)
+        return self._etags[(facility_id, month_date)]
+
+    def pick_outcome(self, facility_id=None, month_date=None):
+        """Decide latency and status for one request."""
+        latency = self.latency
+        if self.replay_timing and self.fixtures is not None:
+            entry = self.fixtures.entry(facility_id, month_date)
+            if entry is not None and entry.get('elapsed') is not None:
+                latency = entry['elapsed']
+
+        with self._lock:
+            delay = max(0.0, latency + self._rng.uniform(-self.jitter, self.jitter))
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            return delay, 500
+        if roll < self.error_rate + self.throttle_rate:
+            return delay, 429
+        return delay, 200
+
+    def record(self, facility_id, month_date, status, bytes_sent=0):
+        """Count one served request."""
+        with self._lock:
+            self.requests += 1
+            self.per_key[(facility_id, month_date)] = self.per_key.get((facility_id, month_date), 0) + 1
+            self.bytes_sent += bytes_sent
+            if status == 500:
+                self.errors += 1
+            elif status == 429:
+                self.throttled += 1
+            elif status == 304:
+                self.not_modified += 1
+
+    def stats(self):
+        """Get request counters."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'throttled': self.throttled,
+                'not_modified': self.not_modified,
+                'bytes_sent': self.bytes_sent,
+                'distinct_months': len(self.per_key)
+            }
+
+def make_handler(fake):
+    """Build a request handler class bound to a FakeRecGov instance."""
+
+    class FakeRecGovHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body, headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+
+            if url.path == '/__stats':
+                self._send_json(200, json.dumps(fake.stats()).encode())
+                return
+
+            parts = url.path.strip('/').split('/')
+            if len(parts) != 6 or parts[:4] != ['api', 'camps', 'availability', 'campground'] or parts[5] != 'month':
+                self._send_json(404, b'{"error": "Not found"}')
+                return
+
+            facility_id = parts[4]
+            start_date = parse_qs(url.query).get('start_date', [''])[0]
+            month_date = start_date[:10]
+
+            delay, status = fake.pick_outcome(facility_id, month_date)
+            time.sleep(delay)
+
+            if status == 500:
+                fake.record(facility_id, month_date, status)
+                self._send_json(500, b'{"error": "Internal Server Error"}')
+                return
+            if status == 429:
+                fake.record(facility_id, month_date, status)
+                self._send_json(429, b'{"error": "Too Many Requests"}', {'Retry-After': '1'})
+                return
+
+            body = fake.body_for(facility_id, month_date)
+            validators = {'ETag': fake.etag_for(facility_id, month_date), 'Last-Modified': fake.started_at}
+            if self.headers.get('If-None-Match') == validators['ETag']:
+                fake.record(facility_id, month_date, 304)
+                self._send_json(304, b'', validators)
+                return
+
+            fake.record(facility_id, month_date, status, len(body))
+            self._send_json(200, body, validators)
+
+        def do_POST(self):
+            if urlparse(self.path).path == '/__reset':
+                fake.reset()
+                self._send_json(200, b'{"success": true}')
+                return
+            self._send_json(404, b'{"error": "Not found"}')
+
+    return FakeRecGovHandler
+
+class FakeServer(ThreadingHTTPServer):
+    """Threading server with a listen backlog deep enough for hundreds of simultaneous connects."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+def start_fake_server(fake, port=0):
+    """
+    Start the fake server on a daemon thread.
+
+    Args:
+        fake (FakeRecGov): Behaviour and counters
+        port (int): Port to bind (0 picks a free one)
+
+    Returns:
+        FakeServer: The running server; its base URL is http://127.0.0.1:<server_port>
+    """
+    server = FakeServer(('127.0.0.1', port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.15, help='Mean response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Uniform +/- jitter in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--fixtures', help='Fixture directory recorded by test_api.py --record')
+    parser.add_argument('--replay-timing', action='store_true', help='Use each fixture\'s recorded latency')
+    args = parser.parse_args()
+
+    fake = FakeRecGov(args.latency, args.jitter, args.error_rate, args.throttle_rate, args.fixtures,
+                      args.replay_timing)
+    server = start_fake_server(fake, args.port)
+    print(f"Fake Recreation.gov on http://127.0.0.1:{server.server_port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
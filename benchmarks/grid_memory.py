@@ -0,0 +1,111 @@
+"""
+Memory benchmark: AvailabilityGrid vs the per-night dicts it replaced.
+
+Builds a synthetic 400-site, 90-night facility (three month payloads with
+roughly 30% of cells available) and measures the retained size of:
+
+- the old date -> [site ids] and site -> [dates] dicts
+- the AvailabilityGrid built from the same payloads
+
+Usage:
+    python benchmarks/grid_memory.py [--sites 400] [--days 90] [--available 0.3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_grid import AvailabilityGrid
+
+def make_month_payloads(num_sites, start_date, num_days, available_ratio, seed=7):
+    """Build month payloads shaped like Recreation.gov's, one per calendar month."""
+    rng = random.Random(seed)
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    payloads = {}
+
+    for day in range(num_days):
+        date = start + timedelta(days=day)
+        month = payloads.setdefault(date.strftime('%Y-%m'), {'campsites': {}})
+        for site in range(num_sites):
+            site_id = str(100000 + site)
+            details = month['campsites'].setdefault(site_id, {
+                'campsite_id': site_id,
+                'reservationService': 'fcfs' if site % 10 == 0 else 'online',
+                'availabilities': {}
+            })
+            status = 'Available' if rng.random() < available_ratio else 'Reserved'
+            details['availabilities'][date.strftime('%Y-%m-%dT00:00:00Z')] = status
+
+    return list(payloads.values())
+
+def legacy_date_sites(month_payloads, start_date, end_date):
+    """The date -> sites dict built by check_campsite_availability before the grid."""
+    availability = {}
+    for data in month_payloads:
+        for site_id, details in data.get('campsites', {}).items():
+            for date_str, status in details.get('availabilities', {}).items():
+                date_part = date_str.split('T')[0] if 'T' in date_str else date_str
+                if date_part >= start_date and date_part <= end_date and status == 'Available':
+                    if date_part not in availability:
+                        availability[date_part] = []
+                    availability[date_part].append(site_id)
+    return availability
+
+def legacy_site_dates(month_payloads, start_date, end_date):
+    """The site -> dates dict built by the server.py fallback before the grid."""
+    availability = {}
+    for data in month_payloads:
+        for site_id, details in data.get('campsites', {}).items():
+            for date_str, status in details.get('availabilities', {}).items():
+                date_part = date_str.split('T')[0]
+                if date_part >= start_date and date_part <= end_date and status == 'Available':
+                    if site_id not in availability:
+                        availability[site_id] = []
+                    availability[site_id].append(date_part)
+    return availability
+
+def build_grid(month_payloads, start_date, end_date):
+    grid = AvailabilityGrid(start_date, end_date)
+    for data in month_payloads:
+        grid.add_month(data)
+    return grid
+
+def measure(label, build, *args):
+    """Build a structure and report the memory it retains and the time it took."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build(*args)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} retained {retained / 1024:8.1f} KiB   peak {peak / 1024:8.1f} KiB   {elapsed * 1000:7.2f} ms")
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sites', type=int, default=400)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--available', type=float, default=0.3)
+    parser.add_argument('--start-date', default='2025-06-01')
+    args = parser.parse_args()
+
+    end_date = (datetime.strptime(args.start_date, '%Y-%m-%d') + timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
+    payloads = make_month_payloads(args.sites, args.start_date, args.days, args.available)
+    print(f"{args.sites} sites x {args.days} nights ({args.start_date} to {end_date}), {args.available:.0%} available\n")
+
+    date_sites = measure('legacy date -> sites dict', legacy_date_sites, payloads, args.start_date, end_date)
+    site_dates = measure('legacy site -> dates dict', legacy_site_dates, payloads, args.start_date, end_date)
+    grid = measure('AvailabilityGrid', build_grid, payloads, args.start_date, end_date)
+
+    # The grid must reproduce both legacy views exactly
+    assert grid.to_date_sites() == {date: date_sites[date] for date in sorted(date_sites)}
+    assert grid.to_site_dates() == site_dates
+    print("\nGrid views match the legacy dicts")
+
+if __name__ == '__main__':
+    main()
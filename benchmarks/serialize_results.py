@@ -0,0 +1,74 @@
+"""
+Microbenchmark: response serialization with each available JSON encoder.
+
+Builds a full-park, 60-night /check_availability response (every facility the
+fake upstream knows, synthetic peak-season payloads) and times encoding it to
+bytes with:
+
+- json.dumps(...).encode(), the previous path
+- each encoder registered in json_encoding (orjson when installed, stdlib)
+
+Usage:
+    python benchmarks/serialize_results.py [--start-date 2025-07-01] [--nights 60] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('SNAPSHOT_STORE', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_encoding
+from check_yosemite import build_result, format_campground_result, get_months_to_check, serialize_result
+from fake_recgov import SITE_COUNTS, make_month_payload
+from month_parser import compact_site
+
+def build_response(start_date, end_date):
+    """Build a full-park response body like /check_availability's."""
+    results = {}
+    for facility_id in SITE_COUNTS:
+        month_results = []
+        for month_date in get_months_to_check(start_date, end_date):
+            payload = make_month_payload(facility_id, month_date)
+            payload['campsites'] = {site_id: compact_site(details) for site_id, details in payload['campsites'].items()}
+            month_results.append((payload, None))
+        availability = serialize_result(build_result(month_results, start_date, end_date))
+        results[facility_id] = format_campground_result(facility_id, availability)
+    return {'success': True, 'results': results, 'foundAny': True}
+
+def time_encoder(encode, obj, repeat):
+    """Median and best seconds per encode, and the encoded size."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(obj)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), min(timings), len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--start-date', default='2025-07-01')
+    parser.add_argument('--nights', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    end_date = (datetime.strptime(args.start_date, '%Y-%m-%d') + timedelta(days=args.nights - 1)).strftime('%Y-%m-%d')
+    response = build_response(args.start_date, end_date)
+
+    encoders = {'json.dumps().encode()': lambda obj: json.dumps(obj).encode()}
+    encoders.update(json_encoding.ENCODERS)
+
+    print(f"{len(SITE_COUNTS)} campgrounds, {args.start_date} to {end_date}, {args.repeat} runs each\n")
+    print(f"{'encoder':<24} {'median ms':>10} {'best ms':>10} {'bytes':>10}")
+    baseline = None
+    for name, encode in encoders.items():
+        median, best, size = time_encoder(encode, response, args.repeat)
+        baseline = baseline or median
+        print(f"{name:<24} {median * 1000:>10.2f} {best * 1000:>10.2f} {size:>10}  ({baseline / median:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: SnapshotDiffer over a full-park sweep.
+
+Builds a baseline sweep of synthetic month payloads (every campground in
+CAMPGROUND_NAMES, three months each), then a second sweep as freshly
+parsed copies with a handful of cells flipped, and times the diff.
+
+Usage:
+    python benchmarks/snapshot_diff.py [--sites 100] [--months 3] [--flips 40]
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from check_yosemite import CAMPGROUND_NAMES
+from snapshot_diff import SnapshotDiffer
+
+def make_sweep(num_sites, months, rng):
+    """Build (facility_id, month_date) -> payload for every campground."""
+    sweep = {}
+    for facility_id in CAMPGROUND_NAMES:
+        for month in range(6, 6 + months):
+            month_date = f"2025-{month:02d}-01"
+            campsites = {}
+            for site in range(num_sites):
+                campsites[str(site)] = {
+                    'campsite_id': str(site),
+                    'availabilities': {
+                        f"2025-{month:02d}-{day:02d}T00:00:00Z": 'Available' if rng.random() < 0.2 else 'Reserved'
+                        for day in range(1, 31)
+                    }
+                }
+            sweep[(facility_id, month_date)] = {'campsites': campsites}
+    return sweep
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sites', type=int, default=100)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--flips', type=int, default=40)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    baseline = make_sweep(args.sites, args.months, rng)
+    cells = len(baseline) * args.sites * 30
+    print(f"{len(CAMPGROUND_NAMES)} campgrounds x {args.months} months x {args.sites} sites ({cells:,} cells)\n")
+
+    differ = SnapshotDiffer()
+    started = time.perf_counter()
+    versions = dict.fromkeys(baseline, 0)
+    differ.diff_sweep(baseline, versions=versions)
+    print(f"baseline sweep            {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+    # Payloads with an unchanged version (cache hits) are skipped per month
+    started = time.perf_counter()
+    differ.diff_sweep(baseline, versions=versions)
+    print(f"unchanged, same versions  {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+    for round_number in range(args.rounds):
+        # A fresh fetch: new objects, mostly equal content, a few flipped cells
+        sweep = copy.deepcopy(baseline)
+        keys = list(sweep)
+        for _ in range(args.flips):
+            payload = sweep[rng.choice(keys)]
+            site = payload['campsites'][str(rng.randrange(args.sites))]
+            date = rng.choice(list(site['availabilities']))
+            site['availabilities'][date] = 'Reserved' if site['availabilities'][date] == 'Available' else 'Available'
+
+        started = time.perf_counter()
+        changes = differ.diff_sweep(sweep, versions=dict.fromkeys(sweep, round_number + 1))
+        elapsed = time.perf_counter() - started
+        print(f"fresh sweep {round_number + 1}, {args.flips} flips {elapsed * 1000:8.2f} ms   "
+              f"+{len(changes['newly_available'])} available / -{len(changes['newly_taken'])} taken")
+        baseline = sweep
+
+if __name__ == '__main__':
+    main()
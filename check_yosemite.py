@@ -1,7 +1,24 @@
-import requests
+import asyncio
 import json
+import os
+import threading
+import time
 from datetime import datetime, timedelta
 
+import metrics
+import recreation_gov
+import timing
+from availability_grid import AvailabilityGrid
+from month_cache import month_cache, STALE_WHILE_REVALIDATE
+from month_parser import parse_month_response
+from circuit_breaker import facility_breakers
+from date_index import date_index
+from rate_limiter import THROTTLE_STATUS_CODES, RetryBudget, UpstreamThrottled
+from singleflight import month_fetches
+from snapshot_diff import month_differ
+from snapshot_store import snapshot_store
+from transports import get_transport
+
 # Campground facility IDs
 CAMPGROUND_NAMES = {
     "232447": "Upper Pines",
@@ -22,19 +39,37 @@ CAMPGROUND_NAMES = {
     "232458": "Platte River"
 }
 
-def check_campsite_availability(facility_id, start_date, end_date):
+# Maximum number of (facility, month) fetches in flight at once, whatever the transport
+MAX_CONCURRENT_FETCHES = int(os.environ.get('MAX_CONCURRENT_FETCHES', '16'))
+
+# Most queries one /check_availability_batch request may carry (52: every weekend of a year)
+MAX_BATCH_QUERIES = int(os.environ.get('MAX_BATCH_QUERIES', '52'))
+
+# Most nights one /available_on request may ask about, and the most days from its first night to its last
+MAX_AVAILABLE_ON_DATES = int(os.environ.get('MAX_AVAILABLE_ON_DATES', '62'))
+MAX_AVAILABLE_ON_SPAN_DAYS = int(os.environ.get('MAX_AVAILABLE_ON_SPAN_DAYS', '62'))
+
+# Background refreshes running as event loop tasks (held here until they finish)
+_background_refreshes = set()
+
+# Warm-start the month cache from the last saved snapshots (once per process)
+if snapshot_store is not None:
+    try:
+        snapshot_store.warm_cache(month_cache)
+    except Exception as e:
+        print(f"Error warming month cache from snapshots: {e}")
+
+def get_months_to_check(start_date, end_date):
     """
-    Check campsite availability for a given facility ID and date range.
+    Get the first day of every month touched by a date range.
     
     Args:
-        facility_id (str): Recreation.gov facility ID
         start_date (str): Start date in YYYY-MM-DD format
         end_date (str): End date in YYYY-MM-DD format
         
     Returns:
-        dict: Dictionary containing availability info and reservation type
+        list: Month start dates in YYYY-MM-01 format
     """
-    # Create a set of months to check
     start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
     end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
     
@@ -50,58 +85,1078 @@ def check_campsite_availability(facility_id, start_date, end_date):
         else:
             current_month = current_month.replace(month=current_month.month + 1)
     
-    # Check availability for each month
-    availability = {}
-    reservation_types = {}
-    is_first_come_first_served = False
+    return months_to_check
+
+# Engine I/O, requested as (operation, *args) steps by the month fetch logic; see _run_steps
+_GET = 'get'            # (url, headers) -> upstream response
+_PARSE = 'parse'        # (response,) -> compacted month payload
+_FETCH = 'fetch'        # (facility_id, month_date, retry_budget) -> payload or None, through the single-flight
+_REFRESH = 'refresh'    # (facility_id, month_date) -> None, refetching in the background
+_BLOCKING = 'blocking'  # (fn, *args) -> fn(*args), for local disk reads
+
+def fetch_month_data(facility_id, month_date, retry_budget=None):
+    """
+    Fetch one month of availability data for a facility from Recreation.gov and cache it.
+    
+    Concurrent calls for the same (facility_id, month_date) share one upstream request.
     
-    for month_date in months_to_check:
-        try:
-            # Make API request with URL-encoded date format
-            formatted_date = f"{month_date}T00%3A00%3A00.000Z"
-            url = f"https://www.recreation.gov/api/camps/availability/campground/{facility_id}/month?start_date={formatted_date}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers)
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        month_date (str): Month start date in YYYY-MM-01 format
+        retry_budget (RetryBudget): Retries this request may spend on 429/503 responses (None: no retries)
+        
+    Returns:
+        dict: Compacted month payload (see month_parser.compact_site), or None if the fetch failed
+    """
+    return month_fetches.do((facility_id, month_date), _run_steps, _fetch_month_upstream, facility_id, month_date, retry_budget)
+
+async def fetch_month_data_async(facility_id, month_date, retry_budget=None):
+    """
+    Coroutine version of fetch_month_data, on the running event loop.
+    
+    Shares in-flight fetches with fetch_month_data, so threads and coroutines
+    asking for the same month make one upstream request between them.
+    """
+    return await month_fetches.do_async((facility_id, month_date), _run_steps_async, _fetch_month_upstream, facility_id, month_date, retry_budget)
+
+def _fetch_month_upstream(facility_id, month_date, retry_budget=None):
+    """
+    Request one month from Recreation.gov and store it in the month cache and snapshot store.
+    
+    If the cached copy has an ETag/Last-Modified, the request is conditional and
+    a 304 just renews the cached payload instead of downloading and parsing it again.
+    
+    Written as steps (see _run_steps), so the blocking and asyncio paths share it.
+    """
+    validators = month_cache.validators((facility_id, month_date))
+    try:
+        while True:
+            response = yield from _timed_get(facility_id, recreation_gov.month_url(facility_id, month_date),
+                                             recreation_gov.conditional_headers(validators))
             
-            if response.status_code != 200:
-                print(f"Failed to fetch data for facility {facility_id}: {response.status_code}")
+            # Throttled: the limiter has already slowed down, so retry if the request has budget left
+            if response.status_code in THROTTLE_STATUS_CODES and retry_budget is not None and retry_budget.take():
+                print(f"Throttled fetching facility {facility_id}: {response.status_code}, retrying")
+                recreation_gov.release(response)
                 continue
             
-            data = response.json()
-            
-            # Process the response data
-            for site_id, details in data.get('campsites', {}).items():
-                # Check if the site is first-come, first-served
-                if 'reservationService' in details and details['reservationService'] == 'fcfs':
-                    is_first_come_first_served = True
-                    if site_id not in reservation_types:
-                        reservation_types[site_id] = 'fcfs'
-                else:
-                    if site_id not in reservation_types:
-                        reservation_types[site_id] = 'online'
-                
-                for date_str, status in details.get('availabilities', {}).items():
-                    # Extract just the date part (YYYY-MM-DD) for comparison
-                    date_part = date_str.split('T')[0] if 'T' in date_str else date_str
-                    
-                    # Compare dates as strings (YYYY-MM-DD format ensures correct comparison)
-                    if date_part >= start_date and date_part <= end_date:
-                        if status == 'Available':
-                            if date_part not in availability:
-                                availability[date_part] = []
-                            availability[date_part].append(site_id)
+            if response.status_code == 304 and validators:
+                recreation_gov.release(response)
+                data = _renew_month(facility_id, month_date, validators)
+                if data is None:
+                    # Evicted while revalidating: fetch it in full
+                    validators = None
+                    continue
+                return data
+            break
+        
+        if response.status_code != 200:
+            _reject_month_response(facility_id, response)
+            return None
+        
+        # Keeps only reservationService and Available nights per campsite
+        with timing.phase('parse'):
+            data = yield _PARSE, response
+        _store_month(facility_id, month_date, response, data, bool(validators))
+        return data
+    except UpstreamThrottled as e:
+        print(f"Error checking availability for month {month_date}: {e}")
+        return None
+    except Exception as e:
+        print(f"Error checking availability for month {month_date}: {e}")
+        facility_breakers.get(facility_id).record_failure()
+        return None
+
+def _timed_get(facility_id, url, headers):
+    """GET step, recording the facility's upstream latency and status (or 'error' if no response came)."""
+    # Only known campgrounds get their own latency series, so arbitrary IDs can't grow the label set
+    facility = facility_id if facility_id in CAMPGROUND_NAMES else 'other'
+    started = time.perf_counter()
+    try:
+        response = yield _GET, url, headers
+    except UpstreamThrottled:
+        # Never left the process: the rate limiter gave up
+        raise
+    except Exception:
+        metrics.observe_upstream(facility, 'error', time.perf_counter() - started)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.observe_upstream(facility, response.status_code, elapsed)
+    timing.record('upstream', elapsed)
+    return response
+
+def _renew_month(facility_id, month_date, validators):
+    """Restart a cached month's TTL after a 304; returns the payload, or None if it was evicted meanwhile."""
+    data = month_cache.renew((facility_id, month_date))
+    if data is not None:
+        facility_breakers.get(facility_id).record_success()
+        recreation_gov.revalidation_stats.record(True, True, validators.get('size') or 0)
+        if snapshot_store is not None:
+            snapshot_store.record(facility_id, month_date, data)
+    return data
+
+def _reject_month_response(facility_id, response):
+    """Log a failed month response and count it against the facility's breaker."""
+    print(f"Failed to fetch data for facility {facility_id}: {response.status_code}")
+    recreation_gov.release(response)
+    # Being rate limited says nothing about the facility itself
+    if response.status_code != 429:
+        facility_breakers.get(facility_id).record_failure()
+
+def _store_month(facility_id, month_date, response, data, conditional):
+    """Cache, snapshot and diff a freshly downloaded month payload."""
+    size = recreation_gov.body_size(response)
+    recreation_gov.revalidation_stats.record(conditional, False, size)
+    
+    facility_breakers.get(facility_id).record_success()
+    # The fetch time doubles as the payload's version for the differ and the date index
+    fetched_at = time.time()
+    month_cache.set((facility_id, month_date), data, fetched_at=fetched_at,
+                    validators=recreation_gov.response_validators(response, size))
+    if snapshot_store is not None:
+        snapshot_store.record(facility_id, month_date, data, fetched_at)
+    
+    # Track which cells opened up or got taken since the previous fetch
+    try:
+        month_differ.diff_month(facility_id, month_date, data, version=fetched_at)
+    except Exception as e:
+        print(f"Error diffing availability for facility {facility_id} month {month_date}: {e}")
+    
+    # Keep the park-wide night -> sites index current
+    try:
+        date_index.index_month(facility_id, month_date, data, version=fetched_at)
+    except Exception as e:
+        print(f"Error indexing availability for facility {facility_id} month {month_date}: {e}")
+
+def refresh_in_background(facility_id, month_date):
+    """
+    Refetch a month on a daemon thread, unless a refresh for it is already running.
+    
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        month_date (str): Month start date in YYYY-MM-01 format
+    """
+    cache_key = (facility_id, month_date)
+    if not month_cache.begin_refresh(cache_key):
+        return
+    
+    def refresh():
+        try:
+            fetch_month_data(facility_id, month_date)
+        finally:
+            month_cache.end_refresh(cache_key)
+    
+    threading.Thread(target=refresh, daemon=True).start()
+
+async def _refresh_in_background_async(facility_id, month_date):
+    """refresh_in_background for the event loop: the refetch runs as a task rather than a thread."""
+    cache_key = (facility_id, month_date)
+    if not month_cache.begin_refresh(cache_key):
+        return
+    
+    task = asyncio.ensure_future(fetch_month_data_async(facility_id, month_date))
+    _background_refreshes.add(task)
+    task.add_done_callback(lambda task: (_background_refreshes.discard(task), month_cache.end_refresh(cache_key)))
+
+def get_month_data(facility_id, month_date, use_cache=True, retry_budget=None):
+    """
+    Get one month of availability data, from the month cache when possible.
+    
+    With stale-while-revalidate on, an expired entry younger than the maximum
+    staleness is returned immediately and refreshed in the background. If the
+    upstream fetch fails, the last known payload is returned as stale instead.
+    
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        month_date (str): Month start date in YYYY-MM-01 format
+        use_cache (bool): Serve from the month cache; False forces an upstream fetch
+        retry_budget (RetryBudget): Retries the user request may spend on throttled fetches
+        
+    Returns:
+        tuple: (month payload or None, age in seconds if the payload is stale else None)
+    """
+    return _run_steps(_get_month_data, facility_id, month_date, use_cache, retry_budget)
+
+async def get_month_data_async(facility_id, month_date, use_cache=True, retry_budget=None):
+    """Coroutine version of get_month_data, on the running event loop."""
+    return await _run_steps_async(_get_month_data, facility_id, month_date, use_cache, retry_budget)
+
+def _get_month_data(facility_id, month_date, use_cache, retry_budget):
+    # get_month_data's cache, refresh and fallback logic, as steps (see _run_steps)
+    cache_key = (facility_id, month_date)
+    if use_cache:
+        if STALE_WHILE_REVALIDATE:
+            cached, age = month_cache.get_with_age(cache_key)
+            if cached is not None:
+                if age <= month_cache.ttl:
+                    return cached, None
+                yield _REFRESH, facility_id, month_date
+                return cached, age
+        else:
+            cached = month_cache.get(cache_key)
+            if cached is not None:
+                return cached, None
+    
+    data = yield _FETCH, facility_id, month_date, retry_budget
+    if data is None:
+        # Upstream failed: serve the last known payload, marked stale, if there is one
+        return (yield _BLOCKING, get_last_known_month_data, facility_id, month_date)
+    
+    return data, None
+
+def get_last_known_month_data(facility_id, month_date):
+    """
+    Get the most recent payload seen for a month, however old, from the cache or snapshot store.
+    
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        month_date (str): Month start date in YYYY-MM-01 format
+        
+    Returns:
+        tuple: (month payload, age in seconds), or (None, None) if the month was never fetched
+    """
+    cached, age = month_cache.peek((facility_id, month_date))
+    if cached is not None:
+        return cached, age
+    
+    if snapshot_store is not None:
+        try:
+            payload, fetched_at = snapshot_store.load(facility_id, month_date)
+            if payload is not None:
+                return payload, time.time() - fetched_at
+        except Exception as e:
+            print(f"Error reading snapshot for facility {facility_id} month {month_date}: {e}")
+    
+    return None, None
+
+def _run_steps(steps_fn, *args):
+    """
+    Run engine steps with blocking I/O on the calling thread.
+    
+    The month fetch logic is written once, as generators that yield the I/O
+    they need as (operation, *args) and get each result (or exception) sent
+    back. This driver does the I/O with requests; _run_steps_async does it on
+    the event loop, so both paths share everything but the I/O itself.
+    
+    Args:
+        steps_fn (callable): Generator function yielding steps
+        *args: Its arguments
+        
+    Returns:
+        The generator's return value
+    """
+    steps = steps_fn(*args)
+    result = error = None
+    while True:
+        try:
+            operation, *step_args = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as done:
+            return done.value
+        try:
+            result, error = _BLOCKING_IO[operation](*step_args), None
+        except Exception as e:
+            result, error = None, e
+
+async def _run_steps_async(steps_fn, *args):
+    """Coroutine version of _run_steps: network I/O on the running event loop, parsing and disk reads on threads."""
+    steps = steps_fn(*args)
+    result = error = None
+    while True:
+        try:
+            operation, *step_args = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as done:
+            return done.value
+        try:
+            result, error = await _ASYNC_IO[operation](*step_args), None
+        except Exception as e:
+            result, error = None, e
+
+# How each driver performs each step
+_BLOCKING_IO = {
+    _GET: lambda url, headers: recreation_gov.get(url, stream=True, headers=headers),
+    _PARSE: parse_month_response,
+    _FETCH: fetch_month_data,
+    _REFRESH: refresh_in_background,
+    _BLOCKING: lambda fn, *args: fn(*args)
+}
+_ASYNC_IO = {
+    _GET: recreation_gov.get_async,
+    _PARSE: lambda response: asyncio.to_thread(parse_month_response, response),
+    _FETCH: fetch_month_data_async,
+    _REFRESH: _refresh_in_background_async,
+    _BLOCKING: asyncio.to_thread
+}
+
+def merge_month_data(month_payloads, start_date, end_date):
+    """
+    Merge month payloads for one facility into a compact availability grid.
+    
+    Args:
+        month_payloads (list): Month payloads in month order (None entries are skipped)
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        
+    Returns:
+        AvailabilityGrid: Sites x nights bitset for the date range
+    """
+    grid = AvailabilityGrid(start_date, end_date)
+    
+    for data in month_payloads:
+        if data is None:
+            continue
+        
+        try:
+            grid.add_month(data)
         except Exception as e:
-            print(f"Error checking availability for month {month_date}: {e}")
+            print(f"Error processing availability data: {e}")
             # Continue to next month
             continue
     
-    # Return the results
+    return grid
+
+def build_result(month_results, start_date, end_date):
+    """
+    Merge (payload, stale age) pairs from get_month_data into one grid-backed facility result.
+    
+    Args:
+        month_results (list): (payload, stale age) pairs in month order
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        
+    Returns:
+        dict: 'grid' (AvailabilityGrid), 'stale', and the oldest month's 'age' in seconds if stale
+    """
+    result = {'grid': merge_month_data([payload for payload, _ in month_results], start_date, end_date)}
+    
+    stale_ages = [age for _, age in month_results if age is not None]
+    result['stale'] = bool(stale_ages)
+    if stale_ages:
+        result['age'] = int(max(stale_ages))
+    
+    return result
+
+def build_degraded_result(facility_id, months_to_check, start_date, end_date):
+    """
+    Build a facility result without going upstream, from whatever data was last seen.
+    
+    Used while the facility's circuit breaker is open.
+    
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        months_to_check (list): Month start dates in YYYY-MM-01 format
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        
+    Returns:
+        dict: Grid-backed result like build_result, with 'degraded' set
+    """
+    month_results = []
+    for month_date in months_to_check:
+        payload, age = get_last_known_month_data(facility_id, month_date)
+        # Only data past its TTL counts as stale
+        month_results.append((payload, age if age is not None and age > month_cache.ttl else None))
+    
+    result = build_result(month_results, start_date, end_date)
+    result['degraded'] = True
+    return result
+
+def serialize_result(result):
+    """
+    Expand a grid-backed facility result into the date -> sites JSON view.
+    
+    Args:
+        result (dict): Result from build_result
+        
+    Returns:
+        dict: Dictionary containing availability info and reservation type
+    """
+    grid = result['grid']
+    serialized = {
+        'availability': grid.to_date_sites(),
+        'reservation_types': grid.reservation_types(),
+        'is_first_come_first_served': grid.is_first_come_first_served,
+        'stale': result.get('stale', False)
+    }
+    if 'age' in result:
+        serialized['age'] = result['age']
+    if result.get('degraded'):
+        serialized['degraded'] = True
+    return serialized
+
+def check_campsite_availability(facility_id, start_date, end_date, use_cache=True, transport=None):
+    """
+    Check campsite availability for a given facility ID and date range.
+    
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        transport (str): Transport for the month fetches (defaults to ENGINE_TRANSPORT)
+        
+    Returns:
+        dict: Dictionary containing availability info and reservation type
+    """
+    for _, result in iter_multiple_campgrounds([facility_id], start_date, end_date, use_cache=use_cache, transport=transport):
+        with timing.phase('format'):
+            return serialize_result(result)
+
+class _CampgroundFetches:
+    """
+    The (facility, month) fetches behind one multi-campground check, and the merging of their results.
+    
+    iter_multiple_campgrounds and iter_multiple_campgrounds_async share it and
+    differ only in how they wait for the fetches.
+    """
+    
+    def __init__(self, facility_ids, start_date, end_date, use_cache=True):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.months_to_check = get_months_to_check(start_date, end_date)
+        self.facility_ids = list(dict.fromkeys(facility_ids))
+        self.degraded_ids = []
+        self.calls = []
+        
+        # An empty date range has nothing to fetch
+        if not self.months_to_check:
+            return
+        
+        # Facilities whose circuit breaker is open skip the upstream entirely
+        self.degraded_ids = [facility_id for facility_id in self.facility_ids if not facility_breakers.get(facility_id).allow_request()]
+        live_ids = [facility_id for facility_id in self.facility_ids if facility_id not in self.degraded_ids]
+        
+        # One retry budget is shared by every fetch made for this request; calls are get_month_data arguments
+        retry_budget = RetryBudget()
+        self.calls = [
+            (facility_id, month_date, use_cache, retry_budget)
+            for facility_id in live_ids
+            for month_date in self.months_to_check
+        ]
+        self._month_results = {facility_id: [None] * len(self.months_to_check) for facility_id in live_ids}
+        self._remaining = {facility_id: len(self.months_to_check) for facility_id in live_ids}
+    
+    def ready(self):
+        """
+        Yield the results that need no fetch: every facility for an empty date range, else the degraded ones.
+        
+        Degraded results come from the last known data, which may be read from the snapshot store.
+        
+        Yields:
+            tuple: (facility_id, grid-backed result)
+        """
+        if not self.months_to_check:
+            for facility_id in self.facility_ids:
+                yield facility_id, build_result([], self.start_date, self.end_date)
+            return
+        for facility_id in self.degraded_ids:
+            yield facility_id, build_degraded_result(facility_id, self.months_to_check, self.start_date, self.end_date)
+    
+    def add(self, index, month_result):
+        """
+        Record one finished fetch.
+        
+        Args:
+            index (int): Index of the fetch in calls
+            month_result (tuple): (payload, stale age) from get_month_data
+            
+        Returns:
+            tuple: (facility_id, grid-backed result) once the facility's last month is in, else None
+        """
+        facility_id = self.calls[index][0]
+        self._month_results[facility_id][index % len(self.months_to_check)] = month_result
+        self._remaining[facility_id] -= 1
+        if self._remaining[facility_id]:
+            return None
+        with timing.phase('merge'):
+            return facility_id, build_result(self._month_results.pop(facility_id), self.start_date, self.end_date)
+
+def iter_multiple_campgrounds(facility_ids, start_date, end_date, max_workers=None, use_cache=True, transport=None):
+    """
+    Check availability for several facilities, yielding each one as soon as its months finish.
+    
+    Every (facility, month) pair is handed to the transport at once, so with the
+    threaded or asyncio transports facilities come back in completion order
+    rather than request order.
+    
+    Args:
+        facility_ids (list): Recreation.gov facility IDs
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        max_workers (int): Cap on concurrent fetches (defaults to MAX_CONCURRENT_FETCHES)
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        transport (str): 'blocking', 'threaded' or 'asyncio' (defaults to ENGINE_TRANSPORT)
+        
+    Yields:
+        tuple: (facility_id, grid-backed result from build_result)
+    """
+    fetches = _CampgroundFetches(facility_ids, start_date, end_date, use_cache)
+    
+    # Start every fetch at once; the transport bounds how many run concurrently
+    transport = get_transport(transport)
+    fetch = get_month_data_async if transport.name == 'asyncio' else get_month_data
+    completed = transport.run(fetch, fetches.calls, max_workers or MAX_CONCURRENT_FETCHES)
+    try:
+        # Degraded facilities answer right away from the last known data
+        yield from fetches.ready()
+        
+        waiting_since = time.perf_counter()
+        for index, month_result in completed:
+            timing.record('fetch', time.perf_counter() - waiting_since)
+            finished = fetches.add(index, month_result)
+            if finished is not None:
+                yield finished
+            waiting_since = time.perf_counter()
+    finally:
+        # Don't keep fetching for a consumer that stopped early
+        completed.close()
+
+async def iter_multiple_campgrounds_async(facility_ids, start_date, end_date, max_workers=None, use_cache=True):
+    """
+    Async generator version of iter_multiple_campgrounds, with every fetch a task on the running event loop.
+    
+    Yields:
+        tuple: (facility_id, grid-backed result from build_result)
+    """
+    fetches = _CampgroundFetches(facility_ids, start_date, end_date, use_cache)
+    
+    completed = get_transport('asyncio').run_async(get_month_data_async, fetches.calls, max_workers or MAX_CONCURRENT_FETCHES)
+    try:
+        # Built on a thread, since degraded results may read the snapshot store
+        for finished in await asyncio.to_thread(list, fetches.ready()):
+            yield finished
+        
+        waiting_since = time.perf_counter()
+        async for index, month_result in completed:
+            timing.record('fetch', time.perf_counter() - waiting_since)
+            finished = fetches.add(index, month_result)
+            if finished is not None:
+                yield finished
+            waiting_since = time.perf_counter()
+    finally:
+        # Don't keep fetching for a consumer that stopped early
+        await completed.aclose()
+
+def check_multiple_campgrounds(facility_ids, start_date, end_date, max_workers=None, use_cache=True, transport=None):
+    """
+    Check availability for several facilities, fetching every (facility, month) pair concurrently.
+    
+    Args:
+        facility_ids (list): Recreation.gov facility IDs
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        max_workers (int): Cap on concurrent fetches (defaults to MAX_CONCURRENT_FETCHES)
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        transport (str): Transport for the month fetches (defaults to ENGINE_TRANSPORT)
+        
+    Returns:
+        dict: Facility ID -> grid-backed result from build_result
+    """
+    return dict(iter_multiple_campgrounds(facility_ids, start_date, end_date, max_workers, use_cache, transport))
+
+def search_stays(facility_ids, start_date, end_date, nights, use_cache=True):
+    """
+    Find sites that are free for `nights` consecutive nights within a date range.
+    
+    Pass the number of nights from start_date to end_date to require the whole range.
+    
+    Args:
+        facility_ids (list): Recreation.gov facility IDs
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format (last night of the range)
+        nights (int): Length of the stay in nights
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        
+    Returns:
+        dict: Facility ID -> {first night: [site IDs]}
+    """
+    return {
+        facility_id: result['grid'].find_stays(nights)
+        for facility_id, result in iter_multiple_campgrounds(facility_ids, start_date, end_date, use_cache=use_cache)
+    }
+
+def format_campground_result(facility_id, availability_data, campground_names=None, nights=None):
+    """
+    Build the per-campground entry returned by the /check_availability endpoints.
+    
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        availability_data (dict): Result from check_campsite_availability or build_result (None is treated as empty)
+        campground_names (dict): Facility ID -> name mapping (defaults to CAMPGROUND_NAMES)
+        nights (int): If set, also include 'stays': start date -> sites free for that many consecutive nights
+        
+    Returns:
+        dict: Campground name, availability, reservation types and FCFS flag
+    """
+    if campground_names is None:
+        campground_names = CAMPGROUND_NAMES
+    
+    # Get campground name
+    campground_name = campground_names.get(facility_id, f"Campground {facility_id}")
+    
+    # Grid-backed results are only expanded to JSON views here
+    stays = {}
+    if isinstance(availability_data, dict) and 'grid' in availability_data:
+        if nights:
+            stays = availability_data['grid'].find_stays(nights)
+        availability_data = serialize_result(availability_data)
+    
+    # Ensure we have all the expected keys in the response
+    if not isinstance(availability_data, dict):
+        availability_data = {'availability': {}, 'reservation_types': {}, 'is_first_come_first_served': False}
+    
+    result = {
+        'name': campground_name,
+        'availability': availability_data.get('availability', {}),
+        'reservation_types': availability_data.get('reservation_types', {}),
+        'is_first_come_first_served': availability_data.get('is_first_come_first_served', False)
+    }
+    
+    # Stay search: sites free for every night of an N-night stay
+    if nights:
+        result['stays'] = stays
+        result['nights'] = nights
+    
+    # Served from an expired cache entry while a refresh runs in the background
+    if availability_data.get('stale'):
+        result['stale'] = True
+        result['age'] = availability_data.get('age')
+    
+    # The facility's circuit breaker is open, so this is last known data (or nothing)
+    if availability_data.get('degraded'):
+        result['degraded'] = True
+    
+    return result
+
+def parse_availability_request(data):
+    """
+    Validate a /check_availability POST body.
+    
+    Args:
+        data (dict): Decoded JSON body
+        
+    Returns:
+        dict: 'campgrounds', 'start_date', 'end_date', 'use_cache' and 'nights'
+        
+    Raises:
+        ValueError: With the message to return as a 400 error
+    """
+    if not data or 'startDate' not in data or 'endDate' not in data or 'campgrounds' not in data:
+        raise ValueError('Missing required parameters')
+    
+    # Validate date format
+    try:
+        datetime.strptime(data['startDate'], '%Y-%m-%d')
+        datetime.strptime(data['endDate'], '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    
+    campgrounds = data['campgrounds']
+    if not isinstance(campgrounds, list) or not all(isinstance(facility_id, str) for facility_id in campgrounds):
+        raise ValueError('Invalid campgrounds. Send a list of facility IDs')
+    
+    # Optional stay search: sites free for N consecutive nights
+    nights = data.get('nights')
+    if nights is not None and (not isinstance(nights, int) or isinstance(nights, bool) or nights < 1):
+        raise ValueError('Invalid nights. Use a positive whole number')
+    
+    return {
+        'campgrounds': campgrounds,
+        'start_date': data['startDate'],
+        'end_date': data['endDate'],
+        'use_cache': not data.get('forceRefresh', False),
+        'nights': nights
+    }
+
+def check_availability(campgrounds, start_date, end_date, use_cache=True, nights=None, transport=None):
+    """
+    Build the /check_availability response body for a list of campgrounds.
+    
+    Args:
+        campgrounds (list): Recreation.gov facility IDs
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        nights (int): If set, also search for stays of this many consecutive nights
+        transport (str): Transport for the month fetches (defaults to ENGINE_TRANSPORT)
+        
+    Returns:
+        dict: 'success', 'results' (facility ID -> format_campground_result, in request order) and 'foundAny'
+    """
+    # Fetch every campground/month concurrently, then build the results in request order
+    all_availability = check_multiple_campgrounds(campgrounds, start_date, end_date, use_cache=use_cache, transport=transport)
+    return build_availability_response(campgrounds, all_availability, nights)
+
+def build_availability_response(campgrounds, all_availability, nights=None):
+    """
+    Build the /check_availability response body from per-facility results.
+    
+    Args:
+        campgrounds (list): Recreation.gov facility IDs, in request order
+        all_availability (dict): Facility ID -> grid-backed result
+        nights (int): If set, also include stays of this many consecutive nights
+        
+    Returns:
+        dict: 'success', 'results' and 'foundAny'
+    """
+    results = {}
+    found_any = False
+    
+    for facility_id in campgrounds:
+        try:
+            with timing.phase('format'):
+                results[facility_id] = format_campground_result(facility_id, all_availability.get(facility_id), nights=nights)
+            
+            if results[facility_id].get('stays', results[facility_id]['availability']):
+                found_any = True
+        except Exception as e:
+            print(f"Error checking availability for facility {facility_id}: {e}")
+            results[facility_id] = {
+                'name': CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}"),
+                'availability': {},
+                'error': str(e)
+            }
+    
+    return {
+        'success': True,
+        'results': results,
+        'foundAny': found_any
+    }
+
+def parse_batch_request(data):
+    """
+    Validate a /check_availability_batch POST body.
+    
+    Args:
+        data (dict): Decoded JSON body: 'queries', a list of /check_availability bodies, and an optional
+            top-level 'forceRefresh' that applies to every query
+        
+    Returns:
+        list: One parse_availability_request result per query
+        
+    Raises:
+        ValueError: With the message to return as a 400 error
+    """
+    queries = data.get('queries') if isinstance(data, dict) else None
+    if not isinstance(queries, list) or not queries:
+        raise ValueError('Missing queries. Send a list of {startDate, endDate, campgrounds}')
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise ValueError(f'Too many queries. Send at most {MAX_BATCH_QUERIES}')
+    
+    parsed = []
+    for index, query in enumerate(queries):
+        if isinstance(query, dict) and data.get('forceRefresh'):
+            query = {**query, 'forceRefresh': True}
+        try:
+            parsed.append(parse_availability_request(query))
+        except ValueError as e:
+            raise ValueError(f'Query {index}: {e}')
+    return parsed
+
+def plan_batch_fetches(queries):
+    """
+    Work out the distinct (facility, month) fetches a batch of queries needs.
+    
+    A month shared by several queries is fetched once; if any of them forces a
+    refresh, that one fetch bypasses the cache.
+    
+    Args:
+        queries (list): Results of parse_availability_request
+        
+    Returns:
+        tuple: (list of (facility_id, month_date, use_cache) fetches, set of facility IDs whose circuit breaker is open)
+    """
+    fetches = {}
+    breaker_open = {}
+    
+    for query in queries:
+        months_to_check = get_months_to_check(query['start_date'], query['end_date'])
+        for facility_id in dict.fromkeys(query['campgrounds']):
+            # Ask each breaker once, since asking can use up a half-open probe
+            if facility_id not in breaker_open:
+                breaker_open[facility_id] = not facility_breakers.get(facility_id).allow_request()
+            if breaker_open[facility_id]:
+                continue
+            
+            for month_date in months_to_check:
+                key = (facility_id, month_date)
+                fetches[key] = fetches.get(key, True) and query['use_cache']
+    
+    degraded_ids = {facility_id for facility_id, is_open in breaker_open.items() if is_open}
+    return [(facility_id, month_date, use_cache) for (facility_id, month_date), use_cache in fetches.items()], degraded_ids
+
+def build_batch_response(queries, month_data, degraded_ids):
+    """
+    Answer every query in a batch from the shared month payloads.
+    
+    Args:
+        queries (list): Results of parse_availability_request
+        month_data (dict): (facility_id, month_date) -> (payload, stale age) from get_month_data
+        degraded_ids (set): Facility IDs to answer from last known data
+        
+    Returns:
+        dict: 'success', 'results' (one /check_availability response per query, in order), 'foundAny' and
+            'fetches' ('requested' (facility, month) pairs summed over the queries vs 'distinct' ones fetched)
+    """
+    responses = []
+    requested = 0
+    
+    for query in queries:
+        start_date, end_date = query['start_date'], query['end_date']
+        months_to_check = get_months_to_check(start_date, end_date)
+        
+        all_availability = {}
+        for facility_id in dict.fromkeys(query['campgrounds']):
+            requested += len(months_to_check)
+            if facility_id in degraded_ids:
+                all_availability[facility_id] = build_degraded_result(facility_id, months_to_check, start_date, end_date)
+            else:
+                month_results = [month_data.get((facility_id, month_date), (None, None)) for month_date in months_to_check]
+                all_availability[facility_id] = build_result(month_results, start_date, end_date)
+        
+        responses.append(build_availability_response(query['campgrounds'], all_availability, query['nights']))
+    
+    return {
+        'success': True,
+        'results': responses,
+        'foundAny': any(response['foundAny'] for response in responses),
+        'fetches': {'requested': requested, 'distinct': len(month_data)}
+    }
+
+def check_availability_batch(queries, max_workers=None, transport=None):
+    """
+    Answer several /check_availability queries, fetching each distinct (facility, month) once for all of them.
+    
+    Upstream calls grow with the distinct months the queries cover, not with the number of queries.
+    
+    Args:
+        queries (list): Results of parse_availability_request (see parse_batch_request)
+        max_workers (int): Cap on concurrent fetches (defaults to MAX_CONCURRENT_FETCHES)
+        transport (str): Transport for the month fetches (defaults to ENGINE_TRANSPORT)
+        
+    Returns:
+        dict: Response body from build_batch_response
+    """
+    fetches, degraded_ids = plan_batch_fetches(queries)
+    
+    # One retry budget is shared by every fetch made for this request
+    retry_budget = RetryBudget()
+    calls = [(facility_id, month_date, use_cache, retry_budget) for facility_id, month_date, use_cache in fetches]
+    
+    transport = get_transport(transport)
+    fetch = get_month_data_async if transport.name == 'asyncio' else get_month_data
+    month_data = {}
+    with timing.phase('fetch'):
+        for index, month_result in transport.run(fetch, calls, max_workers or MAX_CONCURRENT_FETCHES):
+            month_data[calls[index][:2]] = month_result
+    
+    return build_batch_response(queries, month_data, degraded_ids)
+
+def parse_available_on_request(data):
+    """
+    Validate an /available_on POST body.
+    
+    Args:
+        data (dict): Decoded JSON body: 'dates' (nights in YYYY-MM-DD format), and optional
+            'campgrounds' (defaults to every known campground) and 'forceRefresh'
+        
+    Returns:
+        dict: 'dates' (sorted, deduplicated), 'campgrounds' and 'use_cache'
+        
+    Raises:
+        ValueError: With the message to return as a 400 error
+    """
+    dates = data.get('dates') if isinstance(data, dict) else None
+    if not isinstance(dates, list) or not dates:
+        raise ValueError('Missing dates. Send a list of nights in YYYY-MM-DD format')
+    if len(dates) > MAX_AVAILABLE_ON_DATES:
+        raise ValueError(f'Too many dates. Send at most {MAX_AVAILABLE_ON_DATES}')
+    
+    # Validate date format
+    try:
+        nights = sorted({datetime.strptime(date, '%Y-%m-%d') for date in dates})
+    except (TypeError, ValueError):
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    if (nights[-1] - nights[0]).days > MAX_AVAILABLE_ON_SPAN_DAYS:
+        raise ValueError(f'Dates too far apart. Keep them within {MAX_AVAILABLE_ON_SPAN_DAYS} days of each other')
+    dates = [night.strftime('%Y-%m-%d') for night in nights]
+    
+    # Every known campground only when the key is left out; an explicit list must name some
+    campgrounds = data.get('campgrounds', list(CAMPGROUND_NAMES))
+    if not isinstance(campgrounds, list) or not campgrounds or not all(isinstance(facility_id, str) for facility_id in campgrounds):
+        raise ValueError('Invalid campgrounds. Send a list of facility IDs')
+    campgrounds = list(dict.fromkeys(campgrounds))
+    
+    # Every month the request touches has to stay in the date index until it is answered
+    months = len({date[:7] for date in dates})
+    if months * len(campgrounds) > date_index.max_months:
+        raise ValueError(f'Too many campgrounds for these dates. Ask about at most {date_index.max_months} campground months')
+    
+    return {
+        'dates': dates,
+        'campgrounds': campgrounds,
+        'use_cache': not data.get('forceRefresh', False)
+    }
+
+def plan_available_on_fetches(dates, campgrounds, use_cache=True):
+    """
+    Index whatever fresh months are already cached, and list the ones still to fetch.
+    
+    Args:
+        dates (list): Nights in YYYY-MM-DD format
+        campgrounds (list): Recreation.gov facility IDs
+        use_cache (bool): Use cached month payloads; False fetches every month again
+        
+    Returns:
+        tuple: (list of (facility_id, month_date) pairs to fetch through get_month_data,
+            dict of (facility_id, month_date) -> last known (payload, stale age) for facilities whose circuit breaker is open)
+    """
+    months = list(dict.fromkeys(f"{date[:7]}-01" for date in dates))
+    pending = []
+    degraded = {}
+    for facility_id in campgrounds:
+        breaker_open = not facility_breakers.get(facility_id).allow_request()
+        for month_date in months:
+            payload, age, version = month_cache.peek_with_version((facility_id, month_date))
+            if use_cache and payload is not None and age <= month_cache.ttl:
+                # Usually already indexed when it was stored; this covers snapshot-warmed entries
+                date_index.index_month(facility_id, month_date, payload, version)
+            elif breaker_open:
+                degraded[(facility_id, month_date)] = get_last_known_month_data(facility_id, month_date)
+            else:
+                pending.append((facility_id, month_date))
+    return pending, degraded
+
+def build_available_on_response(dates, campgrounds, month_results):
+    """
+    Answer an /available_on query from the date index.
+    
+    Args:
+        dates (list): Nights in YYYY-MM-DD format
+        campgrounds (list): Recreation.gov facility IDs, in request order
+        month_results (dict): (facility_id, month_date) -> (payload, stale age) for the months not already cached fresh
+        
+    Returns:
+        dict: 'success', 'dates', 'results' (facility ID -> 'name', 'sites' open on every night, and
+            'stale' or 'error' if a month could only be served old or not at all) and 'foundAny'
+    """
+    for (facility_id, month_date), (payload, _) in month_results.items():
+        if payload is not None:
+            # Payloads still in the month cache carry its version; last known ones from the snapshot store are reindexed
+            cached, _, version = month_cache.peek_with_version((facility_id, month_date))
+            date_index.index_month(facility_id, month_date, payload, version if cached is payload else None)
+    
+    open_sites = date_index.available_on(dates, campgrounds)
+    
+    results = {}
+    for facility_id in campgrounds:
+        result = {
+            'name': CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}"),
+            'sites': open_sites.get(facility_id, [])
+        }
+        fetched = [month_result for (fetched_id, _), month_result in month_results.items() if fetched_id == facility_id]
+        if any(payload is None for payload, _ in fetched):
+            result['error'] = 'Availability data unavailable'
+        elif any(age is not None for _, age in fetched):
+            result['stale'] = True
+        results[facility_id] = result
+    
     return {
-        'availability': availability,
-        'reservation_types': reservation_types,
-        'is_first_come_first_served': is_first_come_first_served
+        'success': True,
+        'dates': dates,
+        'results': results,
+        'foundAny': bool(open_sites)
     }
+
+def find_available_on(dates, campgrounds, use_cache=True, max_workers=None, transport=None):
+    """
+    Find every site open on all of the given nights, across campgrounds, from the date index.
+    
+    Only months that aren't cached fresh go upstream; the answer itself is a bitset intersection.
+    
+    Args:
+        dates (list): Nights in YYYY-MM-DD format
+        campgrounds (list): Recreation.gov facility IDs
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        max_workers (int): Cap on concurrent fetches (defaults to MAX_CONCURRENT_FETCHES)
+        transport (str): Transport for the month fetches (defaults to ENGINE_TRANSPORT)
+        
+    Returns:
+        dict: Response body from build_available_on_response
+    """
+    pending, month_results = plan_available_on_fetches(dates, campgrounds, use_cache)
+    
+    # One retry budget is shared by every fetch made for this request
+    retry_budget = RetryBudget()
+    calls = [(facility_id, month_date, use_cache, retry_budget) for facility_id, month_date in pending]
+    
+    transport = get_transport(transport)
+    fetch = get_month_data_async if transport.name == 'asyncio' else get_month_data
+    with timing.phase('fetch'):
+        for index, month_result in transport.run(fetch, calls, max_workers or MAX_CONCURRENT_FETCHES):
+            month_results[pending[index]] = month_result
+    
+    return build_available_on_response(dates, campgrounds, month_results)
+
+async def check_campsite_availability_async(facility_id, start_date, end_date, use_cache=True):
+    """
+    Coroutine version of check_campsite_availability.
+    
+    Returns:
+        dict: Dictionary containing availability info and reservation type
+    """
+    async for _, result in iter_multiple_campgrounds_async([facility_id], start_date, end_date, use_cache=use_cache):
+        with timing.phase('format'):
+            return serialize_result(result)
+
+async def check_availability_async(campgrounds, start_date, end_date, use_cache=True, nights=None):
+    """
+    Coroutine version of check_availability.
+    
+    Returns:
+        dict: 'success', 'results' (facility ID -> format_campground_result, in request order) and 'foundAny'
+    """
+    all_availability = {}
+    async for facility_id, result in iter_multiple_campgrounds_async(campgrounds, start_date, end_date, use_cache=use_cache):
+        all_availability[facility_id] = result
+    return build_availability_response(campgrounds, all_availability, nights)
+
+async def check_availability_batch_async(queries, max_workers=None):
+    """
+    Coroutine version of check_availability_batch.
+    
+    Returns:
+        dict: Response body from build_batch_response
+    """
+    fetches, degraded_ids = plan_batch_fetches(queries)
+    
+    # One retry budget is shared by every fetch made for this request
+    retry_budget = RetryBudget()
+    calls = [(facility_id, month_date, use_cache, retry_budget) for facility_id, month_date, use_cache in fetches]
+    
+    month_data = {}
+    with timing.phase('fetch'):
+        async for index, month_result in get_transport('asyncio').run_async(get_month_data_async, calls, max_workers or MAX_CONCURRENT_FETCHES):
+            month_data[calls[index][:2]] = month_result
+    
+    # Built on a thread, since degraded facilities may read the snapshot store
+    return await asyncio.to_thread(build_batch_response, queries, month_data, degraded_ids)
+
+async def find_available_on_async(dates, campgrounds, use_cache=True, max_workers=None):
+    """
+    Coroutine version of find_available_on.
+    
+    Returns:
+        dict: Response body from build_available_on_response
+    """
+    # Planned on a thread, since degraded facilities may read the snapshot store
+    pending, month_results = await asyncio.to_thread(plan_available_on_fetches, dates, campgrounds, use_cache)
+    
+    # One retry budget is shared by every fetch made for this request
+    retry_budget = RetryBudget()
+    calls = [(facility_id, month_date, use_cache, retry_budget) for facility_id, month_date in pending]
+    
+    with timing.phase('fetch'):
+        async for index, month_result in get_transport('asyncio').run_async(get_month_data_async, calls, max_workers or MAX_CONCURRENT_FETCHES):
+            month_results[pending[index]] = month_result
+    
+    return build_available_on_response(dates, campgrounds, month_results)
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Consecutive upstream failures that open a facility's breaker, and how long it stays open (seconds)
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.environ.get('BREAKER_RESET_TIMEOUT', '30'))
+
+# Most facilities to keep a breaker for; the least recently used is dropped past this
+BREAKER_MAX_FACILITIES = int(os.environ.get('BREAKER_MAX_FACILITIES', '256'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one facility's upstream fetches.
+
+    After BREAKER_FAILURE_THRESHOLD consecutive failures the breaker opens and
+    requests skip the upstream. Once BREAKER_RESET_TIMEOUT has passed, one
+    request is let through as a trial (half-open): a success closes the
+    breaker, a failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started_at = 0.0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Check whether a request may go upstream.
+
+        Returns:
+            bool: True if closed, or if this caller gets the half-open trial
+        """
+        with self._lock:
+            now = time.time()
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = HALF_OPEN
+                self.trial_started_at = now
+                return True
+
+            # Half-open: only one trial at a time, unless the last one never reported back
+            if now - self.trial_started_at >= self.reset_timeout:
+                self.trial_started_at = now
+                return True
+            return False
+
+    def record_success(self):
+        """Close the breaker after a successful upstream fetch."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Count a failed upstream fetch, opening the breaker at the threshold or on a failed trial."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = time.time()
+                self.times_opened += 1
+
+    def snapshot(self):
+        """
+        Get the breaker state for monitoring.
+
+        Returns:
+            dict: State, consecutive failures, times opened and seconds until the next trial
+        """
+        with self._lock:
+            retry_in = 0.0
+            if self.state == OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.time() - self.opened_at))
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'times_opened': self.times_opened,
+                'retry_in': retry_in
+            }
+
+class BreakerRegistry:
+    """
+    One CircuitBreaker per facility, created on first use.
+
+    Requests can name any facility ID, so the registry is LRU-bounded: past
+    max_breakers, the least recently used facility's breaker is dropped (it
+    starts closed again if that facility comes back).
+    """
+
+    def __init__(self, max_breakers=BREAKER_MAX_FACILITIES):
+        self.max_breakers = max_breakers
+        self._breakers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, facility_id):
+        """
+        Get a facility's breaker.
+
+        Args:
+            facility_id (str): Recreation.gov facility ID
+
+        Returns:
+            CircuitBreaker: The facility's breaker
+        """
+        with self._lock:
+            breaker = self._breakers.get(facility_id)
+            if breaker is None:
+                breaker = self._breakers[facility_id] = CircuitBreaker()
+                while len(self._breakers) > self.max_breakers:
+                    self._breakers.popitem(last=False)
+            else:
+                self._breakers.move_to_end(facility_id)
+        return breaker
+
+    def states(self):
+        """
+        Get every breaker's state for monitoring.
+
+        Returns:
+            dict: Facility ID -> breaker snapshot
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {facility_id: breaker.snapshot() for facility_id, breaker in breakers.items()}
+
+# Process-wide breakers for upstream month fetches
+facility_breakers = BreakerRegistry()
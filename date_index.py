@@ -0,0 +1,175 @@
+import calendar
+import sys
+import threading
+from collections import OrderedDict
+
+from month_cache import MONTH_CACHE_MAX_ENTRIES
+
+class DateIndex:
+    """
+    Park-wide inverted index: night -> bitset of every (facility, site) open that night.
+
+    Every (facility_id, site_id) seen gets a slot, a bit position shared by all
+    nights. Indexing a month payload rewrites that facility's bits for each
+    night of the month, so "which sites are open on all of these nights" is an
+    AND of one int per night, however many facilities there are.
+
+    Only a version token is kept per indexed month, never the payload, and the
+    months are LRU-bounded like the month cache: an evicted month's bits are
+    cleared, and a facility's slots are reused once none of its months remain.
+    """
+
+    def __init__(self, max_months=MONTH_CACHE_MAX_ENTRIES):
+        self.max_months = max_months
+        self._lock = threading.Lock()
+        self.slot_ids = []
+        self._slot_index = {}
+        self._free_slots = []
+        self._facility_masks = {}
+        self._facility_months = {}
+        self._nights = {}
+        self._months = OrderedDict()
+        self.months_indexed = 0
+        self.evictions = 0
+        self.lookups = 0
+
+    def _slot(self, facility_id, site_id):
+        # Slot for a site, assigned on first sight (caller holds the lock)
+        key = (facility_id, site_id)
+        slot = self._slot_index.get(key)
+        if slot is None:
+            key = (sys.intern(facility_id), sys.intern(site_id))
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self.slot_ids[slot] = key
+            else:
+                slot = len(self.slot_ids)
+                self.slot_ids.append(key)
+            self._slot_index[key] = slot
+            self._facility_masks[facility_id] = self._facility_masks.get(facility_id, 0) | 1 << slot
+        return slot
+
+    def _write_month(self, facility_id, month_date, night_masks):
+        # Clear the facility's old bits on every night of the month, including ones now fully booked (caller holds the lock)
+        keep = ~self._facility_masks.get(facility_id, 0)
+        month_prefix = month_date[:8]
+        year, month = int(month_date[:4]), int(month_date[5:7])
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            night = f"{month_prefix}{day:02d}"
+            mask = (self._nights.get(night, 0) & keep) | night_masks.get(night, 0)
+            if mask:
+                self._nights[night] = mask
+            else:
+                self._nights.pop(night, None)
+
+    def _evict(self, facility_id, month_date):
+        # Drop a month's bits, and the facility's slots once it has no months left (caller holds the lock)
+        self._write_month(facility_id, month_date, {})
+        self.evictions += 1
+        self._facility_months[facility_id] -= 1
+        if self._facility_months[facility_id]:
+            return
+        del self._facility_months[facility_id]
+        bits = bin(self._facility_masks.pop(facility_id, 0))[:1:-1]
+        position = bits.find('1')
+        while position != -1:
+            del self._slot_index[self.slot_ids[position]]
+            self.slot_ids[position] = None
+            self._free_slots.append(position)
+            position = bits.find('1', position + 1)
+
+    def index_month(self, facility_id, month_date, payload, version=None):
+        """
+        Replace a facility's bits for every night of a month with a new payload's.
+
+        A payload whose version is already indexed for that month (a cache hit) is skipped.
+
+        Args:
+            facility_id (str): Recreation.gov facility ID
+            month_date (str): Month start date in YYYY-MM-01 format
+            payload (dict): Month payload with a 'campsites' mapping
+            version: Token that changes whenever the month's payload does, e.g. its
+                month cache fetch time (None: always reindex)
+
+        Returns:
+            bool: True if the index changed
+        """
+        key = (facility_id, month_date)
+        month_prefix = month_date[:8]
+
+        with self._lock:
+            if version is not None and self._months.get(key) == version:
+                self._months.move_to_end(key)
+                return False
+
+            night_masks = {}
+            for site_id, details in payload.get('campsites', {}).items():
+                bit = 1 << self._slot(facility_id, site_id)
+                for date_str, status in (details.get('availabilities') or {}).items():
+                    # Keys look like 2025-07-01T00:00:00Z; the first 10 chars are the night
+                    if status == 'Available' and date_str.startswith(month_prefix):
+                        night = date_str[:10]
+                        night_masks[night] = night_masks.get(night, 0) | bit
+            self._write_month(facility_id, month_date, night_masks)
+
+            if key not in self._months:
+                self._facility_months[facility_id] = self._facility_months.get(facility_id, 0) + 1
+            self._months[key] = version
+            self._months.move_to_end(key)
+            self.months_indexed += 1
+            while len(self._months) > self.max_months:
+                self._evict(*self._months.popitem(last=False)[0])
+        return True
+
+    def available_on(self, nights, facility_ids=None):
+        """
+        Find every site open on all of the given nights.
+
+        Args:
+            nights (list): Nights in YYYY-MM-DD format
+            facility_ids (list): Only look at these facilities (default: every indexed facility)
+
+        Returns:
+            dict: Facility ID -> list of site IDs open on every night, only for facilities with any
+        """
+        with self._lock:
+            self.lookups += 1
+            mask = self._nights.get(nights[0], 0) if nights else 0
+            for night in nights[1:]:
+                mask &= self._nights.get(night, 0)
+            if facility_ids is not None:
+                facility_mask = 0
+                for facility_id in facility_ids:
+                    facility_mask |= self._facility_masks.get(facility_id, 0)
+                mask &= facility_mask
+
+            # Walk the set bits through their binary string (least significant bit first),
+            # still under the lock since evicted slots get reused
+            bits = bin(mask)[:1:-1]
+            sites = {}
+            position = bits.find('1')
+            while position != -1:
+                facility_id, site_id = self.slot_ids[position]
+                sites.setdefault(facility_id, []).append(site_id)
+                position = bits.find('1', position + 1)
+        return sites
+
+    def stats(self):
+        """
+        Get index counters.
+
+        Returns:
+            dict: Sites with a slot, indexed nights and months, months indexed so far, evictions and lookups
+        """
+        with self._lock:
+            return {
+                'sites': len(self._slot_index),
+                'nights': len(self._nights),
+                'months': len(self._months),
+                'months_indexed': self.months_indexed,
+                'evictions': self.evictions,
+                'lookups': self.lookups
+            }
+
+# Process-wide index fed by every month payload the engine stores
+date_index = DateIndex()
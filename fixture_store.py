@@ -0,0 +1,130 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Where recorded Recreation.gov month responses live
+FIXTURES_DIR = os.environ.get('FIXTURES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures'))
+
+INDEX_FILE = 'index.json'
+BLOBS_DIR = 'blobs'
+
+class FixtureStore:
+    """
+    Content-addressed directory of recorded month responses.
+
+    Response bodies are gzipped under blobs/<sha256>.json.gz, so months whose
+    payloads are byte-identical share one file. index.json maps each
+    "facility_id/month_date" to its body hash, status, response headers and
+    timing.
+    """
+
+    def __init__(self, root=FIXTURES_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, BLOBS_DIR, f"{digest}.json.gz")
+
+    def _load_index(self):
+        if self._index is None:
+            path = os.path.join(self.root, INDEX_FILE)
+            if os.path.exists(path):
+                with open(path) as f:
+                    self._index = json.load(f)
+            else:
+                self._index = {}
+        return self._index
+
+    def save_index(self):
+        """Write index.json, replacing the previous one atomically."""
+        with self._lock:
+            index = self._load_index()
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, INDEX_FILE)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(index, f, indent=2, sort_keys=True)
+            os.replace(path + '.tmp', path)
+
+    def record(self, facility_id, month_date, body, status=200, headers=None, elapsed=None):
+        """
+        Save one month response.
+
+        Args:
+            facility_id (str): Recreation.gov facility ID
+            month_date (str): Month start date in YYYY-MM-01 format
+            body (bytes): Decoded response body
+            status (int): HTTP status code
+            headers (dict): Response headers
+            elapsed (float): Seconds the request took
+
+        Returns:
+            dict: The index entry for the response
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with gzip.open(blob_path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(blob_path + '.tmp', blob_path)
+
+        entry = {
+            'sha256': digest,
+            'status': status,
+            'headers': dict(headers or {}),
+            'elapsed': elapsed,
+            'size': len(body),
+            'compressed_size': os.path.getsize(blob_path),
+            'recorded_at': time.time()
+        }
+        with self._lock:
+            self._load_index()[f"{facility_id}/{month_date}"] = entry
+        return entry
+
+    def entry(self, facility_id, month_date):
+        """
+        Get the index entry for a recorded month.
+
+        Returns:
+            dict: Status, headers, timing and body hash, or None if not recorded
+        """
+        with self._lock:
+            return self._load_index().get(f"{facility_id}/{month_date}")
+
+    def entries(self):
+        """
+        Get every recorded month.
+
+        Returns:
+            dict: (facility_id, month_date) -> index entry
+        """
+        with self._lock:
+            index = dict(self._load_index())
+        return {tuple(key.split('/', 1)): entry for key, entry in index.items()}
+
+    def load_body(self, facility_id, month_date):
+        """
+        Get the raw recorded body for a month.
+
+        Returns:
+            bytes: The decoded response body, or None if not recorded
+        """
+        entry = self.entry(facility_id, month_date)
+        if entry is None:
+            return None
+        with gzip.open(self._blob_path(entry['sha256']), 'rb') as f:
+            return f.read()
+
+    def load(self, facility_id, month_date):
+        """
+        Get the recorded payload for a month.
+
+        Returns:
+            dict: The parsed payload, or None if not recorded
+        """
+        body = self.load_body(facility_id, month_date)
+        return json.loads(body) if body is not None else None
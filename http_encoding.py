@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (bytes)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+# Content codings we can produce, most preferred first
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def etag_for(body):
+    """
+    Build a content-hash ETag for an uncompressed response body.
+
+    The ETag is weak, since the same body may be sent gzip, brotli or identity encoded.
+
+    Args:
+        body (bytes): Uncompressed response body
+
+    Returns:
+        str: ETag header value
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match, etag):
+    """
+    Check an If-None-Match header against an ETag (weak comparison).
+
+    Args:
+        if_none_match (str): If-None-Match header value, if any
+        etag (str): Current ETag
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick a content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding (str): Accept-Encoding header value, if any
+
+    Returns:
+        str: 'br', 'gzip', or None for identity
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best = None
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (encoding, weight)
+    return best[0] if best else None
+
+def compress(body, encoding):
+    """
+    Compress a whole body.
+
+    Args:
+        body (bytes): Uncompressed body
+        encoding (str): 'br' or 'gzip'
+
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def encode_response(body, if_none_match=None, accept_encoding=None):
+    """
+    Apply ETag validation and content negotiation to a JSON response body.
+
+    Args:
+        body (bytes): Uncompressed response body
+        if_none_match (str): Request's If-None-Match header
+        accept_encoding (str): Request's Accept-Encoding header
+
+    Returns:
+        tuple: (status code, body to send, extra headers); status is 304 with an empty body if the client's copy is current
+    """
+    etag = etag_for(body)
+    headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+
+    if etag_matches(if_none_match, etag):
+        return 304, b'', headers
+
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESSION_MIN_SIZE else None
+    if encoding:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+
+    return 200, body, headers
+
+class StreamCompressor:
+    """
+    Incremental compressor for streamed bodies.
+
+    Every chunk is flushed, so records still reach the client as they are produced.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        """
+        Compress and flush one chunk.
+
+        Args:
+            chunk (bytes): Uncompressed chunk
+
+        Returns:
+            bytes: Compressed output for the chunk
+        """
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """
+        End the compressed stream.
+
+        Returns:
+            bytes: Remaining compressed output
+        """
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+def compress_stream(chunks, encoding):
+    """
+    Compress a streamed body, flushing after every chunk so records still arrive as they are produced.
+
+    Args:
+        chunks (iterable): Uncompressed body chunks (bytes)
+        encoding (str): 'br' or 'gzip'
+
+    Yields:
+        bytes: Compressed chunks
+    """
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        yield compressor.compress(chunk)
+    yield compressor.finish()
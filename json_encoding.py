@@ -0,0 +1,77 @@
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response encoder: 'auto' uses the fastest installed one, or name one from ENCODERS
+JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+# Available encoders, fastest first; each turns an object into UTF-8 JSON bytes
+ENCODERS = {}
+if orjson is not None:
+    ENCODERS['orjson'] = _orjson_dumps
+ENCODERS['stdlib'] = _stdlib_dumps
+
+def register_encoder(name, encode, preferred=False):
+    """
+    Add an encoder.
+
+    Args:
+        name (str): Name to select it by (JSON_ENCODER or use_encoder)
+        encode (callable): Function from an object to UTF-8 JSON bytes
+        preferred (bool): Put it ahead of the built-in encoders for 'auto'
+    """
+    if preferred:
+        others = {key: value for key, value in ENCODERS.items() if key != name}
+        ENCODERS.clear()
+        ENCODERS[name] = encode
+        ENCODERS.update(others)
+    else:
+        ENCODERS[name] = encode
+
+def use_encoder(name='auto'):
+    """
+    Select the encoder dumps() uses.
+
+    Args:
+        name (str): 'auto' for the first registered encoder, or a name from ENCODERS
+
+    Returns:
+        str: Name of the selected encoder
+    """
+    global _encode, encoder_name
+
+    if name == 'auto':
+        name = next(iter(ENCODERS))
+    elif name not in ENCODERS:
+        print(f"JSON encoder {name!r} is not available, falling back to stdlib")
+        name = 'stdlib'
+
+    _encode = ENCODERS[name]
+    encoder_name = name
+    return name
+
+def dumps(obj):
+    """
+    Encode an object as compact UTF-8 JSON bytes, ready to write to a response.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        bytes: Encoded JSON
+    """
+    return _encode(obj)
+
+_encode = None
+encoder_name = None
+use_encoder(JSON_ENCODER)
@@ -0,0 +1,265 @@
+import bisect
+import threading
+
+from circuit_breaker import facility_breakers
+from date_index import date_index
+from month_cache import month_cache
+from rate_limiter import upstream_limiter
+from recreation_gov import revalidation_stats
+from singleflight import month_fetches
+
+# Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+UPSTREAM_DURATION = 'yosemite_upstream_request_duration_seconds'
+UPSTREAM_RESPONSES = 'yosemite_upstream_responses_total'
+HTTP_DURATION = 'yosemite_http_request_duration_seconds'
+HTTP_RESPONSES = 'yosemite_http_responses_total'
+HTTP_IN_FLIGHT = 'yosemite_http_requests_in_flight'
+
+# Recorded metrics: name -> (type, help, label names)
+METRICS = {
+    UPSTREAM_DURATION: ('histogram', 'Recreation.gov month request latency until the response arrives', ('facility',)),
+    UPSTREAM_RESPONSES: ('counter', 'Recreation.gov month responses by status code (error: no response)', ('status',)),
+    HTTP_DURATION: ('histogram', 'End-to-end request latency, including streamed bodies', ('endpoint',)),
+    HTTP_RESPONSES: ('counter', 'Responses by endpoint and status code', ('endpoint', 'status')),
+    HTTP_IN_FLIGHT: ('gauge', 'Requests being handled', ('endpoint',))
+}
+
+def _label_values(labels):
+    # Stored as strings, so 200 and '200' are one series and a scrape can sort every label set
+    return tuple(map(str, labels))
+
+class MetricsRegistry:
+    """
+    Counters and histograms that record without a shared lock.
+
+    Each thread writes to its own shard (plain dicts), so the hot path is a
+    couple of dict operations. A scrape copies and sums every shard; shards of
+    threads that have exited are folded into a retired total, so per-request
+    thread pools don't pile them up.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards = []
+        self._retired = ({}, {})
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+
+        # First record on this thread: register its shard (the only time recording takes the lock)
+        shard = self._local.shard = ({}, {})
+        with self._lock:
+            live = []
+            for thread, old_shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, old_shard))
+                else:
+                    self._merge(self._retired, old_shard)
+            live.append((threading.current_thread(), shard))
+            self._shards = live
+        return shard
+
+    @staticmethod
+    def _merge(into, shard):
+        counters, histograms = into
+        for key, value in shard[0].items():
+            counters[key] = counters.get(key, 0) + value
+        for key, histogram in shard[1].items():
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = list(histogram)
+            else:
+                for index, value in enumerate(histogram):
+                    total[index] += value
+
+    def inc(self, name, labels=(), value=1):
+        """
+        Add to a counter (or gauge).
+
+        Args:
+            name (str): Metric name from METRICS
+            labels (tuple): Label values, in the metric's label order
+            value (float): Amount to add (negative for gauges going down)
+        """
+        counters = self._shard()[0]
+        key = (name, labels)
+        total = counters.get(key)
+        if total is None:
+            # New here, or recorded with non-string labels: look it up by its string form
+            key = (name, _label_values(labels))
+            total = counters.get(key, 0)
+        counters[key] = total + value
+
+    def observe(self, name, value, labels=()):
+        """
+        Record one observation in a histogram.
+
+        Args:
+            name (str): Metric name from METRICS
+            value (float): Observed value (seconds for latencies)
+            labels (tuple): Label values, in the metric's label order
+        """
+        histograms = self._shard()[1]
+        histogram = histograms.get((name, labels))
+        if histogram is None:
+            key = (name, _label_values(labels))
+            histogram = histograms.get(key)
+            if histogram is None:
+                # One count per bucket, one for +Inf, then the sum
+                histogram = histograms[key] = [0] * (len(self.buckets) + 2)
+        histogram[bisect.bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    def snapshot(self):
+        """
+        Sum every shard.
+
+        Returns:
+            tuple: (counters, histograms) dicts keyed by (name, label values)
+        """
+        with self._lock:
+            shards = [shard for _, shard in self._shards]
+            totals = ({}, {})
+            self._merge(totals, self._retired)
+
+        for counters, histograms in shards:
+            # Copies are single C-level operations, so a concurrent write can't break them
+            self._merge(totals, (dict(counters), {key: list(histogram) for key, histogram in list(histograms.items())}))
+        return totals
+
+    def render(self, collectors=()):
+        """
+        Render every metric in the Prometheus text format.
+
+        Args:
+            collectors (iterable): Functions returning extra (name, type, help, [(labels, value)]) families,
+                with labels as (name, value) pairs, read at scrape time
+
+        Returns:
+            bytes: The exposition body
+        """
+        counters, histograms = self.snapshot()
+        lines = []
+
+        for name, (kind, help_text, label_names) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'histogram':
+                for (metric, labels), histogram in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    pairs = tuple(zip(label_names, labels))
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + ('+Inf',), histogram):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{format_labels(pairs + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(pairs)} {histogram[-1]}")
+                    lines.append(f"{name}_count{format_labels(pairs)} {cumulative}")
+            else:
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(tuple(zip(label_names, labels)))} {value}")
+
+        for collect in collectors:
+            for name, kind, help_text, samples in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+
+        return ('\n'.join(lines) + '\n').encode()
+
+def format_labels(pairs):
+    """
+    Format (name, value) label pairs as a Prometheus label set.
+
+    Args:
+        pairs (tuple): (label name, value) pairs
+
+    Returns:
+        str: '{name="value",...}', or '' without labels
+    """
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def collect_engine_stats():
+    """
+    Read the engine's own counters (cache, coalescing, rate limiter, revalidation, breakers, date index).
+
+    Returns:
+        list: (name, type, help, [(labels, value)]) metric families
+    """
+    cache = month_cache.stats()
+    coalesced = month_fetches.stats()
+    limiter = upstream_limiter.stats()
+    revalidation = revalidation_stats.stats()
+    index = date_index.stats()
+
+    breaker_counts = {}
+    for state in facility_breakers.states().values():
+        breaker_counts[state['state']] = breaker_counts.get(state['state'], 0) + 1
+
+    return [
+        ('yosemite_month_cache_lookups_total', 'counter', 'Month cache lookups by result',
+         [((('result', 'hit'),), cache['hits']), ((('result', 'stale_hit'),), cache['stale_hits']),
+          ((('result', 'miss'),), cache['misses'])]),
+        ('yosemite_month_cache_entries', 'gauge', 'Months in the cache', [((), cache['entries'])]),
+        ('yosemite_month_cache_evictions_total', 'counter', 'Months evicted from the cache', [((), cache['evictions'])]),
+        ('yosemite_coalesced_fetches_total', 'counter', 'Month fetches served by another caller\'s request', [((), coalesced['saved'])]),
+        ('yosemite_upstream_fetches_in_flight', 'gauge', 'Month fetches waiting on Recreation.gov', [((), coalesced['in_flight'])]),
+        ('yosemite_rate_limit_requests_per_second', 'gauge', 'Current adaptive upstream request rate', [((), limiter['rate'])]),
+        ('yosemite_rate_limit_timeouts_total', 'counter', 'Requests that gave up waiting for a rate limiter slot', [((), limiter['timeouts'])]),
+        ('yosemite_upstream_not_modified_total', 'counter', 'Conditional month fetches answered 304', [((), revalidation['not_modified'])]),
+        ('yosemite_upstream_bytes_downloaded_total', 'counter', 'Month body bytes downloaded', [((), revalidation['bytes_downloaded'])]),
+        ('yosemite_circuit_breakers', 'gauge', 'Facility circuit breakers by state',
+         [((('state', state),), count) for state, count in sorted(breaker_counts.items())]),
+        ('yosemite_date_index_sites', 'gauge', 'Sites in the night -> sites index', [((), index['sites'])])
+    ]
+
+def render():
+    """Render the request metrics and the engine's counters, for a /metrics endpoint."""
+    return metrics.render([collect_engine_stats])
+
+def observe_upstream(facility, status, seconds):
+    """
+    Record one Recreation.gov month request.
+
+    Args:
+        facility (str): Facility label: a known facility ID, or 'other', to keep the label set bounded
+        status (int or str): Response status code, or 'error' if no response arrived
+        seconds (float): Time until the response arrived
+    """
+    metrics.observe(UPSTREAM_DURATION, seconds, (facility,))
+    metrics.inc(UPSTREAM_RESPONSES, (str(status),))
+
+def request_started(endpoint):
+    """Count a request as in flight."""
+    metrics.inc(HTTP_IN_FLIGHT, (endpoint,))
+
+def request_finished(endpoint, status, seconds):
+    """
+    Record a finished request.
+
+    Args:
+        endpoint (str): Route the request matched
+        status (int): Response status code
+        seconds (float): Time from the request arriving to the response being ready
+    """
+    metrics.inc(HTTP_IN_FLIGHT, (endpoint,), -1)
+    metrics.observe(HTTP_DURATION, seconds, (endpoint,))
+    metrics.inc(HTTP_RESPONSES, (endpoint, str(status)))
+
+# Process-wide registry shared by every request
+metrics = MetricsRegistry()
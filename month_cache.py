@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cache settings: seconds an entry stays fresh, and how many months to keep
+MONTH_CACHE_TTL = float(os.environ.get('MONTH_CACHE_TTL', '60'))
+MONTH_CACHE_MAX_ENTRIES = int(os.environ.get('MONTH_CACHE_MAX_ENTRIES', '256'))
+
+# Stale-while-revalidate: serve expired entries up to this age (seconds) while refreshing
+STALE_WHILE_REVALIDATE = os.environ.get('STALE_WHILE_REVALIDATE', '1') == '1'
+MONTH_CACHE_MAX_STALE = float(os.environ.get('MONTH_CACHE_MAX_STALE', '600'))
+
+class MonthCache:
+    """
+    Thread-safe TTL + LRU cache of month payloads keyed by (facility_id, month_date).
+
+    Entries also keep the upstream's validators (ETag/Last-Modified), so an
+    expired month can be revalidated and renewed instead of downloaded again,
+    and a version: the time the payload was stored, which a renewal keeps.
+    """
+
+    def __init__(self, ttl=MONTH_CACHE_TTL, max_entries=MONTH_CACHE_MAX_ENTRIES, max_stale=MONTH_CACHE_MAX_STALE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Get a fresh payload for a key.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+
+        Returns:
+            dict: Cached payload, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_with_age(self, key):
+        """
+        Get a payload that is fresh or within the maximum staleness, along with its age.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+
+        Returns:
+            tuple: (payload, age in seconds), or (None, None) if missing or too old
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.time() - entry[1] if entry is not None else None
+            if entry is None or age > max(self.max_stale, self.ttl):
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(key)
+            if age > self.ttl:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return entry[0], age
+
+    def begin_refresh(self, key):
+        """
+        Claim the background refresh of a key.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+
+        Returns:
+            bool: True if the caller should refresh, False if a refresh is already running
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        """Release a key claimed with begin_refresh."""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def peek(self, key):
+        """
+        Get whatever payload is cached for a key, however old, without touching counters or LRU order.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+
+        Returns:
+            tuple: (payload, age in seconds), or (None, None) if nothing is cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            return entry[0], time.time() - entry[1]
+
+    def peek_with_version(self, key):
+        """
+        Like peek, but also get the payload's version, so callers can keep a token instead of the payload.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+
+        Returns:
+            tuple: (payload, age in seconds, version), or (None, None, None) if nothing is cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None, None
+            return entry[0], time.time() - entry[1], entry[3]
+
+    def validators(self, key):
+        """
+        Get the upstream validators stored with a key's payload, however old.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+
+        Returns:
+            dict: 'etag', 'last_modified' and body 'size', or None if nothing is cached or there are no validators
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[2] if entry is not None else None
+
+    def renew(self, key, fetched_at=None):
+        """
+        Restart a cached payload's TTL after the upstream confirmed it is unchanged.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+            fetched_at (float): Unix time of the revalidation (defaults to now)
+
+        Returns:
+            dict: The renewed payload, or None if the entry is no longer cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries[key] = (entry[0], fetched_at or time.time(), entry[2], entry[3])
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, payload, fetched_at=None, validators=None):
+        """
+        Store a payload, evicting the least recently used entries past the size bound.
+
+        Args:
+            key (tuple): (facility_id, month_date)
+            payload (dict): Month payload from Recreation.gov
+            fetched_at (float): Unix time the payload was fetched (defaults to now), also its version
+            validators (dict): Upstream 'etag'/'last_modified' and body 'size', for conditional refetches
+        """
+        fetched_at = fetched_at or time.time()
+        with self._lock:
+            self._entries[key] = (payload, fetched_at, validators, fetched_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Entry count, hits (fresh and stale), misses, evictions and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'refreshing': len(self._refreshing),
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            }
+
+# Process-wide cache shared by every request
+month_cache = MonthCache()
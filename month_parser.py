@@ -0,0 +1,154 @@
+import codecs
+import json
+import os
+
+# Parse month responses incrementally instead of with response.json()
+STREAM_PARSE_MONTHS = os.environ.get('STREAM_PARSE_MONTHS', '1') == '1'
+
+# Bytes read from the upstream response per step
+PARSE_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+# Characters that can follow a complete top-level number in a member value
+_NUMBER_END = _WHITESPACE + ',}]'
+_decoder = json.JSONDecoder()
+
+class _ChunkReader:
+    """Text buffer over an iterable of byte chunks that reads ahead only on demand."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def read_more(self):
+        """Append the next chunk, dropping text already consumed. Returns False at end of input."""
+        if self.exhausted:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self.buffer = self.buffer[self.pos:] + self._utf8.decode(chunk)
+                self.pos = 0
+                return True
+        self.buffer = self.buffer[self.pos:] + self._utf8.decode(b'', final=True)
+        self.pos = 0
+        self.exhausted = True
+        return False
+
+    def next_char(self):
+        """Skip whitespace and return the next character without consuming it ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                return ''
+
+    def expect(self, chars):
+        """Consume one of `chars` after optional whitespace and return it."""
+        char = self.next_char()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in month payload, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode one complete JSON value, reading more input until it is whole."""
+        self.next_char()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.read_more():
+                    raise
+                continue
+            # A number is only whole once a delimiter follows it: 1 may go on as 12, 1. as 1.5, 1e as 1e3
+            if (isinstance(value, (int, float)) and not isinstance(value, bool) and not self.exhausted
+                    and (end == len(self.buffer) or self.buffer[end] not in _NUMBER_END)):
+                self.read_more()
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Iterate over the keys of the object at the current position, leaving each value unread."""
+        self.expect('{')
+        if self.next_char() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+def compact_site(details):
+    """
+    Keep only what availability checks use from one campsite.
+
+    Args:
+        details (dict): Campsite entry from a month payload
+
+    Returns:
+        dict: reservationService and the Available nights of the month
+    """
+    return {
+        'reservationService': details.get('reservationService'),
+        'availabilities': {
+            date_str: status
+            for date_str, status in (details.get('availabilities') or {}).items()
+            if status == 'Available'
+        }
+    }
+
+def parse_month_stream(chunks):
+    """
+    Parse a Recreation.gov month payload incrementally.
+
+    Campsites are decoded one at a time and cut down with compact_site, so
+    only one campsite's full entry (metadata and every day's status) is in
+    memory at once rather than the whole document.
+
+    Args:
+        chunks (iterable): Response body as byte chunks, e.g. response.iter_content()
+
+    Returns:
+        dict: Month payload with a compacted 'campsites' mapping and any other top-level fields
+
+    Raises:
+        ValueError: If the body is not a JSON object
+    """
+    reader = _ChunkReader(chunks)
+    data = {}
+    for key in reader.members():
+        if key == 'campsites' and reader.next_char() == '{':
+            data['campsites'] = campsites = {}
+            for site_id in reader.members():
+                campsites[site_id] = compact_site(reader.value())
+        else:
+            data[key] = reader.value()
+    return data
+
+def parse_month_response(response):
+    """
+    Parse a month response from recreation_gov.get(..., stream=True).
+
+    Args:
+        response (requests.Response): Streamed upstream response
+
+    Returns:
+        dict: Compacted month payload
+    """
+    if not STREAM_PARSE_MONTHS:
+        data = response.json()
+        data['campsites'] = {site_id: compact_site(details) for site_id, details in data.get('campsites', {}).items()}
+        return data
+    try:
+        return parse_month_stream(response.iter_content(PARSE_CHUNK_SIZE))
+    finally:
+        response.close()
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Upstream request rate (requests/second): starting point and AIMD bounds
+RATE_LIMIT_INITIAL = float(os.environ.get('RATE_LIMIT_INITIAL', '10'))
+RATE_LIMIT_MIN = float(os.environ.get('RATE_LIMIT_MIN', '0.5'))
+RATE_LIMIT_MAX = float(os.environ.get('RATE_LIMIT_MAX', '50'))
+RATE_LIMIT_INCREASE = float(os.environ.get('RATE_LIMIT_INCREASE', '0.5'))
+RATE_LIMIT_DECREASE = float(os.environ.get('RATE_LIMIT_DECREASE', '0.5'))
+
+# Throttles this soon (seconds) after a rate cut are the same congestion event (about one upstream round trip)
+RATE_LIMIT_DECREASE_WINDOW = float(os.environ.get('RATE_LIMIT_DECREASE_WINDOW', '1'))
+
+# Longest a caller waits for a token before giving up (seconds)
+RATE_LIMIT_MAX_WAIT = float(os.environ.get('RATE_LIMIT_MAX_WAIT', '10'))
+
+# Retries allowed across all upstream calls made for one user request
+RETRY_BUDGET_PER_REQUEST = int(os.environ.get('RETRY_BUDGET_PER_REQUEST', '4'))
+
+# Upstream statuses that mean "slow down"
+THROTTLE_STATUS_CODES = (429, 503)
+
+class UpstreamThrottled(Exception):
+    """Raised when no upstream request slot frees up within the allowed wait."""
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value (str): Header value, either delay-seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts to upstream feedback (AIMD).
+
+    Each success adds RATE_LIMIT_INCREASE requests/second; each congestion
+    event multiplies the rate by RATE_LIMIT_DECREASE and, if the upstream sent
+    Retry-After, holds every caller until that time. 429/503s arriving within
+    decrease_window (or 1/rate, if longer) of the last cut are the same event,
+    so a burst of concurrent throttles cuts the rate once, not once per
+    response. The rate converges on the highest level the upstream tolerates
+    instead of bursting into bans.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_INITIAL, min_rate=RATE_LIMIT_MIN, max_rate=RATE_LIMIT_MAX,
+                 increase=RATE_LIMIT_INCREASE, decrease=RATE_LIMIT_DECREASE, decrease_window=RATE_LIMIT_DECREASE_WINDOW):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_window = decrease_window
+        self.tokens = max(1.0, rate)
+        self.blocked_until = 0.0
+        self._last_decrease = float('-inf')
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.timeouts = 0
+
+    def _refill(self, now):
+        burst = max(1.0, self.rate)
+        self.tokens = min(burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, deadline):
+        """Take a token if one is free; otherwise return how long to wait, or None if that passes the deadline."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now >= self.blocked_until and self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+
+            wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            if now + wait > deadline:
+                self.timeouts += 1
+                return None
+            return wait
+
+    def acquire(self, timeout=RATE_LIMIT_MAX_WAIT):
+        """
+        Wait for a request slot.
+
+        Args:
+            timeout (float): Give up after this many seconds
+
+        Returns:
+            bool: True if a slot was taken, False if the wait would exceed the timeout
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            wait = self._reserve(deadline)
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            time.sleep(min(wait, 0.25))
+
+    async def acquire_async(self, timeout=RATE_LIMIT_MAX_WAIT):
+        """
+        Wait for a request slot without blocking the event loop.
+
+        Args:
+            timeout (float): Give up after this many seconds
+
+        Returns:
+            bool: True if a slot was taken, False if the wait would exceed the timeout
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            wait = self._reserve(deadline)
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            await asyncio.sleep(min(wait, 0.25))
+
+    def on_success(self):
+        """Additively raise the rate after a successful upstream response."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """
+        Multiplicatively cut the rate after a 429/503 (once per congestion event) and honour Retry-After.
+
+        Args:
+            retry_after (float): Seconds the upstream asked us to wait, if any
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Responses to requests sent before the last cut report the same congestion
+            if now - self._last_decrease >= max(self.decrease_window, 1 / self.rate):
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.tokens = min(self.tokens, max(1.0, self.rate))
+                self._last_decrease = now
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.throttled += 1
+
+    def stats(self):
+        """
+        Get the current rate and counters.
+
+        Returns:
+            dict: Current rate, seconds still blocked by Retry-After, throttle responses and acquire timeouts
+        """
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'blocked_for': max(0.0, self.blocked_until - time.monotonic()),
+                'throttled': self.throttled,
+                'timeouts': self.timeouts
+            }
+
+class RetryBudget:
+    """A bounded number of retries shared by every upstream call for one user request."""
+
+    def __init__(self, retries=RETRY_BUDGET_PER_REQUEST):
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        Spend one retry.
+
+        Returns:
+            bool: True if a retry was available
+        """
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+# Process-wide limiter in front of every Recreation.gov request
+upstream_limiter = AdaptiveRateLimiter()
@@ -0,0 +1,347 @@
+import asyncio
+import atexit
+import json
+import os
+import threading
+import weakref
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import THROTTLE_STATUS_CODES, UpstreamThrottled, parse_retry_after, upstream_limiter
+
+# Recreation.gov month availability endpoint (RECGOV_BASE_URL points it at a local fake for benchmarks)
+BASE_URL = os.environ.get('RECGOV_BASE_URL', 'https://www.recreation.gov').rstrip('/') + "/api/camps/availability/campground"
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Connection pool and timeout settings (seconds)
+POOL_SIZE = int(os.environ.get('RECGOV_POOL_SIZE', '32'))
+CONNECT_TIMEOUT = float(os.environ.get('RECGOV_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.environ.get('RECGOV_READ_TIMEOUT', '20'))
+
+_session = None
+_session_lock = threading.Lock()
+
+# One aiohttp session per event loop, since connections can't cross loops
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_session():
+    """
+    Get the process-wide keep-alive session for Recreation.gov.
+
+    The session is created on first use and reused for the life of the process,
+    so warm Flask workers and Vercel instances skip the TCP+TLS handshake.
+
+    Returns:
+        requests.Session: Shared, connection-pooled session
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({'User-Agent': USER_AGENT})
+                _session = session
+
+    return _session
+
+def month_url(facility_id, month_date):
+    """
+    Build the month availability URL for a facility.
+
+    Args:
+        facility_id (str): Recreation.gov facility ID
+        month_date (str): Month start date in YYYY-MM-01 format
+
+    Returns:
+        str: Fully formatted request URL
+    """
+    # URL-encoded date format expected by the API
+    formatted_date = f"{month_date}T00%3A00%3A00.000Z"
+    return f"{BASE_URL}/{facility_id}/month?start_date={formatted_date}"
+
+def get(url, **kwargs):
+    """
+    Send a GET request through the shared session with the default timeouts.
+
+    Every call first takes a slot from the shared adaptive rate limiter, and
+    feeds the response status back to it.
+
+    Args:
+        url (str): Request URL
+        **kwargs: Extra arguments passed to requests.Session.get
+
+    Returns:
+        requests.Response: The upstream response
+
+    Raises:
+        UpstreamThrottled: If no request slot frees up within RATE_LIMIT_MAX_WAIT
+    """
+    if not upstream_limiter.acquire():
+        raise UpstreamThrottled(f"Rate limited waiting to request {url}")
+
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    response = get_session().get(url, **kwargs)
+    _report_status(response)
+    return response
+
+async def get_async_client():
+    """
+    Get the keep-alive asyncio session for the running event loop.
+
+    The session is closed when the loop shuts down (asyncio.run and ASGI
+    servers finalize the loop's async generators), by close_async_client, or
+    at exit for a loop that is still running.
+
+    Returns:
+        aiohttp.ClientSession: Session created on first use in this loop, with the same pool size and timeouts as get()
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        # Only the asyncio engine needs aiohttp; the blocking paths never import it
+        import aiohttp
+
+        client = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT),
+            # Bodies are decompressed by AsyncResponse.iter_content, on the parse thread rather than the loop
+            headers={'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'},
+            auto_decompress=False
+        )
+        lifetime = _session_lifetime(loop, client)
+        entry = _async_clients[loop] = (client, lifetime)
+        await lifetime.asend(None)
+    return entry[0]
+
+async def _session_lifetime(loop, client):
+    # Suspended for as long as the session lives; finalizing it (see get_async_client) closes the session
+    try:
+        yield
+    finally:
+        _async_clients.pop(loop, None)
+        await client.close()
+
+async def close_async_client():
+    """Close the running event loop's asyncio session, if it has one."""
+    entry = _async_clients.get(asyncio.get_running_loop())
+    if entry is not None:
+        await entry[1].aclose()
+
+@atexit.register
+def _close_background_clients():
+    # Sessions on loops still running at exit (the asyncio transport's) would otherwise warn as unclosed
+    for loop, (_, lifetime) in list(_async_clients.items()):
+        if loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(lifetime.aclose(), loop).result(CONNECT_TIMEOUT)
+            except Exception:
+                pass
+
+async def get_async(url, headers=None):
+    """
+    Send a GET request on the running event loop, with the same rate limiting and timeouts as get().
+
+    Args:
+        url (str): Request URL
+        headers (dict): Extra request headers
+
+    Returns:
+        AsyncResponse: The buffered upstream response
+
+    Raises:
+        UpstreamThrottled: If no request slot frees up within RATE_LIMIT_MAX_WAIT
+    """
+    if not await upstream_limiter.acquire_async():
+        raise UpstreamThrottled(f"Rate limited waiting to request {url}")
+
+    try:
+        async with (await get_async_client()).get(url, headers=headers) as upstream:
+            response = AsyncResponse(upstream.status, upstream.headers, await upstream.read())
+    except asyncio.TimeoutError as e:
+        # aiohttp timeouts carry no message
+        raise TimeoutError(f"Timed out requesting {url}") from e
+    _report_status(response)
+    return response
+
+class AsyncResponse:
+    """
+    Buffered response from get_async().
+
+    Mirrors the parts of requests.Response the engine uses (status_code,
+    headers, iter_content, json, close), so the same parsing code handles both.
+    """
+
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.wire_size = len(body)
+        self._body = body
+
+    def iter_content(self, chunk_size=64 * 1024):
+        """
+        Yield the body in chunks, decompressed one chunk at a time if it was gzip/deflate encoded.
+
+        Args:
+            chunk_size (int): Size of each slice of the received body
+
+        Yields:
+            bytes: Decoded body chunks
+        """
+        encoding = self.headers.get('Content-Encoding', '').lower()
+        decompressor = zlib.decompressobj(47) if encoding in ('gzip', 'deflate') else None
+        for start in range(0, len(self._body), chunk_size):
+            chunk = self._body[start:start + chunk_size]
+            yield decompressor.decompress(chunk) if decompressor else chunk
+        if decompressor:
+            yield decompressor.flush()
+
+    @property
+    def content(self):
+        """The decoded body."""
+        return b''.join(self.iter_content())
+
+    def json(self):
+        """Parse the body as JSON."""
+        return json.loads(self.content)
+
+    def close(self):
+        """Release the body."""
+        self._body = b''
+
+def release(response):
+    """
+    Finish with a response whose body isn't needed (a 304, a throttle or an error), keeping its connection.
+
+    A streamed response only goes back to the pool once its body has been read;
+    closing it early drops the keep-alive socket instead. These bodies are
+    small, so they are read first.
+
+    Args:
+        response (requests.Response or AsyncResponse): Response from get() or get_async()
+    """
+    try:
+        response.content
+    except Exception:
+        # The connection broke mid-body; closing discards it
+        pass
+    response.close()
+
+def _report_status(response):
+    # Feed the response status back to the shared rate limiter
+    if response.status_code in THROTTLE_STATUS_CODES:
+        upstream_limiter.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+    elif response.status_code < 500:
+        upstream_limiter.on_success()
+
+def conditional_headers(validators):
+    """
+    Build If-None-Match/If-Modified-Since headers from a cached response's validators.
+
+    Args:
+        validators (dict): 'etag' and 'last_modified' saved from the previous response, or None
+
+    Returns:
+        dict: Request headers (empty if there is nothing to revalidate with)
+    """
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def response_validators(response, size):
+    """
+    Get the validators to send when this response is refetched.
+
+    Args:
+        response (requests.Response): A 200 upstream response
+        size (int): Body bytes received
+
+    Returns:
+        dict: 'etag', 'last_modified' and 'size', or None if the upstream sent neither validator
+    """
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return None
+    return {'etag': etag, 'last_modified': last_modified, 'size': size}
+
+def body_size(response):
+    """
+    Get how many body bytes a response took on the wire.
+
+    Args:
+        response (requests.Response or AsyncResponse): A response whose body has been read
+
+    Returns:
+        int: Content-Length, or bytes read from the connection if it was not sent
+    """
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return int(length)
+    if hasattr(response, 'wire_size'):
+        return response.wire_size
+    try:
+        return int(response.raw.tell())
+    except Exception:
+        return 0
+
+class RevalidationStats:
+    """Counters for month refetches, to see how often and how much conditional requests save."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.full_fetches = 0
+        self.conditional_fetches = 0
+        self.not_modified = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+    def record(self, conditional, not_modified, size):
+        """
+        Count one month fetch.
+
+        Args:
+            conditional (bool): Whether validators were sent
+            not_modified (bool): Whether the upstream answered 304
+            size (int): Body bytes downloaded, or for a 304 the cached body size it saved
+        """
+        with self._lock:
+            if conditional:
+                self.conditional_fetches += 1
+            else:
+                self.full_fetches += 1
+            if not_modified:
+                self.not_modified += 1
+                self.bytes_saved += size
+            else:
+                self.bytes_downloaded += size
+
+    def stats(self):
+        """
+        Get the counters.
+
+        Returns:
+            dict: Full and conditional fetches, 304s, share of conditional fetches that were 304, bytes downloaded and saved
+        """
+        with self._lock:
+            return {
+                'full_fetches': self.full_fetches,
+                'conditional_fetches': self.conditional_fetches,
+                'not_modified': self.not_modified,
+                'not_modified_ratio': self.not_modified / self.conditional_fetches if self.conditional_fetches else 0.0,
+                'bytes_downloaded': self.bytes_downloaded,
+                'bytes_saved': self.bytes_saved
+            }
+
+# Process-wide revalidation counters
+revalidation_stats = RevalidationStats()
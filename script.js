@@ -189,10 +189,11 @@ document.addEventListener('DOMContentLoaded', function() {
             
             console.log(`Using API endpoint: ${apiUrl} (isLocalhost: ${isLocalhost})`);
                 
-            const response = await fetch(apiUrl, {
+            const response = await fetch(`${apiUrl}?stream=ndjson`, {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/x-ndjson, application/json'
                 },
                 body: JSON.stringify({
                     startDate: startDate,
@@ -205,6 +206,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
             
+            // Render each campground as soon as the server streams it
+            const contentType = response.headers.get('Content-Type') || '';
+            if (contentType.includes('application/x-ndjson') && response.body) {
+                await readStreamedResults(response);
+                return;
+            }
+            
             const responseText = await response.text();
             
             let result;
@@ -235,6 +243,54 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Read newline-delimited JSON records and render results as they arrive
+    async function readStreamedResults(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const results = {};
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (value) {
+                buffer += decoder.decode(value, { stream: true });
+            }
+            if (done) {
+                buffer += decoder.decode();
+            }
+            
+            const lines = buffer.split('\n');
+            buffer = done ? '' : lines.pop();
+            
+            for (const line of lines) {
+                if (!line.trim()) {
+                    continue;
+                }
+                
+                const record = JSON.parse(line);
+                
+                if (record.type === 'campground') {
+                    results[record.facilityId] = record.result;
+                    
+                    // Show partial results while the rest are still loading
+                    displayResults(results, true);
+                } else if (record.type === 'summary') {
+                    document.getElementById("loading").classList.add("hidden");
+                    
+                    if (!record.success) {
+                        throw new Error(record.error || "Failed to check availability");
+                    }
+                    displayResults(results, record.foundAny);
+                    return;
+                }
+            }
+            
+            if (done) {
+                throw new Error("Stream ended before the summary record");
+            }
+        }
+    }
+    
     // Function to display results
     function displayResults(results, foundAny) {
         const resultsDiv = document.getElementById("results");
@@ -1,12 +1,168 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, g, render_template, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import os
 import sys
 import json
 import importlib.util
-import requests
+import threading
+import time
+import http_encoding
+import json_encoding
+import metrics
+import recreation_gov
+import streaming
+import timing
+from circuit_breaker import facility_breakers
+from month_cache import month_cache
+from rate_limiter import upstream_limiter
+from singleflight import month_fetches
+from snapshot_diff import month_differ
 from datetime import datetime, timedelta
 
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that writes jsonify() bodies as bytes from json_encoding (orjson when installed)."""
+    
+    def response(self, *args, **kwargs):
+        # Same arguments as jsonify(): one value, several (sent as a list), or keyword arguments (an object)
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = list(args) if args else kwargs or None
+        with timing.phase('serialize'):
+            body = json_encoding.dumps(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+# The availability engine is loaded once and hot-reloaded only when the file changes
+CHECK_YOSEMITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'check_yosemite.py')
+_engine = None  # (module, mtime)
+_engine_lock = threading.Lock()
+
+def load_check_yosemite():
+    """
+    Import check_yosemite.py from disk.
+    
+    Returns:
+        tuple: (module, file mtime at load time)
+    """
+    mtime = os.path.getmtime(CHECK_YOSEMITE_PATH)
+    started = time.perf_counter()
+    spec = importlib.util.spec_from_file_location("check_yosemite", CHECK_YOSEMITE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    print(f"Loaded check_yosemite in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return module, mtime
+
+def get_check_yosemite():
+    """
+    Get the loaded check_yosemite module, reloading it if the file's mtime has changed.
+    
+    The new module is swapped in only once it has loaded successfully, so requests
+    already running keep the version they started with.
+    
+    Returns:
+        module: The check_yosemite module
+    """
+    global _engine
+    
+    engine = _engine
+    try:
+        mtime = os.path.getmtime(CHECK_YOSEMITE_PATH)
+    except OSError:
+        mtime = None
+    
+    if engine is None or (mtime is not None and mtime != engine[1]):
+        with _engine_lock:
+            # Another request may have reloaded while we waited for the lock
+            if _engine is engine:
+                try:
+                    _engine = load_check_yosemite()
+                except Exception as e:
+                    if engine is None:
+                        raise
+                    print(f"Error reloading check_yosemite, keeping previous version: {e}")
+                    # Don't retry until the file changes again
+                    _engine = (engine[0], mtime)
+            engine = _engine
+    
+    return engine[0]
+
+try:
+    get_check_yosemite()
+except Exception as e:
+    print(f"Error importing check_yosemite: {e}")
+
+# Per-phase timings (see timing.PHASES) as a Server-Timing header on JSON responses.
+# Registered first so its after_request runs last, once serialization and compression are timed.
+@app.before_request
+def start_request_timer():
+    g.request_timer, g.request_timer_token = timing.start_request()
+
+@app.after_request
+def add_server_timing(response):
+    if timing.SERVER_TIMING and 'request_timer' in g and not response.is_streamed and response.mimetype == 'application/json':
+        response.headers['Server-Timing'] = g.request_timer.server_timing()
+    return response
+
+@app.teardown_request
+def end_request_timer(error=None):
+    if 'request_timer_token' in g:
+        timing.end_request(g.pop('request_timer_token'))
+
+# Request latency, status codes and in-flight counts for /metrics.
+# Registered before encode_json_response so it runs after it and includes encoding time.
+@app.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_started = time.perf_counter()
+    metrics.request_started(g.metrics_endpoint)
+
+@app.after_request
+def record_request_metrics(response):
+    if 'metrics_started' in g:
+        endpoint, started, status = g.metrics_endpoint, g.pop('metrics_started'), response.status_code
+        finish = lambda: metrics.request_finished(endpoint, status, time.perf_counter() - started)
+        if response.is_streamed:
+            # Streamed bodies are still being produced; count the request until the stream closes
+            response.call_on_close(finish)
+        else:
+            finish()
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    # Requests that raised never reach after_request
+    if 'metrics_started' in g:
+        metrics.request_finished(g.metrics_endpoint, 500, time.perf_counter() - g.pop('metrics_started'))
+
+# ETags, If-None-Match -> 304 and gzip/brotli for JSON bodies; streamed results are compressed record by record
+@app.after_request
+def encode_json_response(response):
+    if 'Content-Encoding' in response.headers:
+        return response
+    accept_encoding = request.headers.get('Accept-Encoding')
+    
+    if response.is_streamed:
+        encoding = http_encoding.negotiate_encoding(accept_encoding)
+        if encoding and response.mimetype in streaming.STREAM_CONTENT_TYPES.values():
+            response.response = http_encoding.compress_stream(response.response, encoding)
+            response.headers['Content-Encoding'] = encoding
+            response.headers['Vary'] = 'Accept-Encoding'
+        return response
+    
+    if response.mimetype != 'application/json' or response.status_code != 200:
+        return response
+    
+    with timing.phase('encode'):
+        status, body, headers = http_encoding.encode_response(response.get_data(), request.headers.get('If-None-Match'), accept_encoding)
+    response.status_code = status
+    response.set_data(body)
+    response.headers.update(headers)
+    return response
 
 # Serve static files
 @app.route('/')
@@ -46,173 +202,117 @@ def update_dates():
 @app.route('/check_availability', methods=['POST'])
 def check_availability():
     try:
-        data = request.json
+        # Use the loaded check_yosemite module (reloaded only if the file changed)
+        try:
+            check_yosemite = get_check_yosemite()
+        except Exception as e:
+            print(f"Error importing check_yosemite: {e}")
+            return jsonify({'success': False, 'error': 'Availability engine failed to load'}), 500
         
-        if not data or 'startDate' not in data or 'endDate' not in data or 'campgrounds' not in data:
-            return jsonify({'success': False, 'error': 'Missing required parameters'}), 400
+        try:
+            params = check_yosemite.parse_availability_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        start_date = data['startDate']
-        end_date = data['endDate']
-        campgrounds = data['campgrounds']
+        # Stream each campground as soon as its months finish, if the client asked for it
+        stream_format = streaming.get_stream_format(request.args.get('stream'), request.headers.get('Accept'))
+        if stream_format:
+            records = streaming.stream_availability(check_yosemite, params['campgrounds'], params['start_date'], params['end_date'],
+                                                  stream_format, use_cache=params['use_cache'], nights=params['nights'])
+            return Response(stream_with_context(records), mimetype=streaming.STREAM_CONTENT_TYPES[stream_format],
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
         
-        # Validate date format
-        try:
-            datetime.strptime(start_date, '%Y-%m-%d')
-            datetime.strptime(end_date, '%Y-%m-%d')
-        except ValueError:
-            return jsonify({'success': False, 'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        # Opt-in (PROFILE_REQUESTS=1): run the check under cProfile, on one thread so it sees the fetches too
+        if timing.wants_profile(request.args.get('debug')):
+            return Response(timing.profile_call(check_yosemite.check_availability, transport='blocking', **params), mimetype='text/plain')
+        
+        result = check_yosemite.check_availability(**params)
+        
+        # ?debug=timing: the phase timings so far (serialization and compression are only in Server-Timing)
+        if timing.wants_timing(request.args.get('debug')):
+            result['timing'] = g.request_timer.to_dict()
         
-        # Dynamically import the check_yosemite module
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Several queries in one request; each distinct (facility, month) is fetched once for all of them
+@app.route('/check_availability_batch', methods=['POST'])
+def check_availability_batch():
+    try:
         try:
-            spec = importlib.util.spec_from_file_location("check_yosemite", "./check_yosemite.py")
-            check_yosemite = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(check_yosemite)
+            check_yosemite = get_check_yosemite()
         except Exception as e:
             print(f"Error importing check_yosemite: {e}")
-            # If we can't import, use our own implementation
-            return check_availability_api(start_date, end_date, campgrounds)
-        
-        # Check availability for each campground
-        results = {}
-        found_any = False
+            return jsonify({'success': False, 'error': 'Availability engine failed to load'}), 500
         
-        for facility_id in campgrounds:
-            try:
-                availability_data = check_yosemite.check_campsite_availability(facility_id, start_date, end_date)
-                
-                # Get campground name
-                campground_name = check_yosemite.CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}")
-                
-                # Ensure we have all the expected keys in the response
-                if not isinstance(availability_data, dict):
-                    availability_data = {'availability': {}, 'reservation_types': {}, 'is_first_come_first_served': False}
-                
-                if 'availability' not in availability_data:
-                    availability_data['availability'] = {}
-                if 'reservation_types' not in availability_data:
-                    availability_data['reservation_types'] = {}
-                if 'is_first_come_first_served' not in availability_data:
-                    availability_data['is_first_come_first_served'] = False
-                
-                results[facility_id] = {
-                    'name': campground_name,
-                    'availability': availability_data['availability'],
-                    'reservation_types': availability_data['reservation_types'],
-                    'is_first_come_first_served': availability_data['is_first_come_first_served']
-                }
-                
-                if availability_data['availability'] and len(availability_data['availability']) > 0:
-                    found_any = True
-            except Exception as e:
-                print(f"Error checking availability for facility {facility_id}: {e}")
-                results[facility_id] = {
-                    'name': check_yosemite.CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}"),
-                    'availability': {},
-                    'error': str(e)
-                }
+        try:
+            queries = check_yosemite.parse_batch_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        return jsonify({
-            'success': True,
-            'results': results,
-            'foundAny': found_any
-        })
+        return jsonify(check_yosemite.check_availability_batch(queries))
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def check_availability_api(start_date, end_date, campgrounds):
-    """Fallback function to check availability directly using the Recreation.gov API"""
-    results = {}
-    found_any = False
-    
-    # Campground names mapping
-    CAMPGROUND_NAMES = {
-        "232447": "Upper Pines",
-        "232450": "Lower Pines",
-        "232449": "North Pines",
-        "232451": "Hodgdon Meadow",
-        "233503": "Grant River",
-        "255119": "Fowlers Campground",
-        "232452": "Crane Flat",
-        "232446": "Wawona",
-        "232448": "Tuolumne Meadows",
-        "10083567": "White Wolf",
-        "232453": "Bridalveil Creek",
-        "10083840": "Yosemite Creek",
-        "10083831": "Porcupine Flat",
-        "10083845": "Tamarack Flat",
-        "232445": "Watchman",
-        "232458": "Platte River"
-    }
-    
-    for facility_id in campgrounds:
+# Every site open on all of the given nights, park-wide, from the night -> sites index
+@app.route('/available_on', methods=['POST'])
+def available_on():
+    try:
         try:
-            # Format dates for API request
-            start_month = start_date[:7] + "-01"  # YYYY-MM-01
-            
-            # Create a set of months to check
-            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
-            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-            
-            # If dates span multiple months, we need to check each month
-            months_to_check = []
-            current_month = start_date_obj.replace(day=1)
-            
-            while current_month <= end_date_obj:
-                months_to_check.append(current_month.strftime('%Y-%m-01'))
-                # Move to next month
-                if current_month.month == 12:
-                    current_month = current_month.replace(year=current_month.year + 1, month=1)
-                else:
-                    current_month = current_month.replace(month=current_month.month + 1)
-            
-            # Check availability for each month
-            availability = {}
-            
-            for month_date in months_to_check:
-                formatted_date = f"{month_date}T00%3A00%3A00.000Z"
-                url = f"https://www.recreation.gov/api/camps/availability/campground/{facility_id}/month?start_date={formatted_date}"
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                
-                response = requests.get(url, headers=headers)
-                
-                if response.status_code != 200:
-                    print(f"Failed to fetch data for facility {facility_id}: {response.status_code}")
-                    continue
-                
-                data = response.json()
-                
-                # Process the response data
-                for site_id, details in data.get('campsites', {}).items():
-                    for date, status in details.get('availabilities', {}).items():
-                        if date >= start_date and date <= end_date and status == "Available":
-                            if site_id not in availability:
-                                availability[site_id] = []
-                            availability[site_id].append(date)
-            
-            # Add results for this campground
-            results[facility_id] = {
-                'name': CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}"),
-                'availability': availability
-            }
-            
-            if availability and len(availability) > 0:
-                found_any = True
-                
+            check_yosemite = get_check_yosemite()
         except Exception as e:
-            print(f"Error checking availability for facility {facility_id}: {e}")
-            results[facility_id] = {
-                'name': CAMPGROUND_NAMES.get(facility_id, f"Campground {facility_id}"),
-                'availability': {},
-                'error': str(e)
-            }
+            print(f"Error importing check_yosemite: {e}")
+            return jsonify({'success': False, 'error': 'Availability engine failed to load'}), 500
+        
+        try:
+            params = check_yosemite.parse_available_on_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify(check_yosemite.find_available_on(**params))
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Cells that opened up or got taken since a given time, for cancellation alerts
+@app.route('/changes', methods=['GET'])
+def changes():
+    try:
+        since = float(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid since. Use a Unix timestamp'}), 400
     
     return jsonify({
         'success': True,
-        'results': results,
-        'foundAny': found_any
+        'now': time.time(),
+        'changes': month_differ.changes_since(since)
+    })
+
+# Upstream fetch counters (cache, coalescing, rate limiting, conditional refetches), for monitoring
+@app.route('/upstream_stats', methods=['GET'])
+def upstream_stats():
+    return jsonify({
+        'success': True,
+        'month_cache': month_cache.stats(),
+        'coalesced_fetches': month_fetches.stats(),
+        'rate_limiter': upstream_limiter.stats(),
+        'revalidation': recreation_gov.revalidation_stats.stats()
+    })
+
+# Prometheus metrics: request and upstream latency, status codes, in-flight requests and engine counters
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# Per-facility circuit breaker states, for monitoring
+@app.route('/circuit_breakers', methods=['GET'])
+def circuit_breakers():
+    return jsonify({
+        'success': True,
+        'breakers': facility_breakers.states()
     })
 
 if __name__ == '__main__':
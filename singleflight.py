@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+class _Call:
+    """An in-flight call that concurrent callers wait on, from threads or event loops."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.task = None
+        self._waiters = []
+        self._lock = threading.Lock()
+
+    def finish(self, result=None, error=None):
+        """Publish the outcome and wake every waiting thread and coroutine."""
+        self.result = result
+        self.error = error
+        with self._lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # That caller's loop has closed; nobody is left to wake
+                pass
+
+    def outcome(self):
+        """Return the shared result, or raise the shared exception."""
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    async def wait_async(self):
+        """Wait for the call to finish without blocking the event loop."""
+        with self._lock:
+            future = None
+            if not self.done.is_set():
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+        if future is not None:
+            await future
+        return self.outcome()
+
+def _resolve(future):
+    # The waiter may have been cancelled meanwhile
+    if not future.done():
+        future.set_result(None)
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; every caller that arrives
+    while it is running waits and receives the same result (or exception).
+    Threads (do) and coroutines (do_async) share the same in-flight calls, so
+    a blocking request and an asyncio request for one key make one call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def _join(self, key):
+        # Get the key's in-flight call, creating it if this caller is the first
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            self.executions += 1
+            return call, True
+
+    def _finish(self, key, call, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        call.finish(result, error)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) once per key among concurrent callers.
+
+        Args:
+            key: Hashable key identifying the call
+            fn (callable): Function to run
+
+        Returns:
+            The result of fn, shared by every concurrent caller for the key
+        """
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            return call.outcome()
+
+        result = error = None
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._finish(key, call, result, error)
+        return result
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        Coroutine version of do, for a coroutine function.
+
+        The first caller starts fn as its own task, so cancelling one caller
+        (e.g. a client that went away) doesn't cancel the call for the others.
+
+        Args:
+            key: Hashable key identifying the call
+            fn (callable): Coroutine function to run
+
+        Returns:
+            The result of fn, shared by every concurrent caller for the key
+        """
+        call, leader = self._join(key)
+        if leader:
+            call.task = asyncio.ensure_future(self._lead_async(key, call, fn, args, kwargs))
+        return await call.wait_async()
+
+    async def _lead_async(self, key, call, fn, args, kwargs):
+        try:
+            result = await fn(*args, **kwargs)
+        except (Exception, asyncio.CancelledError) as e:
+            # Handed to the waiters rather than raised, so the task never logs an unretrieved exception
+            self._finish(key, call, error=e)
+        else:
+            self._finish(key, call, result)
+
+    def stats(self):
+        """
+        Get coalescing counters.
+
+        Returns:
+            dict: Upstream executions, calls served by another caller's fetch, and in-flight keys
+        """
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'saved': self.shared,
+                'in_flight': len(self._calls)
+            }
+
+# Process-wide coalescing of (facility_id, month_date) upstream fetches
+month_fetches = SingleFlight()
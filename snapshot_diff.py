@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+from month_cache import MONTH_CACHE_MAX_ENTRIES
+
+# How many change events to keep for pollers
+RECENT_CHANGES_MAX = 5000
+
+class SnapshotDiffer:
+    """
+    Detect which (site, night) cells flipped between successive month payloads.
+
+    For every (facility_id, month_date) the differ remembers the last payload's
+    version (its fetch time) and, per site, a fingerprint of its availabilities
+    row plus a bitmask of its Available nights. A payload with the same version
+    as the last one (a cache hit) is skipped outright, and a site whose
+    fingerprint is unchanged is skipped without touching its cells, so only rows
+    that really changed are decoded. Months are kept in LRU order, bounded like
+    the month cache; an evicted month's next payload sets a new baseline.
+    """
+
+    def __init__(self, max_changes=RECENT_CHANGES_MAX, max_months=MONTH_CACHE_MAX_ENTRIES):
+        self._months = OrderedDict()
+        self.max_months = max_months
+        self._lock = threading.Lock()
+        self.recent_changes = deque(maxlen=max_changes)
+        self.sites_checked = 0
+        self.sites_changed = 0
+
+    @staticmethod
+    def _day_bits(month_prefix):
+        # Payload date key -> its day-of-month bit, so the mask needs no per-cell parsing
+        return {f"{month_prefix}{day:02d}T00:00:00Z": 1 << day for day in range(1, 32)}
+
+    @staticmethod
+    def _available_mask(availabilities, day_bits):
+        # Bit d is set when day-of-month d is Available
+        mask = 0
+        for date_str, status in availabilities.items():
+            if status == 'Available':
+                mask |= day_bits.get(date_str) or 1 << int(date_str[8:10])
+        return mask
+
+    def diff_month(self, facility_id, month_date, payload, record=True, version=None):
+        """
+        Compare a month payload with the previous one for the same facility and month.
+
+        The first payload seen for a month only sets the baseline and reports no changes.
+
+        Args:
+            facility_id (str): Recreation.gov facility ID
+            month_date (str): Month start date in YYYY-MM-01 format
+            payload (dict): Month payload from Recreation.gov
+            record (bool): Also append the changes to recent_changes
+            version (float): Payload version, e.g. its fetch time; a repeat of the last version is skipped
+                (None always compares)
+
+        Returns:
+            dict: 'newly_available' and 'newly_taken' lists of (facility_id, site_id, date)
+        """
+        key = (facility_id, month_date)
+        newly_available = []
+        newly_taken = []
+
+        with self._lock:
+            previous = self._months.get(key)
+            if previous is not None and version is not None and previous[0] == version:
+                self._months.move_to_end(key)
+                return {'newly_available': newly_available, 'newly_taken': newly_taken}
+
+            old_rows = previous[1] if previous is not None else {}
+            get_old_row = old_rows.get
+            rows = {}
+            month_prefix = month_date[:8]
+            day_bits = self._day_bits(month_prefix)
+            campsites = payload.get('campsites', {})
+            self.sites_checked += len(campsites)
+
+            for site_id, details in campsites.items():
+                availabilities = details.get('availabilities', {})
+                # Dates as well as statuses: compacted payloads only list Available nights.
+                # Hashing the two tuples is about twice as fast as hashing tuple(items()).
+                fingerprint = hash((tuple(availabilities), tuple(availabilities.values())))
+
+                old_row = get_old_row(site_id)
+                if old_row is not None and old_row[0] == fingerprint:
+                    rows[site_id] = old_row
+                    continue
+
+                mask = self._available_mask(availabilities, day_bits)
+                rows[site_id] = (fingerprint, mask)
+                if previous is None:
+                    continue
+
+                self.sites_changed += 1
+                old_mask = old_row[1] if old_row is not None else 0
+                opened = mask & ~old_mask
+                closed = old_mask & ~mask
+                for changed, changes in ((opened, newly_available), (closed, newly_taken)):
+                    while changed:
+                        low_bit = changed & -changed
+                        changes.append((facility_id, site_id, f"{month_prefix}{low_bit.bit_length() - 1:02d}"))
+                        changed ^= low_bit
+
+            self._months[key] = (version, rows)
+            self._months.move_to_end(key)
+            while len(self._months) > self.max_months:
+                self._months.popitem(last=False)
+
+            if record and (newly_available or newly_taken):
+                observed_at = time.time()
+                for change in newly_available:
+                    self.recent_changes.append((observed_at, 'available') + change)
+                for change in newly_taken:
+                    self.recent_changes.append((observed_at, 'taken') + change)
+
+        return {'newly_available': newly_available, 'newly_taken': newly_taken}
+
+    def diff_sweep(self, month_payloads, record=True, versions=None):
+        """
+        Diff a whole sweep of month payloads.
+
+        Args:
+            month_payloads (dict): (facility_id, month_date) -> month payload
+            record (bool): Also append the changes to recent_changes
+            versions (dict): (facility_id, month_date) -> payload version, for the months that have one
+
+        Returns:
+            dict: Combined 'newly_available' and 'newly_taken' lists of (facility_id, site_id, date)
+        """
+        newly_available = []
+        newly_taken = []
+        for (facility_id, month_date), payload in month_payloads.items():
+            if payload is None:
+                continue
+            changes = self.diff_month(facility_id, month_date, payload, record, (versions or {}).get((facility_id, month_date)))
+            newly_available.extend(changes['newly_available'])
+            newly_taken.extend(changes['newly_taken'])
+        return {'newly_available': newly_available, 'newly_taken': newly_taken}
+
+    def changes_since(self, since=0.0):
+        """
+        Get recorded change events newer than a timestamp.
+
+        Args:
+            since (float): Unix time; only events observed after it are returned
+
+        Returns:
+            list: Dicts with observedAt, change ('available' or 'taken'), facilityId, siteId and date
+        """
+        with self._lock:
+            events = [event for event in self.recent_changes if event[0] > since]
+        return [
+            {'observedAt': observed_at, 'change': change, 'facilityId': facility_id, 'siteId': site_id, 'date': date}
+            for observed_at, change, facility_id, site_id, date in events
+        ]
+
+# Process-wide differ fed by every upstream month fetch
+month_differ = SnapshotDiffer()
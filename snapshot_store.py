@@ -0,0 +1,206 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+# Snapshot store settings; /tmp is the only writable path on Vercel
+SNAPSHOT_STORE_ENABLED = os.environ.get('SNAPSHOT_STORE', '1') == '1'
+SNAPSHOT_DB_PATH = os.environ.get('SNAPSHOT_DB_PATH', os.path.join(tempfile.gettempdir(), 'yosemite_snapshots.sqlite3'))
+SNAPSHOT_MAX_AGE = float(os.environ.get('SNAPSHOT_MAX_AGE', '86400'))
+
+# Writes are grouped into one transaction per batch, off the request path
+SNAPSHOT_BATCH_SIZE = 64
+SNAPSHOT_FLUSH_INTERVAL = 1.0
+
+class SnapshotStore:
+    """
+    SQLite-backed store of the latest month payload per (facility_id, month_date).
+
+    record() only enqueues; a background writer thread commits queued
+    snapshots in batched transactions so requests never wait on disk.
+    """
+
+    def __init__(self, path=SNAPSHOT_DB_PATH):
+        self.path = path
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._warmed = False
+        self.writes = 0
+        self.batches = 0
+
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS month_snapshots (
+                    facility_id TEXT NOT NULL,
+                    month_date TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (facility_id, month_date)
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed."""
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def record(self, facility_id, month_date, payload, fetched_at=None):
+        """
+        Queue a month payload to be written by the background writer.
+
+        Args:
+            facility_id (str): Recreation.gov facility ID
+            month_date (str): Month start date in YYYY-MM-01 format
+            payload (dict): Month payload from Recreation.gov
+            fetched_at (float): Unix time the payload was fetched (defaults to now)
+        """
+        self._queue.put((facility_id, month_date, fetched_at or time.time(), payload))
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.time() + SNAPSHOT_FLUSH_INTERVAL
+            while len(batch) < SNAPSHOT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.time())))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        # Only the latest snapshot per key matters within a batch
+        latest = {}
+        for facility_id, month_date, fetched_at, payload in batch:
+            latest[(facility_id, month_date)] = (fetched_at, payload)
+
+        rows = [
+            (facility_id, month_date, fetched_at, zlib.compress(json.dumps(payload).encode()))
+            for (facility_id, month_date), (fetched_at, payload) in latest.items()
+        ]
+
+        try:
+            with self._connect() as connection:
+                connection.executemany('''
+                    INSERT INTO month_snapshots (facility_id, month_date, fetched_at, payload)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (facility_id, month_date) DO UPDATE SET
+                        fetched_at = excluded.fetched_at,
+                        payload = excluded.payload
+                    WHERE excluded.fetched_at >= month_snapshots.fetched_at
+                ''', rows)
+            self.writes += len(rows)
+            self.batches += 1
+        except Exception as e:
+            print(f"Error writing availability snapshots: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """
+        Write out anything still queued.
+
+        Args:
+            timeout (float): Give up after this many seconds (None waits until done)
+        """
+        if timeout is None:
+            self._queue.join()
+            return
+
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def load(self, facility_id, month_date):
+        """
+        Read the latest snapshot of a month.
+
+        Args:
+            facility_id (str): Recreation.gov facility ID
+            month_date (str): Month start date in YYYY-MM-01 format
+
+        Returns:
+            tuple: (payload, fetched_at), or (None, None) if there is no snapshot
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT payload, fetched_at FROM month_snapshots WHERE facility_id = ? AND month_date = ?',
+                (facility_id, month_date)
+            ).fetchone()
+
+        if row is None:
+            return None, None
+        return json.loads(zlib.decompress(row[0])), row[1]
+
+    def warm_cache(self, cache, max_age=SNAPSHOT_MAX_AGE):
+        """
+        Load recent snapshots into a month cache, keeping their original fetch times.
+
+        Only runs once per process, however many times it is called.
+
+        Args:
+            cache (MonthCache): Cache to fill
+            max_age (float): Skip snapshots older than this many seconds
+
+        Returns:
+            int: Number of snapshots loaded
+        """
+        if self._warmed:
+            return 0
+        self._warmed = True
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                'SELECT facility_id, month_date, fetched_at, payload FROM month_snapshots '
+                'WHERE fetched_at >= ? ORDER BY fetched_at DESC LIMIT ?',
+                (time.time() - max_age, cache.max_entries)
+            ).fetchall()
+
+        # Oldest first, so the most recent snapshots end up most recently used
+        for facility_id, month_date, fetched_at, payload in reversed(rows):
+            cache.set((facility_id, month_date), json.loads(zlib.decompress(payload)), fetched_at=fetched_at)
+
+        return len(rows)
+
+    def stats(self):
+        """
+        Get writer counters.
+
+        Returns:
+            dict: Snapshots written, batches committed and writes still queued
+        """
+        return {
+            'writes': self.writes,
+            'batches': self.batches,
+            'queued': self._queue.unfinished_tasks
+        }
+
+# Process-wide store, or None when disabled or the database can't be opened
+snapshot_store = None
+if SNAPSHOT_STORE_ENABLED:
+    try:
+        snapshot_store = SnapshotStore()
+        atexit.register(snapshot_store.flush, 2.0)
+    except Exception as e:
+        print(f"Error opening snapshot store {SNAPSHOT_DB_PATH}: {e}")
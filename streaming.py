@@ -0,0 +1,110 @@
+from json_encoding import dumps
+
+# Supported streaming formats and their content types
+STREAM_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream'
+}
+
+def get_stream_format(stream_param=None, accept=None):
+    """
+    Work out which streaming format a client asked for, if any.
+
+    Args:
+        stream_param (str): Value of the ?stream= query parameter ('ndjson' or 'sse')
+        accept (str): Value of the Accept header
+
+    Returns:
+        str: 'ndjson', 'sse', or None for a regular JSON response
+    """
+    if stream_param in STREAM_CONTENT_TYPES:
+        return stream_param
+
+    accept = accept or ''
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    if 'text/event-stream' in accept:
+        return 'sse'
+
+    return None
+
+def encode_record(stream_format, event, payload):
+    """
+    Encode one record for the stream.
+
+    Args:
+        stream_format (str): 'ndjson' or 'sse'
+        event (str): Record type ('campground' or 'summary')
+        payload (dict): Record body
+
+    Returns:
+        bytes: Encoded record, including its delimiter
+    """
+    if stream_format == 'sse':
+        return b"event: " + event.encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+
+    return dumps({'type': event, **payload}) + b"\n"
+
+def stream_availability(check_yosemite, campgrounds, start_date, end_date, stream_format, use_cache=True, campground_names=None, nights=None):
+    """
+    Check campgrounds and yield each result as soon as it is ready, then a summary.
+
+    Args:
+        check_yosemite (module): The availability engine module
+        campgrounds (list): Recreation.gov facility IDs
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        stream_format (str): 'ndjson' or 'sse'
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        campground_names (dict): Facility ID -> name mapping (defaults to the engine's)
+        nights (int): If set, search for stays of this many consecutive nights
+
+    Yields:
+        bytes: One encoded 'campground' record per facility, then a 'summary' record
+    """
+    found_any = False
+
+    try:
+        for facility_id, availability_data in check_yosemite.iter_multiple_campgrounds(campgrounds, start_date, end_date, use_cache=use_cache):
+            result = check_yosemite.format_campground_result(facility_id, availability_data, campground_names, nights)
+            if result.get('stays', result['availability']):
+                found_any = True
+            yield encode_record(stream_format, 'campground', {'facilityId': facility_id, 'result': result})
+    except Exception as e:
+        print(f"Error streaming availability: {e}")
+        yield encode_record(stream_format, 'summary', {'success': False, 'error': str(e), 'foundAny': found_any})
+        return
+
+    yield encode_record(stream_format, 'summary', {'success': True, 'foundAny': found_any})
+
+async def stream_availability_async(check_yosemite, campgrounds, start_date, end_date, stream_format, use_cache=True, campground_names=None, nights=None):
+    """
+    Async generator version of stream_availability, for the ASGI app.
+
+    Args:
+        check_yosemite (module): The availability engine module
+        campgrounds (list): Recreation.gov facility IDs
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        stream_format (str): 'ndjson' or 'sse'
+        use_cache (bool): Use cached month payloads; False forces a fresh check
+        campground_names (dict): Facility ID -> name mapping (defaults to the engine's)
+        nights (int): If set, search for stays of this many consecutive nights
+
+    Yields:
+        bytes: One encoded 'campground' record per facility, then a 'summary' record
+    """
+    found_any = False
+
+    try:
+        async for facility_id, availability_data in check_yosemite.iter_multiple_campgrounds_async(campgrounds, start_date, end_date, use_cache=use_cache):
+            result = check_yosemite.format_campground_result(facility_id, availability_data, campground_names, nights)
+            if result.get('stays', result['availability']):
+                found_any = True
+            yield encode_record(stream_format, 'campground', {'facilityId': facility_id, 'result': result})
+    except Exception as e:
+        print(f"Error streaming availability: {e}")
+        yield encode_record(stream_format, 'summary', {'success': False, 'error': str(e), 'foundAny': found_any})
+        return
+
+    yield encode_record(stream_format, 'summary', {'success': True, 'foundAny': found_any})
@@ -1,20 +1,25 @@
+import argparse
 import requests
 import json
+import time
 from datetime import datetime
 
-def test_campground_api(facility_id, start_date):
+from fixture_store import FIXTURES_DIR, FixtureStore
+from recreation_gov import month_url
+
+def test_campground_api(facility_id, start_date, fixtures=None):
     """
     Test the Recreation.gov API for a specific campground with proper URL encoding
     
     Args:
         facility_id (str): The facility ID for the campground
         start_date (str): Start date in YYYY-MM-DD format (should be first of month)
+        fixtures (FixtureStore): If given, record the full response (body, headers and timing) to it
     """
     print(f"\nTesting API for facility ID: {facility_id}")
     
-    # Format the date with URL encoding
-    formatted_date = f"{start_date}T00%3A00%3A00.000Z"
-    url = f"https://www.recreation.gov/api/camps/availability/campground/{facility_id}/month?start_date={formatted_date}"
+    # Same URL-encoded month URL the app requests (honours RECGOV_BASE_URL)
+    url = month_url(facility_id, start_date)
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -23,77 +28,161 @@ def test_campground_api(facility_id, start_date):
     print(f"URL: {url}")
     
     try:
+        request_started = time.perf_counter()
         response = requests.get(url, headers=headers)
+        elapsed = time.perf_counter() - request_started
+        
+        print(f"Status Code: {response.status_code} ({elapsed * 1000:.0f} ms, {len(response.content)} bytes)")
         
-        print(f"Status Code: {response.status_code}")
+        if fixtures is not None:
+            entry = fixtures.record(facility_id, start_date, response.content, response.status_code,
+                                    response.headers, elapsed)
+            print(f"Recorded fixture {entry['sha256'][:12]} ({entry['compressed_size']} bytes compressed)")
         
         if response.status_code == 200:
-            data = response.json()
-            
-            # Check if we have campsites data
-            if 'campsites' in data:
-                campsite_count = len(data['campsites'])
-                print(f"Number of campsites: {campsite_count}")
-                
-                # Check for any available sites
-                available_count = 0
-                available_dates = []
-                
-                for site_id, details in data['campsites'].items():
-                    for date, status in details.get('availabilities', {}).items():
-                        if status == "Available":
-                            available_count += 1
-                            available_dates.append(date)
-                
-                print(f"Number of available slots: {available_count}")
-                if available_count > 0:
-                    print(f"Sample available dates: {available_dates[:5]}")
-                    
-                # Print a sample campsite data
-                if campsite_count > 0:
-                    sample_site_id = list(data['campsites'].keys())[0]
-                    print(f"\nSample campsite data for site {sample_site_id}:")
-                    sample_site = data['campsites'][sample_site_id]
-                    
-                    # Print availability statuses
-                    print("Availability statuses:")
-                    statuses = list(sample_site.get('availabilities', {}).values())
-                    unique_statuses = set(statuses)
-                    print(f"All status types in data: {unique_statuses}")
-            else:
-                print("No 'campsites' data found in the response")
-                print("Response data keys:", data.keys())
-                
-                # Check for facility data
-                if 'facility' in data:
-                    facility_data = data['facility']
-                    print(f"Facility Details URL: https://www.recreation.gov/api/camps/campgrounds/{facility_id}")
-                    print(f"Facility data keys: {list(facility_data.keys())}")
-                    
-                    if 'facility_name' in facility_data:
-                        print(f"Facility Name: {facility_data['facility_name']}")
-                    
-                    if 'facility_type' in facility_data:
-                        print(f"Facility Type: {facility_data['facility_type']}")
-                    
-                    if 'reservable' in facility_data:
-                        print(f"Is Reservable: {facility_data['reservable']}")
-                    else:
-                        print("Is Reservable: Unknown")
-                
-                print("Response preview:", json.dumps(data, indent=2)[:500] + "...")
+            summarize_month(facility_id, response.json())
         else:
             print(f"Error response: {response.text}")
     
     except Exception as e:
         print(f"Error testing API: {e}")
 
-if __name__ == "__main__":
-    # Test Grant River
-    test_campground_api("233503", "2025-03-01")
+def replay_campground_api(facility_id, start_date, fixtures):
+    """
+    Run the same checks as test_campground_api against a recorded response
+    
+    Args:
+        facility_id (str): The facility ID for the campground
+        start_date (str): Start date in YYYY-MM-DD format (should be first of month)
+        fixtures (FixtureStore): Store holding the recorded response
+    """
+    print(f"\nReplaying API for facility ID: {facility_id}")
+    
+    entry = fixtures.entry(facility_id, start_date)
+    if entry is None:
+        print(f"No fixture recorded for {facility_id} {start_date}")
+        return
     
-    # Test Fowlers Campground
-    test_campground_api("255119", "2025-03-01")
+    print(f"Status Code: {entry['status']} (recorded in {entry['elapsed'] * 1000:.0f} ms, {entry['size']} bytes)")
     
-    # Test a Yosemite campground for comparison
-    test_campground_api("232447", "2025-03-01")  # Upper Pines
+    parse_started = time.perf_counter()
+    data = fixtures.load(facility_id, start_date)
+    print(f"Loaded and parsed in {(time.perf_counter() - parse_started) * 1000:.1f} ms")
+    
+    if entry['status'] == 200:
+        summarize_month(facility_id, data)
+
+def summarize_month(facility_id, data):
+    """
+    Print campsite and availability counts for a month payload
+    
+    Args:
+        facility_id (str): The facility ID for the campground
+        data (dict): Month payload from Recreation.gov
+    """
+    # Check if we have campsites data
+    if 'campsites' in data:
+        campsite_count = len(data['campsites'])
+        print(f"Number of campsites: {campsite_count}")
+        
+        # Check for any available sites
+        available_count = 0
+        available_dates = []
+        
+        for site_id, details in data['campsites'].items():
+            for date, status in details.get('availabilities', {}).items():
+                if status == "Available":
+                    available_count += 1
+                    available_dates.append(date)
+        
+        print(f"Number of available slots: {available_count}")
+        if available_count > 0:
+            print(f"Sample available dates: {available_dates[:5]}")
+            
+        # Print a sample campsite data
+        if campsite_count > 0:
+            sample_site_id = list(data['campsites'].keys())[0]
+            print(f"\nSample campsite data for site {sample_site_id}:")
+            sample_site = data['campsites'][sample_site_id]
+            
+            # Print availability statuses
+            print("Availability statuses:")
+            statuses = list(sample_site.get('availabilities', {}).values())
+            unique_statuses = set(statuses)
+            print(f"All status types in data: {unique_statuses}")
+    else:
+        print("No 'campsites' data found in the response")
+        print("Response data keys:", data.keys())
+        
+        # Check for facility data
+        if 'facility' in data:
+            facility_data = data['facility']
+            print(f"Facility Details URL: https://www.recreation.gov/api/camps/campgrounds/{facility_id}")
+            print(f"Facility data keys: {list(facility_data.keys())}")
+            
+            if 'facility_name' in facility_data:
+                print(f"Facility Name: {facility_data['facility_name']}")
+            
+            if 'facility_type' in facility_data:
+                print(f"Facility Type: {facility_data['facility_type']}")
+            
+            if 'reservable' in facility_data:
+                print(f"Is Reservable: {facility_data['reservable']}")
+            else:
+                print("Is Reservable: Unknown")
+        
+        print("Response preview:", json.dumps(data, indent=2)[:500] + "...")
+
+def record_fixtures(start_date, end_date, fixtures_dir=FIXTURES_DIR):
+    """
+    Record every month of every Yosemite campground to a fixture directory
+    
+    Args:
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        fixtures_dir (str): Fixture directory to write to
+    """
+    from check_yosemite import CAMPGROUND_NAMES, get_months_to_check
+    
+    fixtures = FixtureStore(fixtures_dir)
+    try:
+        for facility_id in CAMPGROUND_NAMES:
+            for month_date in get_months_to_check(start_date, end_date):
+                test_campground_api(facility_id, month_date, fixtures)
+    finally:
+        fixtures.save_index()
+    print(f"\nFixtures saved to {fixtures_dir}")
+
+def replay_fixtures(fixtures_dir=FIXTURES_DIR):
+    """
+    Replay every recorded month in a fixture directory
+    
+    Args:
+        fixtures_dir (str): Fixture directory to read from
+    """
+    fixtures = FixtureStore(fixtures_dir)
+    for facility_id, month_date in sorted(fixtures.entries()):
+        replay_campground_api(facility_id, month_date, fixtures)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test the Recreation.gov API, or record/replay month fixtures")
+    parser.add_argument('--record', action='store_true', help="Record every campground's months between --start and --end")
+    parser.add_argument('--replay', action='store_true', help="Run the checks against recorded fixtures")
+    parser.add_argument('--start', default='2025-07-01', help="First date to record (peak season by default)")
+    parser.add_argument('--end', default='2025-09-30', help="Last date to record")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="Fixture directory")
+    args = parser.parse_args()
+    
+    if args.record:
+        record_fixtures(args.start, args.end, args.fixtures)
+    elif args.replay:
+        replay_fixtures(args.fixtures)
+    else:
+        # Test Grant River
+        test_campground_api("233503", "2025-03-01")
+        
+        # Test Fowlers Campground
+        test_campground_api("255119", "2025-03-01")
+        
+        # Test a Yosemite campground for comparison
+        test_campground_api("232447", "2025-03-01")  # Upper Pines
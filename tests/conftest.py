@@ -0,0 +1,34 @@
+import importlib.util
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep tests off the shared SQLite snapshot file; set before the engine modules are imported
+os.environ.setdefault('SNAPSHOT_STORE', '0')
+
+# The modules under test live in the project root
+sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def vercel_function():
+    """Serve api/<name>.py's Handler on a local port; returns a function from name to base URL."""
+    servers = []
+
+    def start(name):
+        spec = importlib.util.spec_from_file_location(f"vercel_{name}", os.path.join(ROOT, 'api', f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), module.Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
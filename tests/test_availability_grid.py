@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from availability_grid import AvailabilityGrid
+
+def grid_with(nights_by_site, start_date='2025-07-01', end_date='2025-07-10'):
+    grid = AvailabilityGrid(start_date, end_date)
+    grid.add_month({'campsites': {
+        site_id: {'availabilities': {f"2025-07-{day:02d}T00:00:00Z": 'Available' for day in days}}
+        for site_id, days in nights_by_site.items()
+    }})
+    return grid
+
+def test_find_stays_needs_every_night_of_the_stay():
+    grid = grid_with({'a': [1, 2, 3], 'b': [2, 3, 5, 6], 'c': [10]})
+
+    assert grid.find_stays(1) == {
+        '2025-07-01': ['a'], '2025-07-02': ['a', 'b'], '2025-07-03': ['a', 'b'],
+        '2025-07-05': ['b'], '2025-07-06': ['b'], '2025-07-10': ['c']
+    }
+    assert grid.find_stays(2) == {'2025-07-01': ['a'], '2025-07-02': ['a', 'b'], '2025-07-05': ['b']}
+    assert grid.find_stays(3) == {'2025-07-01': ['a']}
+    assert grid.find_stays(4) == {}
+
+def test_stays_do_not_run_into_the_next_site():
+    # a ends the range free and b starts it free: no stay may join the two rows
+    grid = grid_with({'a': [9, 10], 'b': [1, 2]})
+
+    assert grid.find_stays(3) == {}
+    assert grid.find_stays(2) == {'2025-07-01': ['b'], '2025-07-09': ['a']}
+
+@pytest.mark.parametrize('nights', [0, 11])
+def test_stays_outside_the_range_are_empty(nights):
+    assert grid_with({'a': list(range(1, 11))}).find_stays(nights) == {}
+
+@pytest.mark.parametrize('nights', [1, 2, 3, 5, 7, 10])
+def test_find_stays_matches_a_night_by_night_search(nights):
+    rng = random.Random(nights)
+    nights_by_site = {str(site): [day for day in range(1, 11) if rng.random() < 0.7] for site in range(30)}
+    grid = grid_with(nights_by_site)
+
+    expected = {}
+    for first in range(1, 12 - nights):
+        sites = [site_id for site_id, days in nights_by_site.items() if all(day in days for day in range(first, first + nights))]
+        if sites:
+            expected[f"2025-07-{first:02d}"] = sites
+    assert grid.find_stays(nights) == expected
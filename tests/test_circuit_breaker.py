@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+import check_yosemite
+import circuit_breaker
+from circuit_breaker import BreakerRegistry, CircuitBreaker
+from month_cache import month_cache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'time', lambda: now[0])
+    return now
+
+def test_breaker_opens_at_the_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    # A success resets the count of consecutive failures
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()['retry_in'] == 30
+
+def test_half_open_trial_closes_or_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock[0] += 30
+    # Only one caller gets the trial
+    assert breaker.allow_request()
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow_request()
+
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.allow_request()
+
+def test_half_open_trial_that_never_reports_is_retried(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow_request()
+
+    clock[0] += 30
+    assert breaker.allow_request()
+
+def test_breaker_registry_drops_least_recently_used():
+    registry = BreakerRegistry(max_breakers=2)
+    first = registry.get('1')
+    registry.get('2')
+    registry.get('1')
+    registry.get('3')
+
+    assert sorted(registry.states()) == ['1', '3']
+    assert registry.get('1') is first
+
+def test_degraded_result_uses_last_known_months():
+    month = {'campsites': {'100': {'availabilities': {'2025-07-02T00:00:00Z': 'Available', '2025-08-02T00:00:00Z': 'Available'}}}}
+    month_cache.set(('232447', '2025-07-01'), month)
+    month_cache.set(('232447', '2025-08-01'), month, fetched_at=time.time() - month_cache.ttl - 100)
+    try:
+        result = check_yosemite.build_degraded_result('232447', ['2025-07-01', '2025-08-01', '2025-09-01'], '2025-07-01', '2025-09-05')
+    finally:
+        month_cache.clear()
+
+    serialized = check_yosemite.serialize_result(result)
+    assert serialized['degraded']
+    assert serialized['availability'] == {'2025-07-02': ['100'], '2025-08-02': ['100']}
+    # Only the month past its TTL makes the result stale
+    assert serialized['stale']
+    assert serialized['age'] >= month_cache.ttl + 100
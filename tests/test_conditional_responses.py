@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+import server
+from month_cache import month_cache
+
+BODY = {'startDate': '2025-07-01', 'endDate': '2025-07-05', 'campgrounds': ['232447']}
+
+MONTH = {'campsites': {'100': {'reservationService': 'Reservable', 'availabilities': {'2025-07-02T00:00:00Z': 'Available'}}}}
+
+@pytest.fixture
+def client():
+    # A fresh cached month, so the engine never goes upstream
+    month_cache.set(('232447', '2025-07-01'), MONTH)
+    yield server.app.test_client()
+    month_cache.clear()
+
+def test_json_response_revalidates_with_if_none_match(client):
+    response = client.post('/check_availability', json=BODY)
+    assert response.status_code == 200
+    assert response.json['results']['232447']['availability'] == {'2025-07-02': ['100']}
+    etag = response.headers['ETag']
+
+    revalidated = client.post('/check_availability', json=BODY, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+
+def test_streamed_response_has_no_etag(client):
+    etag = client.post('/check_availability', json=BODY).headers['ETag']
+
+    # What the web UI sends: streamed results are never 304, whatever If-None-Match says
+    response = client.post('/check_availability?stream=ndjson', json=BODY, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    records = [json.loads(line) for line in response.data.splitlines()]
+    assert [record['type'] for record in records] == ['campground', 'summary']
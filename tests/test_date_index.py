@@ -0,0 +1,60 @@
+import pytest
+
+import check_yosemite
+import server
+from date_index import DateIndex
+
+def month(*site_ids, night='2025-07-02'):
+    return {'campsites': {site_id: {'availabilities': {f"{night}T00:00:00Z": 'Available'}} for site_id in site_ids}}
+
+def test_same_version_is_not_reindexed():
+    index = DateIndex()
+
+    assert index.index_month('1', '2025-07-01', month('a'), version=1.0)
+    assert not index.index_month('1', '2025-07-01', month('b'), version=1.0)
+    assert index.available_on(['2025-07-02']) == {'1': ['a']}
+
+    assert index.index_month('1', '2025-07-01', month('b'), version=2.0)
+    assert index.available_on(['2025-07-02']) == {'1': ['b']}
+
+def test_evicted_months_are_cleared_and_their_slots_reused():
+    index = DateIndex(max_months=2)
+
+    index.index_month('1', '2025-07-01', month('a', 'b'), version=1.0)
+    index.index_month('2', '2025-07-01', month('c'), version=1.0)
+    index.index_month('3', '2025-07-01', month('d'), version=1.0)
+
+    assert index.available_on(['2025-07-02']) == {'2': ['c'], '3': ['d']}
+    stats = index.stats()
+    assert stats['months'] == 2
+    assert stats['evictions'] == 1
+    assert stats['sites'] == 2
+
+    # Facility 1's freed slots go to the next new sites
+    index.index_month('4', '2025-07-01', month('e', 'f'), version=1.0)
+    assert len(index.slot_ids) == 4
+    sites = index.available_on(['2025-07-02'])
+    assert sites['3'] == ['d']
+    assert sorted(sites['4']) == ['e', 'f']
+
+def test_available_on_rejects_non_string_campgrounds():
+    response = server.app.test_client().post('/available_on', json={'dates': ['2025-07-02'], 'campgrounds': [232447]})
+
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid campgrounds. Send a list of facility IDs'
+
+@pytest.mark.parametrize('body, error', [
+    ({'dates': [f"2025-07-{day:02d}" for day in range(1, 32)] * 3}, 'Too many dates'),
+    ({'dates': ['2025-07-02', '2026-07-02']}, 'Dates too far apart'),
+    ({'dates': ['2025-07-02'], 'campgrounds': []}, 'Invalid campgrounds'),
+    ({'dates': ['2025-07-02', '2025-08-30'], 'campgrounds': [str(facility_id) for facility_id in range(200)]},
+     'Too many campgrounds for these dates')
+])
+def test_available_on_rejects_oversized_requests(body, error):
+    with pytest.raises(ValueError, match=error):
+        check_yosemite.parse_available_on_request(body)
+
+def test_available_on_defaults_to_every_campground_only_when_left_out():
+    params = check_yosemite.parse_available_on_request({'dates': ['2025-07-02']})
+
+    assert params['campgrounds'] == list(check_yosemite.CAMPGROUND_NAMES)
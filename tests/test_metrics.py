@@ -0,0 +1,23 @@
+import requests
+
+import metrics
+
+def test_mixed_label_types_still_render():
+    registry = metrics.MetricsRegistry()
+    registry.inc(metrics.UPSTREAM_RESPONSES, (200,))
+    registry.inc(metrics.UPSTREAM_RESPONSES, ('200',))
+    registry.inc(metrics.UPSTREAM_RESPONSES, ('error',))
+    registry.observe(metrics.UPSTREAM_DURATION, 0.1, (232447,))
+    registry.observe(metrics.UPSTREAM_DURATION, 0.1, ('other',))
+
+    body = registry.render().decode()
+
+    assert 'yosemite_upstream_responses_total{status="200"} 2' in body
+    assert 'yosemite_upstream_request_duration_seconds_count{facility="232447"} 1' in body
+
+def test_vercel_serves_metrics_only_on_the_metrics_path(vercel_function):
+    vercel_server = vercel_function('check_availability')
+    assert requests.get(vercel_server + '/api/metrics').status_code == 200
+    assert requests.get(vercel_server + '/api/metrics?x=1').status_code == 200
+    assert requests.get(vercel_server + '/api/check_availability').status_code == 404
+    assert requests.get(vercel_server + '/anything').status_code == 404
@@ -0,0 +1,27 @@
+import time
+
+from month_cache import MonthCache
+
+def test_expired_entries_are_misses():
+    cache = MonthCache(ttl=60)
+    cache.set(('1', '2025-07-01'), {'fresh': True})
+    cache.set(('2', '2025-07-01'), {'fresh': False}, fetched_at=time.time() - 61)
+
+    assert cache.get(('1', '2025-07-01')) == {'fresh': True}
+    assert cache.get(('2', '2025-07-01')) is None
+    assert cache.get(('3', '2025-07-01')) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MonthCache(max_entries=2)
+    cache.set(('1', '2025-07-01'), 'one')
+    cache.set(('2', '2025-07-01'), 'two')
+    # Reading 1 makes 2 the least recently used
+    cache.get(('1', '2025-07-01'))
+    cache.set(('3', '2025-07-01'), 'three')
+
+    assert cache.get(('2', '2025-07-01')) is None
+    assert cache.get(('1', '2025-07-01')) == 'one'
+    assert cache.get(('3', '2025-07-01')) == 'three'
+    assert cache.stats()['evictions'] == 1
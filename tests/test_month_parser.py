@@ -0,0 +1,42 @@
+import json
+
+from month_parser import compact_site, parse_month_stream
+
+MONTH = {
+    'campsites': {
+        '100': {
+            'site': '001',
+            'reservationService': 'Reservable',
+            'max_num_people': 6,
+            'availabilities': {'2025-07-01T00:00:00Z': 'Available', '2025-07-02T00:00:00Z': 'Reserved'}
+        },
+        '101': {
+            'site': '002 é',
+            'reservationService': None,
+            'availabilities': {'2025-07-01T00:00:00Z': 'Reserved', '2025-07-03T00:00:00Z': 'Available'}
+        }
+    },
+    'count': 12,
+    'ratio': 1.5,
+    'big': -2.5e+3,
+    'small': 3E-2,
+    'flag': True,
+    'missing': None
+}
+
+def expected():
+    data = json.loads(json.dumps(MONTH))
+    data['campsites'] = {site_id: compact_site(details) for site_id, details in data['campsites'].items()}
+    return data
+
+def test_split_at_every_byte_offset():
+    body = json.dumps(MONTH, ensure_ascii=False).encode()
+    for offset in range(1, len(body)):
+        assert parse_month_stream([body[:offset], body[offset:]]) == expected(), offset
+
+def test_one_byte_chunks():
+    body = json.dumps(MONTH, separators=(',', ':')).encode()
+    assert parse_month_stream([body[index:index + 1] for index in range(len(body))]) == expected()
+
+def test_number_split_after_the_decimal_point():
+    assert parse_month_stream([b'{"campsites":{},"z":1.', b'5}']) == {'campsites': {}, 'z': 1.5}
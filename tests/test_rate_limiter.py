@@ -0,0 +1,43 @@
+import threading
+import time
+
+from rate_limiter import AdaptiveRateLimiter
+
+def throttle_concurrently(limiter, count, retry_after=None):
+    barrier = threading.Barrier(count)
+
+    def throttle():
+        barrier.wait()
+        limiter.on_throttle(retry_after)
+
+    threads = [threading.Thread(target=throttle) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_concurrent_throttles_cut_the_rate_once():
+    limiter = AdaptiveRateLimiter(rate=20, min_rate=0.5, decrease=0.5, decrease_window=1)
+
+    throttle_concurrently(limiter, 16)
+
+    assert limiter.rate == 10
+    assert limiter.stats()['throttled'] == 16
+
+def test_throttle_after_the_window_cuts_again():
+    limiter = AdaptiveRateLimiter(rate=20, min_rate=0.5, decrease=0.5, decrease_window=0.05)
+
+    throttle_concurrently(limiter, 8)
+    time.sleep(0.1)
+    limiter.on_throttle()
+
+    assert limiter.rate == 5
+
+def test_throttles_within_the_window_still_honour_retry_after():
+    limiter = AdaptiveRateLimiter(rate=20, decrease=0.5, decrease_window=1)
+
+    limiter.on_throttle()
+    limiter.on_throttle(retry_after=30)
+
+    assert limiter.rate == 10
+    assert limiter.stats()['blocked_for'] > 25
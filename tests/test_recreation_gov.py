@@ -0,0 +1,53 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import recreation_gov
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_recgov import FakeRecGov, start_fake_server
+
+def test_released_error_responses_keep_their_connection():
+    server = start_fake_server(FakeRecGov(latency=0, jitter=0, error_rate=1.0))
+    connections = []
+    accept = server.process_request
+    server.process_request = lambda request, address: (connections.append(address), accept(request, address))
+    url = f"http://127.0.0.1:{server.server_port}/api/camps/availability/campground/232447/month?start_date=2025-07-01"
+    try:
+        for _ in range(5):
+            response = recreation_gov.get(url, stream=True)
+            assert response.status_code == 500
+            recreation_gov.release(response)
+
+        assert len(connections) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_async_session_closes_with_its_loop():
+    server = start_fake_server(FakeRecGov(latency=0, jitter=0))
+    url = f"http://127.0.0.1:{server.server_port}/api/camps/availability/campground/232447/month?start_date=2025-07-01"
+
+    async def fetch():
+        response = await recreation_gov.get_async(url)
+        return response.status_code, await recreation_gov.get_async_client()
+
+    try:
+        status, client = asyncio.run(fetch())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert status == 200
+    assert client.closed
+    assert not recreation_gov._async_clients
+
+def test_blocking_entry_points_do_not_import_aiohttp():
+    code = "import runpy, sys, server; runpy.run_path('api/check_availability.py'); print('aiohttp' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, 'SNAPSHOT_STORE': '0'})
+
+    assert result.stdout.splitlines()[-1] == 'False', result.stderr
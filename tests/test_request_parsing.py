@@ -0,0 +1,49 @@
+import pytest
+
+import check_yosemite
+from circuit_breaker import BreakerRegistry
+
+@pytest.mark.parametrize('campgrounds', ['232447', [232447], ['232447', None], {'232447': True}])
+def test_invalid_campgrounds_are_rejected(campgrounds):
+    body = {'startDate': '2025-07-01', 'endDate': '2025-07-05', 'campgrounds': campgrounds}
+
+    with pytest.raises(ValueError, match='Invalid campgrounds'):
+        check_yosemite.parse_availability_request(body)
+    with pytest.raises(ValueError, match='Query 0: Invalid campgrounds'):
+        check_yosemite.parse_batch_request({'queries': [body]})
+
+@pytest.fixture
+def breakers(monkeypatch):
+    registry = BreakerRegistry()
+    monkeypatch.setattr(check_yosemite, 'facility_breakers', registry)
+    return registry
+
+def test_batch_fetches_each_shared_month_once(breakers):
+    queries = check_yosemite.parse_batch_request({'queries': [
+        {'startDate': '2025-07-10', 'endDate': '2025-08-05', 'campgrounds': ['1', '2', '1']},
+        {'startDate': '2025-07-01', 'endDate': '2025-07-05', 'campgrounds': ['2']},
+        {'startDate': '2025-08-01', 'endDate': '2025-08-03', 'campgrounds': ['1'], 'forceRefresh': True}
+    ]})
+
+    fetches, degraded_ids = check_yosemite.plan_batch_fetches(queries)
+
+    # One query forcing a refresh makes the shared fetch skip the cache
+    assert sorted(fetches) == [
+        ('1', '2025-07-01', True), ('1', '2025-08-01', False),
+        ('2', '2025-07-01', True), ('2', '2025-08-01', True)
+    ]
+    assert degraded_ids == set()
+
+def test_batch_skips_facilities_with_an_open_breaker(breakers):
+    breaker = breakers.get('1')
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    queries = check_yosemite.parse_batch_request({'queries': [
+        {'startDate': '2025-07-01', 'endDate': '2025-07-05', 'campgrounds': ['1', '2']},
+        {'startDate': '2025-07-01', 'endDate': '2025-07-05', 'campgrounds': ['1']}
+    ]})
+
+    fetches, degraded_ids = check_yosemite.plan_batch_fetches(queries)
+
+    assert fetches == [('2', '2025-07-01', True)]
+    assert degraded_ids == {'1'}
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+def test_thread_and_coroutine_callers_share_one_call():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        started.set()
+        await asyncio.to_thread(release.wait)
+        return 'payload'
+
+    def run_fetch():
+        return asyncio.run(fetch())
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async('key', fetch))
+        await asyncio.to_thread(started.wait)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(flight.do('key', run_fetch)))
+        thread.start()
+        follower = asyncio.ensure_future(flight.do_async('key', fetch))
+        while flight.stats()['saved'] < 2:
+            await asyncio.sleep(0.01)
+        release.set()
+        outcome = await asyncio.gather(leader, follower)
+        await asyncio.to_thread(thread.join)
+        return outcome + results
+
+    assert asyncio.run(main()) == ['payload'] * 3
+    assert calls == [1]
+    assert flight.stats() == {'executions': 1, 'saved': 2, 'in_flight': 0}
+
+def test_cancelled_caller_does_not_cancel_the_call():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return 'payload'
+
+    async def main():
+        first = asyncio.ensure_future(flight.do_async('key', fetch))
+        second = asyncio.ensure_future(flight.do_async('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 'payload'
@@ -0,0 +1,30 @@
+from snapshot_diff import SnapshotDiffer
+
+def month(**nights):
+    return {'campsites': {'a': {'availabilities': {f"2025-07-{day}T00:00:00Z": status for day, status in nights.items()}}}}
+
+def test_first_payload_sets_the_baseline():
+    differ = SnapshotDiffer()
+
+    assert differ.diff_month('1', '2025-07-01', month(**{'02': 'Available'}), version=1.0) == {'newly_available': [], 'newly_taken': []}
+    assert differ.diff_month('1', '2025-07-01', month(**{'02': 'Available'}), version=2.0) == {'newly_available': [], 'newly_taken': []}
+    assert differ.sites_changed == 0
+
+def test_flipped_and_moved_nights_are_reported():
+    differ = SnapshotDiffer()
+    differ.diff_month('1', '2025-07-01', month(**{'02': 'Available', '03': 'Reserved'}), version=1.0)
+
+    changes = differ.diff_month('1', '2025-07-01', month(**{'02': 'Reserved', '03': 'Available'}), version=2.0)
+    assert changes == {'newly_available': [('1', 'a', '2025-07-03')], 'newly_taken': [('1', 'a', '2025-07-02')]}
+
+    # Compacted payloads only list Available nights, so a moved date with the same status is still a change
+    differ.diff_month('1', '2025-07-01', month(**{'04': 'Available'}), version=3.0)
+    changes = differ.diff_month('1', '2025-07-01', month(**{'05': 'Available'}), version=4.0)
+    assert changes == {'newly_available': [('1', 'a', '2025-07-05')], 'newly_taken': [('1', 'a', '2025-07-04')]}
+
+def test_same_version_is_skipped():
+    differ = SnapshotDiffer()
+    differ.diff_month('1', '2025-07-01', month(**{'02': 'Available'}), version=1.0)
+
+    assert differ.diff_month('1', '2025-07-01', month(**{'02': 'Reserved'}), version=1.0)['newly_taken'] == []
+    assert differ.diff_month('1', '2025-07-01', month(**{'02': 'Reserved'}), version=2.0)['newly_taken'] == [('1', 'a', '2025-07-02')]
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+import check_yosemite
+from month_cache import month_cache
+
+KEY = ('232447', '2025-07-01')
+
+@pytest.fixture
+def refetches(monkeypatch):
+    # Stand in for the upstream: record each background refetch and let the test decide when it ends
+    calls = []
+    release = threading.Event()
+
+    def fetch_month_data(facility_id, month_date, *args):
+        calls.append((facility_id, month_date))
+        release.wait(5)
+        month_cache.set((facility_id, month_date), {'campsites': {'new': {}}})
+
+    monkeypatch.setattr(check_yosemite, 'STALE_WHILE_REVALIDATE', True)
+    monkeypatch.setattr(check_yosemite, 'fetch_month_data', fetch_month_data)
+    yield calls, release
+    release.set()
+    month_cache.clear()
+
+def test_stale_month_is_served_while_one_refresh_runs(refetches):
+    calls, release = refetches
+    month_cache.set(KEY, {'campsites': {'old': {}}}, fetched_at=time.time() - month_cache.ttl - 30)
+
+    first = check_yosemite.get_month_data(*KEY)
+    second = check_yosemite.get_month_data(*KEY)
+
+    # Both callers get the stale payload with its age, and only one refresh starts
+    for payload, age in (first, second):
+        assert payload == {'campsites': {'old': {}}}
+        assert age >= month_cache.ttl + 30
+    assert calls == [KEY]
+
+    release.set()
+    deadline = time.time() + 5
+    while month_cache.stats()['refreshing'] and time.time() < deadline:
+        time.sleep(0.01)
+    assert check_yosemite.get_month_data(*KEY) == ({'campsites': {'new': {}}}, None)
+
+def test_fresh_month_is_not_refreshed(refetches):
+    calls, _ = refetches
+    month_cache.set(KEY, {'campsites': {'old': {}}})
+
+    assert check_yosemite.get_month_data(*KEY) == ({'campsites': {'old': {}}}, None)
+    assert calls == []
@@ -0,0 +1,57 @@
+import pytest
+import requests
+
+import server
+import timing
+from month_cache import month_cache
+
+QUERY = {'startDate': '2025-07-01', 'endDate': '2025-07-05', 'campgrounds': ['232447']}
+
+@pytest.fixture(autouse=True)
+def cached_month():
+    # A fresh cached month, so requests never go upstream
+    month_cache.set(('232447', '2025-07-01'), {'campsites': {'100': {'availabilities': {'2025-07-02T00:00:00Z': 'Available'}}}})
+    yield
+    month_cache.clear()
+
+def phase_names(header):
+    return [entry.split(';')[0] for entry in header.split(', ')]
+
+def test_timer_reports_phases_in_order():
+    timer = timing.RequestTimer()
+    timer.add('custom', 0.001)
+    timer.add('merge', 0.002)
+    timer.add('fetch', 0.003)
+    timer.add('merge', 0.002)
+
+    assert phase_names(timer.server_timing()) == ['fetch', 'merge', 'custom', 'total']
+    assert 'merge;dur=4.0;desc="Merging months into availability grids"' in timer.server_timing()
+    report = timer.to_dict()
+    assert report['merge'] == {'ms': 4.0, 'count': 2}
+    assert report['total_ms'] >= 0
+
+def test_phases_outside_a_request_are_ignored():
+    with timing.phase('merge'):
+        pass
+    timing.record('fetch', 1.0)
+
+    assert timing.current_timer() is None
+
+def test_flask_sends_server_timing_and_debug_timing():
+    client = server.app.test_client()
+
+    response = client.post('/check_availability', json=QUERY)
+    assert phase_names(response.headers['Server-Timing']) == ['fetch', 'merge', 'format', 'serialize', 'encode', 'total']
+    assert 'timing' not in response.json
+
+    # The body's block is taken before serialization, so it only has the engine's phases
+    timed = client.post('/check_availability?debug=timing', json=QUERY).json['timing']
+    assert list(timed) == ['fetch', 'merge', 'format', 'total_ms']
+    assert timed['merge']['count'] == 1
+
+def test_vercel_sends_server_timing_and_debug_timing(vercel_function):
+    url = vercel_function('check_availability') + '/api/check_availability'
+
+    response = requests.post(url, json=QUERY)
+    assert phase_names(response.headers['Server-Timing']) == ['fetch', 'merge', 'format', 'serialize', 'encode', 'total']
+    assert list(requests.post(url + '?debug=timing', json=QUERY).json()['timing']) == ['fetch', 'merge', 'format', 'total_ms']
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from transports import ThreadedTransport
+
+def test_threaded_transport_caps_concurrency_across_runs():
+    transport = ThreadedTransport(max_workers=3)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def fetch(value):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return value * 2
+
+    results = []
+    def request():
+        results.append(sorted(result for _, result in transport.run(fetch, [(n,) for n in range(6)], max_concurrency=3)))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[0, 2, 4, 6, 8, 10]] * 4
+    assert peak[0] == 3
+
+def test_threaded_transport_caps_each_run():
+    transport = ThreadedTransport(max_workers=8)
+    started = []
+
+    def fetch(value):
+        started.append(value)
+        time.sleep(0.02)
+        return value
+
+    completed = transport.run(fetch, [(n,) for n in range(8)], max_concurrency=2)
+    next(completed)
+    completed.close()
+    time.sleep(0.05)
+
+    # Stopping early leaves the rest of the run unstarted
+    assert len(started) <= 3
@@ -0,0 +1,47 @@
+import pytest
+import requests
+
+import metrics
+from month_cache import month_cache
+
+QUERY = {'startDate': '2025-07-01', 'endDate': '2025-07-05', 'campgrounds': ['232447']}
+
+MONTH = {'campsites': {'100': {'reservationService': 'Reservable', 'availabilities': {'2025-07-02T00:00:00Z': 'Available'}}}}
+
+# (function, valid body, invalid body)
+FUNCTIONS = [
+    ('check_availability_batch', {'queries': [QUERY, QUERY]}, {'queries': []}),
+    ('available_on', {'dates': ['2025-07-02'], 'campgrounds': ['232447']}, {'dates': ['2025-07-02'], 'campgrounds': []}),
+]
+
+@pytest.fixture(autouse=True)
+def cached_month():
+    # A fresh cached month, so the functions never go upstream
+    month_cache.set(('232447', '2025-07-01'), MONTH)
+    yield
+    month_cache.clear()
+
+def responses_total(endpoint, status):
+    counters, _ = metrics.metrics.snapshot()
+    return counters.get((metrics.HTTP_RESPONSES, (endpoint, str(status))), 0)
+
+@pytest.mark.parametrize('name, body, invalid', FUNCTIONS)
+def test_function_records_metrics_and_server_timing(vercel_function, name, body, invalid):
+    base = vercel_function(name)
+    endpoint = f"/api/{name}"
+    ok_before, bad_before = responses_total(endpoint, 200), responses_total(endpoint, 400)
+
+    response = requests.post(base + endpoint, json=body)
+    assert response.status_code == 200
+    assert response.json()['success']
+    assert 'Server-Timing' in response.headers
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+    assert requests.post(base + endpoint, json=body, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    rejected = requests.post(base + endpoint, json=invalid)
+    assert rejected.status_code == 400
+    assert rejected.json()['success'] is False
+    assert rejected.headers['Access-Control-Allow-Origin'] == '*'
+
+    assert responses_total(endpoint, 200) == ok_before + 1
+    assert responses_total(endpoint, 400) == bad_before + 1
@@ -0,0 +1,167 @@
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Send a Server-Timing header with every JSON response
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') == '1'
+
+# Allow ?debug=profile to run a request under cProfile (expensive: keep off in production)
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', '0') == '1'
+
+# Functions listed in a profile response
+PROFILE_TOP_FUNCTIONS = int(os.environ.get('PROFILE_TOP_FUNCTIONS', '40'))
+
+# Phases, in the order they are reported, and their Server-Timing descriptions
+PHASES = {
+    'fetch': 'Waiting on month fetches',
+    'upstream': 'Upstream requests, summed over concurrent fetches',
+    'parse': 'Reading and parsing month bodies, summed over concurrent fetches',
+    'merge': 'Merging months into availability grids',
+    'format': 'Building per-date results',
+    'serialize': 'JSON serialization',
+    'encode': 'Compression'
+}
+
+# Timer of the request being handled, if any (copied into the engine's fetch workers)
+_current_timer = contextvars.ContextVar('request_timer', default=None)
+
+class RequestTimer:
+    """
+    Accumulates how long one request spent in each phase.
+
+    Fetch workers add to the same timer concurrently, so phases they record
+    (upstream, parse) are sums across fetches and can exceed the wall time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        """
+        Add time to a phase.
+
+        Args:
+            name (str): Phase name from PHASES
+            seconds (float): Time spent
+        """
+        with self._lock:
+            entry = self.phases.get(name)
+            if entry is None:
+                self.phases[name] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def _ordered(self):
+        with self._lock:
+            phases = {name: tuple(entry) for name, entry in self.phases.items()}
+        order = list(PHASES) + sorted(name for name in phases if name not in PHASES)
+        return [(name, phases[name]) for name in order if name in phases]
+
+    def server_timing(self):
+        """
+        Build a Server-Timing header value from the phases so far, plus the total.
+
+        Returns:
+            str: Comma-separated 'name;dur=ms;desc="..."' entries
+        """
+        entries = [
+            f'{name};dur={seconds * 1000:.1f};desc="{PHASES.get(name, name)}"'
+            for name, (seconds, _) in self._ordered()
+        ]
+        entries.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}')
+        return ', '.join(entries)
+
+    def to_dict(self):
+        """
+        Get the phases so far for a ?debug=timing response block.
+
+        Returns:
+            dict: Phase name -> {'ms', 'count'}, plus 'total_ms'
+        """
+        timing = {name: {'ms': round(seconds * 1000, 3), 'count': count} for name, (seconds, count) in self._ordered()}
+        timing['total_ms'] = round((time.perf_counter() - self.started) * 1000, 3)
+        return timing
+
+def start_request():
+    """
+    Start timing the current request.
+
+    Returns:
+        tuple: (RequestTimer, token for end_request)
+    """
+    timer = RequestTimer()
+    return timer, _current_timer.set(timer)
+
+def end_request(token):
+    """Stop attributing phases to the request started with start_request."""
+    _current_timer.reset(token)
+
+def current_timer():
+    """The current request's RequestTimer, or None if it isn't being timed."""
+    return _current_timer.get()
+
+def record(name, seconds):
+    """
+    Add time to a phase of the current request, if it is being timed.
+
+    Args:
+        name (str): Phase name from PHASES
+        seconds (float): Time spent
+    """
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+@contextmanager
+def phase(name):
+    """Time a block as a phase of the current request, if it is being timed."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+def wants_timing(debug_param):
+    """Whether a ?debug= value asks for the timing block in the JSON body."""
+    return debug_param == 'timing'
+
+def wants_profile(debug_param):
+    """Whether a ?debug= value asks for a cProfile run, and profiling is enabled."""
+    return PROFILE_REQUESTS and debug_param == 'profile'
+
+def profile_call(fn, *args, **kwargs):
+    """
+    Run a function under cProfile.
+
+    cProfile only sees the calling thread, so run the engine with the
+    blocking transport to capture the fetches too.
+
+    Args:
+        fn (callable): Function to profile
+        *args, **kwargs: Its arguments
+
+    Returns:
+        bytes: pstats report of the top PROFILE_TOP_FUNCTIONS functions by cumulative time
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        fn(*args, **kwargs)
+    finally:
+        profile.disable()
+
+    report = io.StringIO()
+    pstats.Stats(profile, stream=report).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return report.getvalue().encode()
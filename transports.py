@@ -0,0 +1,212 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+# How the engine runs its (facility, month) fetches: 'blocking', 'threaded' or 'asyncio'
+ENGINE_TRANSPORT = os.environ.get('ENGINE_TRANSPORT', 'threaded')
+
+# Threads the threaded transport shares across every request: the process-wide cap on its concurrent calls
+THREADED_TRANSPORT_THREADS = int(os.environ.get('THREADED_TRANSPORT_THREADS', '16'))
+
+# Threads the asyncio transport keeps for plain (blocking) functions
+ASYNCIO_BLOCKING_THREADS = int(os.environ.get('ASYNCIO_BLOCKING_THREADS', '32'))
+
+class BlockingTransport:
+    """Runs every call one after another on the caller's thread."""
+
+    name = 'blocking'
+
+    def run(self, fn, calls, max_concurrency=None):
+        """
+        Run fn over a list of argument tuples.
+
+        Args:
+            fn (callable): Function to call
+            calls (list): Argument tuples, one per call
+            max_concurrency (int): Ignored; calls run one at a time
+
+        Yields:
+            tuple: (index into calls, result) in completion order
+        """
+        for index, args in enumerate(calls):
+            yield index, fn(*args)
+
+class ThreadedTransport:
+    """
+    Runs calls on a process-wide thread pool.
+
+    The pool's size caps concurrent calls across every request in the
+    process; max_concurrency further caps how many calls one run keeps in
+    flight, so one large request can't queue ahead of everyone else's.
+    """
+
+    name = 'threaded'
+
+    def __init__(self, max_workers=THREADED_TRANSPORT_THREADS):
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """The shared thread pool, started on first use."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='engine-threaded')
+        return self._executor
+
+    def run(self, fn, calls, max_concurrency=16):
+        """
+        Run fn over a list of argument tuples, at most max_concurrency at a time.
+
+        Args:
+            fn (callable): Function to call
+            calls (list): Argument tuples, one per call
+            max_concurrency (int): Cap on this run's concurrent calls
+
+        Yields:
+            tuple: (index into calls, result) in completion order
+        """
+        if not calls:
+            return
+
+        pending = iter(enumerate(calls))
+        in_flight = {}
+
+        def submit(count):
+            for index, args in pending:
+                # Each call runs in a copy of the caller's context (e.g. its request timer)
+                in_flight[self.executor.submit(contextvars.copy_context().run, fn, *args)] = index
+                count -= 1
+                if not count:
+                    break
+
+        try:
+            submit(max(1, max_concurrency))
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    submit(1)
+                    yield index, future.result()
+        finally:
+            # Don't start fetches nobody will read if the caller stops early
+            for future in in_flight:
+                future.cancel()
+
+class AsyncioTransport:
+    """
+    Runs calls as tasks on a process-wide event loop in a background thread.
+
+    Coroutine functions are awaited on the loop directly; plain functions run
+    in the loop's default executor. A semaphore per run caps concurrency, and
+    every call sees the caller's context variables. Callers that are coroutines
+    themselves (the ASGI app) use run_async to run on their own loop instead.
+    """
+
+    name = 'asyncio'
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        """The background event loop, started on first use."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    loop.set_default_executor(ThreadPoolExecutor(max_workers=ASYNCIO_BLOCKING_THREADS))
+                    threading.Thread(target=loop.run_forever, name='engine-asyncio', daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    @staticmethod
+    async def _call(semaphore, fn, args, context=None):
+        # Tasks start from the loop thread's context; carry over the caller's (e.g. its request timer)
+        for var, value in (context or {}).items():
+            var.set(value)
+        async with semaphore:
+            if asyncio.iscoroutinefunction(fn):
+                return await fn(*args)
+            return await asyncio.to_thread(fn, *args)
+
+    def run(self, fn, calls, max_concurrency=16):
+        """
+        Run fn over a list of argument tuples as event loop tasks.
+
+        Args:
+            fn (callable): Function or coroutine function to call
+            calls (list): Argument tuples, one per call
+            max_concurrency (int): Cap on concurrent calls
+
+        Yields:
+            tuple: (index into calls, result) in completion order
+        """
+        if not calls:
+            return
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        context = contextvars.copy_context()
+        futures = {
+            asyncio.run_coroutine_threadsafe(self._call(semaphore, fn, args, context), self.loop): index
+            for index, args in enumerate(calls)
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def run_async(self, fn, calls, max_concurrency=16):
+        """
+        Run fn over a list of argument tuples as tasks on the running event loop.
+
+        For callers that are coroutines themselves; the tasks inherit the caller's context.
+
+        Args:
+            fn (callable): Function or coroutine function to call
+            calls (list): Argument tuples, one per call
+            max_concurrency (int): Cap on concurrent calls
+
+        Yields:
+            tuple: (index into calls, result) in completion order
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        tasks = {asyncio.ensure_future(self._call(semaphore, fn, args)): index for index, args in enumerate(calls)}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield tasks[task], task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+TRANSPORTS = {
+    'blocking': BlockingTransport(),
+    'threaded': ThreadedTransport(),
+    'asyncio': AsyncioTransport()
+}
+
+def get_transport(name=None):
+    """
+    Get a transport by name.
+
+    Args:
+        name (str): 'blocking', 'threaded' or 'asyncio' (defaults to ENGINE_TRANSPORT)
+
+    Returns:
+        Transport with a run(fn, calls, max_concurrency) method
+    """
+    name = name or ENGINE_TRANSPORT
+    if name not in TRANSPORTS:
+        print(f"Unknown engine transport {name!r}, using threaded")
+        name = 'threaded'
+    return TRANSPORTS[name]
@@ -0,0 +1,107 @@
+from http.server import BaseHTTPRequestHandler
+import json
+import time
+
+import metrics
+import timing
+from http_encoding import encode_response
+from json_encoding import dumps
+
+class VercelHandler(BaseHTTPRequestHandler):
+    """
+    Base for the Vercel functions in api/.
+
+    Every POST is counted in the request metrics under the subclass's
+    ENDPOINT and timed for Server-Timing; the subclass answers it in
+    handle_post with read_json, send_json and send_error_json, which add the
+    CORS headers every function shares.
+    """
+
+    # Route label for the function's request metrics
+    ENDPOINT = None
+
+    def send_response(self, code, message=None):
+        # Remember the status for the request metrics
+        self.status_code = code
+        super().send_response(code, message)
+
+    def do_POST(self):
+        started = time.perf_counter()
+        self.status_code = 500
+        metrics.request_started(self.ENDPOINT)
+        self.request_timer, token = timing.start_request()
+        try:
+            self.handle_post()
+        finally:
+            timing.end_request(token)
+            metrics.request_finished(self.ENDPOINT, self.status_code, time.perf_counter() - started)
+
+    def handle_post(self):
+        """Answer the POST; implemented by each function."""
+        raise NotImplementedError
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_cors_headers()
+        self.send_header('Access-Control-Max-Age', '86400')  # 24 hours
+        self.end_headers()
+
+    def send_cors_headers(self):
+        """Send the CORS headers shared by every response."""
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match')
+
+    def read_json(self):
+        """
+        Read and decode the JSON request body.
+
+        Raises:
+            ValueError: If the body is not valid JSON
+        """
+        content_length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(content_length))
+
+    def send_error_json(self, status, message):
+        """
+        Send a {'success': False, 'error': message} body.
+
+        Args:
+            status (int): HTTP status code
+            message (str): Error message for the client
+        """
+        body = dumps({
+            'success': False,
+            'error': message
+        })
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, result):
+        """
+        Send a result with a content-hash ETag (304 if the client already has it), compressed when accepted.
+
+        Args:
+            result (dict): Response body
+        """
+        with timing.phase('serialize'):
+            body = dumps(result)
+        with timing.phase('encode'):
+            status, body, headers = encode_response(body, self.headers.get('If-None-Match'), self.headers.get('Accept-Encoding'))
+
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if timing.SERVER_TIMING:
+            self.send_header('Server-Timing', self.request_timer.server_timing())
+        self.send_cors_headers()
+        self.send_header('Access-Control-Expose-Headers', 'ETag, Server-Timing')
+        self.end_headers()
+
+        self.wfile.write(body)